@@ -34,28 +34,22 @@ Design notes
 This script is NOT a temp script -- it's the permanent handbook builder.
 Re-run any time chapters change. Online reader auto-syncs; the PDF does not.
 
+* The PDF toolchain (xhtml2pdf, reportlab, Pillow, PyMuPDF) is imported inside
+  the functions that use it, so importing this module -- `nwca.py handbook
+  --help`, the stand-in benchmark -- costs nothing until a PDF is rendered.
+
 Run: python scripts/build-handbook-pdf.py
 """
-import json
+import argparse
 import os
 import re
 import shutil
 import sys
 import tempfile
-import time
-import urllib.request
 from datetime import datetime
 
-from xhtml2pdf import pisa
-from xhtml2pdf.default import DEFAULT_FONT
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.lib.fonts import addMapping
-from PIL import Image, ImageDraw, ImageFont
-import fitz  # PyMuPDF
+from nwca_catalog.handbook import fetch_handbook_chapters
 
-PROXY = 'https://caspio-pricing-proxy-ab30a049961a.herokuapp.com'
-PARENT_ID = 'employee-handbook'
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 FONTS = os.path.join(SCRIPT_DIR, 'fonts')
 LOGO_PATH = os.path.join(SCRIPT_DIR, 'assets', 'nwca-logo.png')
@@ -80,6 +74,11 @@ def register_fonts():
     addMapping wires up the bold/italic variants so <b>/<i> and font-weight
     resolve to the right TTF; DEFAULT_FONT lets `font-family: HBSans` resolve.
     """
+    from xhtml2pdf.default import DEFAULT_FONT
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+    from reportlab.lib.fonts import addMapping
+
     def reg(fam, r, b=None, i=None, bi=None):
         variants = {(0, 0): r, (1, 0): b or r, (0, 1): i or r, (1, 1): bi or b or r}
         for (bold, italic), filename in variants.items():
@@ -105,6 +104,8 @@ def build_title_png(out_path):
     image (see prepend_cover), so it bleeds edge-to-edge regardless of pixel
     count -- the gradient also flate-compresses to ~200 KB inside the PDF.
     """
+    from PIL import Image, ImageDraw, ImageFont
+
     dpi = 300
     w, h = int(8.5 * dpi), int(11 * dpi)
 
@@ -171,48 +172,6 @@ def build_title_png(out_path):
     img.save(out_path, 'PNG')
 
 
-# --------------------------------------------------------------------------
-# Caspio fetch.
-# --------------------------------------------------------------------------
-def fetch_json(url):
-    """GET a URL and return parsed JSON. Cache-busts via timestamp."""
-    sep = '&' if '?' in url else '?'
-    full = f'{url}{sep}_={int(time.time())}'
-    with urllib.request.urlopen(full, timeout=15) as resp:
-        return json.load(resp)
-
-
-def fetch_handbook_chapters():
-    """Fetch the parent policy and all child chapters (full Body_HTML).
-
-    The tree endpoint nests children under the parent and strips Body_HTML to
-    keep the payload small, so we use it only to discover ordered chapter IDs,
-    then fetch each chapter individually (throttled to avoid 429).
-    """
-    tree = fetch_json(f'{PROXY}/api/policies-public/tree')
-    chapter_ids = []
-    for cat in tree.get('tree', []):
-        for p in cat.get('policies', []):
-            if p.get('Policy_ID') == PARENT_ID:
-                for child in p.get('children', []):
-                    chapter_ids.append((
-                        child['Policy_ID'],
-                        child.get('Sort_Order', 99999),
-                    ))
-                break
-    chapter_ids.sort(key=lambda x: x[1])
-
-    parent_res = fetch_json(f'{PROXY}/api/policies-public/{PARENT_ID}')
-    parent = parent_res.get('policy')
-
-    full_chapters = []
-    for cid, _ in chapter_ids:
-        full = fetch_json(f'{PROXY}/api/policies-public/{cid}')
-        full_chapters.append(full['policy'])
-        time.sleep(0.4)  # gentle pacing -- 22 requests * 0.4s
-    return parent, full_chapters
-
-
 # --------------------------------------------------------------------------
 # HTML cleaning.
 # --------------------------------------------------------------------------
@@ -475,6 +434,8 @@ def _make_link_callback(img_dir):
 
 
 def render_pdf(html, out_path, link_callback):
+    from xhtml2pdf import pisa
+
     os.makedirs(os.path.dirname(out_path), exist_ok=True)
     with open(out_path, 'wb') as out:
         status = pisa.CreatePDF(html, dest=out, encoding='utf-8',
@@ -485,6 +446,8 @@ def render_pdf(html, out_path, link_callback):
 
 def extract_page_map(pdf_path):
     """Read PDF bookmarks -> {normalized title: 1-based page number}."""
+    import fitz  # PyMuPDF
+
     doc = fitz.open(pdf_path)
     toc = doc.get_toc(simple=True)  # [[level, title, page], ...]
     doc.close()
@@ -506,6 +469,8 @@ def prepend_cover(body_pdf, cover_png, out_path):
     the visible page numbers (footers + Contents) are left as-is -- the cover is
     intentionally unnumbered.
     """
+    import fitz  # PyMuPDF
+
     doc = fitz.open(body_pdf)
     toc = doc.get_toc(simple=True)  # body-relative, before the insert
     cover = doc.new_page(0, width=612, height=792)  # US Letter, pt
@@ -518,7 +483,11 @@ def prepend_cover(body_pdf, cover_png, out_path):
     doc.close()
 
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.parse_args(argv)
+    import fitz  # PyMuPDF
+
     register_fonts()
 
     print('Fetching handbook content from Caspio...')
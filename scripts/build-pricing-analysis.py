@@ -11,17 +11,20 @@ The data JSON deliberately lives in memory/ rather than dashboards/: gateStaffHt
 only gates *.html, so a JSON dropped under /dashboards would be readable by anyone.
 
     python scripts/build-pricing-analysis.py
+    python scripts/build-pricing-analysis.py --out /tmp/pricing-analysis.html   # preview elsewhere
+
+Importing the module reads nothing: main() loads the JSON, so `nwca.py --help` and
+`nwca.py pricing-analysis --help` don't pay for it.
 
 Bump CSS_VER whenever pricing-analysis.css changes.
 """
+import argparse
 import json
 import os
 import sys
 import io
 from html import escape
 
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
-
 ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA = os.path.join(ROOT, 'memory', 'pricing-analysis-data.json')
 OUT = os.path.join(ROOT, 'dashboards', 'pricing-analysis.html')
@@ -38,7 +41,14 @@ BAND_LABEL = {
     '$25+': '$25+ &mdash; Carhartt, hoodies, North Face',
 }
 
-D = json.load(open(DATA, encoding='utf-8'))
+D = None  # the analysis JSON, set by load_data()
+
+
+def load_data(path=DATA):
+    global D
+    with open(path, encoding='utf-8') as f:
+        D = json.load(f)
+    return D
 
 
 # ------------------------------------------------------------------ formatting
@@ -1433,11 +1443,18 @@ def build():
        sec_design(), sec_rules(), sec_limits(), JS_VER)
 
 
-if __name__ == '__main__':
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--data', default=DATA, help='analysis JSON (default memory/pricing-analysis-data.json)')
+    parser.add_argument('--out', default=OUT, help='page to write (default dashboards/pricing-analysis.html)')
+    args = parser.parse_args(argv)
+
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    load_data(args.data)
     html = build()
-    with open(OUT, 'w', encoding='utf-8', newline='\n') as f:
+    with open(args.out, 'w', encoding='utf-8', newline='\n') as f:
         f.write(html)
-    print('wrote %s (%.1f KB)' % (OUT, len(html.encode('utf-8')) / 1024))
+    print('wrote %s (%.1f KB)' % (args.out, len(html.encode('utf-8')) / 1024))
     # structural self-check -- a generated file should never ship broken
     import re
     problems = []
@@ -1461,5 +1478,10 @@ if __name__ == '__main__':
         print('\nFAILED:')
         for p in problems:
             print('  - ' + p)
-        sys.exit(1)
+        return 1
     print('structural check: OK')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
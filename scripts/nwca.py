@@ -0,0 +1,151 @@
+"""
+nwca - one command line for the catalog and report scripts
+
+Each subcommand runs one of the scripts in scripts/ with the remaining
+arguments, exactly as if that script had been started directly:
+
+    top-sellers       process-top-sellers.py     (pandas, aiohttp)
+    new-products      process-new-products.py    (pandas, aiohttp)
+    pricing-analysis  build-pricing-analysis.py  (standard library)
+    handbook          build-handbook-pdf.py      (xhtml2pdf, reportlab, Pillow, PyMuPDF)
+
+This module imports only the standard library. A script and its
+dependencies are loaded after the subcommand is known, so `nwca.py --help`
+or a bare `nwca.py` starts in tens of milliseconds instead of paying for
+pandas and aiohttp (about 0.7s) or the PDF toolchain.
+
+Usage:
+    python scripts/nwca.py --help
+    python scripts/nwca.py top-sellers -i export.csv.gz --clusters
+    python scripts/nwca.py new-products --resume
+    python scripts/nwca.py pricing-analysis
+    python scripts/nwca.py handbook
+
+Measure startup (python -X importtime, slowest imports first):
+    python scripts/nwca.py startup
+    python scripts/nwca.py startup top-sellers
+"""
+
+import argparse
+import os
+import sys
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class Command(NamedTuple):
+    """A subcommand and the script that implements it"""
+    script: str
+    help: str
+
+
+COMMANDS: Dict[str, Command] = {
+    'top-sellers': Command('process-top-sellers', "Validate top sellers against the pricing API"),
+    'new-products': Command('process-new-products', "Validate new products and plan isNew updates"),
+    'pricing-analysis': Command('build-pricing-analysis', "Render dashboards/pricing-analysis.html"),
+    'handbook': Command('build-handbook-pdf', "Build the Employee Handbook PDF"),
+}
+
+STARTUP_TOP = 12    # imports listed by `startup`
+
+
+def load_script(name: str):
+    """Import a hyphenated script in scripts/ (e.g. process-top-sellers) as a module"""
+    import importlib.util
+
+    if SCRIPT_DIR not in sys.path:
+        sys.path.insert(0, SCRIPT_DIR)  # nwca_catalog
+    path = os.path.join(SCRIPT_DIR, f"{name}.py")
+    spec = importlib.util.spec_from_file_location(name.replace('-', '_'), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def run(command: str, argv: List[str]) -> int:
+    """
+    Run a subcommand's script with argv
+
+    Returns:
+        The script's exit code (async mains are run to completion)
+    """
+    module = load_script(COMMANDS[command].script)
+    sys.argv = [f"nwca.py {command}"] + argv  # the script's usage lines read `nwca.py top-sellers ...`
+    result = module.main(argv)
+    if hasattr(result, '__await__'):
+        import asyncio
+
+        result = asyncio.run(result)
+    return result or 0
+
+
+def parse_importtime(stderr: str) -> List[Tuple[int, int, str]]:
+    """
+    (self us, cumulative us, module) for each top-level import in -X importtime output
+
+    Nested imports are folded into the cumulative time of the import that
+    triggered them.
+    """
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|', 2)
+        if name.startswith('  '):
+            continue  # nested
+        imports.append((int(own), int(cumulative), name.strip()))
+    return imports
+
+
+def startup(argv: List[str]) -> int:
+    """Time `nwca.py [COMMAND] --help` in a fresh interpreter and list the slowest imports"""
+    import subprocess
+    import time
+
+    target = argv[:1] + ['--help']
+    started = time.perf_counter()
+    completed = subprocess.run([sys.executable, '-X', 'importtime', os.path.abspath(__file__)] + target,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    elapsed = time.perf_counter() - started
+
+    imports = parse_importtime(completed.stderr)
+    total = sum(cumulative for _, cumulative, _ in imports)
+    print(f"[INFO] nwca.py {' '.join(target)}: {elapsed * 1000:.0f} ms wall, "
+          f"{total / 1000:.0f} ms importing {len(imports)} top-level module(s)")
+    for own, cumulative, name in sorted(imports, key=lambda item: -item[1])[:STARTUP_TOP]:
+        print(f"   {cumulative / 1000:8.1f} ms  {name}")
+    return completed.returncode
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Top-level parser; everything after the subcommand belongs to its script"""
+    width = max(map(len, COMMANDS))
+    listing = '\n'.join(f"  {name:<{width}}  {command.help}" for name, command in COMMANDS.items())
+    parser = argparse.ArgumentParser(
+        prog='nwca.py',
+        description=__doc__.strip().splitlines()[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=f"commands:\n{listing}\n  {'startup':<{width}}  Measure startup with -X importtime "
+               f"(startup [COMMAND])\n\nRun `nwca.py COMMAND --help` for a command's options."
+    )
+    parser.add_argument('command', nargs='?', choices=[*COMMANDS, 'startup'], metavar='COMMAND',
+                        help="One of the commands below")
+    parser.add_argument('args', nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Entry point"""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command is None:
+        parser.print_help()
+        return 0
+    if args.command == 'startup':
+        return startup(args.args)
+    return run(args.command, args.args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,7 @@
+"""
+Shared helpers for the catalog validation scripts.
+
+The entry points stay in scripts/ (process-top-sellers.py,
+process-new-products.py); they run with scripts/ on sys.path, so this
+package is importable as ``nwca_catalog`` without installing anything.
+"""
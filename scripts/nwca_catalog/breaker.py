@@ -0,0 +1,176 @@
+"""
+Circuit breaker for the validators' HTTP calls
+
+When the Caspio proxy is down every request waits out its timeout and
+retries, so a long run turns into hours of "Timeout" rows. The breaker
+watches a rolling window of call outcomes:
+
+    CLOSED     calls go through; once at least min_calls outcomes are in the
+               window and the failure rate reaches the threshold -> OPEN
+    OPEN       calls fail immediately with CircuitOpenError (no request,
+               no timeout); after the cooldown -> HALF_OPEN
+    HALF_OPEN  up to `probes` trial calls go through; if they all succeed
+               -> CLOSED, if any fails -> OPEN for another cooldown
+
+Failures are timeouts, dropped connections and 5xx responses. 429s are
+left to the concurrency limiter and retry policy, and 4xx / "not found"
+answers count as successes, because the proxy is up.
+
+Enter the guard after any wait for a concurrency slot. allow() decides
+when the call is about to go out, so a call that queued while the
+circuit was closed is still skipped once it has opened.
+
+Usage:
+    async with limiter.slot() as slot, breaker.guard():
+        ...  # one HTTP call; raises CircuitOpenError while open
+"""
+
+import asyncio
+import contextlib
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import AsyncIterator, List
+
+import aiohttp
+
+from .retry import RetryableStatus
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+DEFAULT_FAILURE_RATE = 0.5
+DEFAULT_WINDOW = 20
+DEFAULT_MIN_CALLS = 10
+DEFAULT_COOLDOWN = 30.0    # seconds
+DEFAULT_PROBES = 3
+
+# Status given to styles skipped while the circuit is open
+CIRCUIT_OPEN_STATUS = 'Circuit Open'
+
+
+class CircuitOpenError(Exception):
+    """Call short-circuited because the API is considered down"""
+
+
+@dataclass
+class Transition:
+    """One change of breaker state"""
+    at: float           # wall-clock time.time()
+    elapsed: float      # seconds since the breaker was created
+    old: str
+    new: str
+    reason: str
+
+
+def is_failure(error: BaseException) -> bool:
+    """Outcomes that suggest the API itself is down"""
+    if isinstance(error, RetryableStatus):
+        return error.status >= 500
+    return isinstance(error, (asyncio.TimeoutError, aiohttp.ClientConnectionError))
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker over a rolling window of outcomes"""
+
+    def __init__(self, failure_rate: float = DEFAULT_FAILURE_RATE, window: int = DEFAULT_WINDOW,
+                 min_calls: int = DEFAULT_MIN_CALLS, cooldown: float = DEFAULT_COOLDOWN,
+                 probes: int = DEFAULT_PROBES, indent: str = ''):
+        self.failure_rate = failure_rate
+        self.min_calls = min(min_calls, window)
+        self.cooldown = cooldown
+        self.probes = probes
+        self.indent = indent
+
+        self.state = CLOSED
+        self.short_circuited = 0
+        self.transitions: List[Transition] = []
+        self._outcomes = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._probes_started = 0
+        self._probes_passed = 0
+        self._probe_round = 0
+        self._origin = time.monotonic()
+
+    def _move(self, new: str, reason: str) -> None:
+        now = time.monotonic()
+        self.transitions.append(Transition(time.time(), round(now - self._origin, 3), self.state, new, reason))
+        print(f"{self.indent}[WARN] API circuit {self.state} -> {new}: {reason}")
+        self.state = new
+        if new == OPEN:
+            self._opened_at = now
+        elif new == HALF_OPEN:
+            self._probe_round += 1
+            self._probes_started = 0
+            self._probes_passed = 0
+        else:
+            self._outcomes.clear()
+
+    def allow(self) -> bool:
+        """Whether a call may go out now (counts the call as a probe when half-open)"""
+        if self.state == OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+            self._move(HALF_OPEN, f"cooldown of {self.cooldown:g}s elapsed, sending {self.probes} probe(s)")
+        if self.state == CLOSED:
+            return True
+        if self.state == HALF_OPEN and self._probes_started < self.probes:
+            self._probes_started += 1
+            return True
+        self.short_circuited += 1
+        return False
+
+    def record(self, failed: bool) -> None:
+        """Feed one call outcome into the state machine"""
+        if self.state == HALF_OPEN:
+            if failed:
+                self._move(OPEN, "probe failed")
+            else:
+                self._probes_passed += 1
+                if self._probes_passed >= self.probes:
+                    self._move(CLOSED, f"{self.probes} probe(s) succeeded")
+            return
+        if self.state == OPEN:
+            return  # late result of a call sent before the circuit opened
+
+        self._outcomes.append(failed)
+        failures = sum(self._outcomes)
+        if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_rate:
+            self._move(OPEN, f"{failures} of the last {len(self._outcomes)} calls failed")
+
+    @contextlib.asynccontextmanager
+    async def guard(self) -> AsyncIterator[None]:
+        """
+        Run one call under the breaker
+
+        Raises:
+            CircuitOpenError: The circuit is open (no call is made)
+        """
+        if not self.allow():
+            raise CircuitOpenError("API circuit open - request skipped")
+        probe_round = self._probe_round if self.state == HALF_OPEN else None
+        try:
+            yield
+        except Exception as e:
+            self.record(is_failure(e))
+            raise
+        except BaseException:
+            # Cancelled before an outcome: hand a probe back, or half-open would refuse every later call
+            if probe_round is not None and self.state == HALF_OPEN and self._probe_round == probe_round:
+                self._probes_started -= 1
+            raise
+        else:
+            self.record(False)
+
+    def summary(self) -> str:
+        opened = sum(1 for t in self.transitions if t.new == OPEN)
+        return (f"circuit {self.state}, opened {opened} time(s), "
+                f"{self.short_circuited} call(s) short-circuited")
+
+    def report_lines(self) -> List[str]:
+        """State transitions for the run report (empty when the circuit never opened)"""
+        if not self.transitions:
+            return []
+        lines = [f"{time.strftime('%H:%M:%S', time.localtime(t.at))} (+{t.elapsed:.1f}s) "
+                 f"{t.old} -> {t.new}: {t.reason}" for t in self.transitions]
+        lines.append(f"Short-circuited calls: {self.short_circuited}")
+        return lines
@@ -0,0 +1,69 @@
+"""
+Vectorized style number cleaning
+
+clean_styles() is the column form of StyleCleaner.clean_style: split on the
+first underscore, strip whitespace from both halves, keep case as entered.
+It produces Style_Cleaned and Size_Extracted in one pass with pandas string
+methods instead of three Python-level .apply() loops per row.
+
+Check it against StyleCleaner.clean_style on both embedded CSVs:
+    python -m nwca_catalog.cleaning
+"""
+
+import pandas as pd
+
+
+def clean_styles(styles: pd.Series) -> pd.DataFrame:
+    """
+    Clean a column of style numbers and extract size suffixes
+
+    Args:
+        styles: Original style numbers (e.g. "C112_OSFA", "PC78H_2X", "PC54")
+
+    Returns:
+        DataFrame aligned to styles.index with Style_Cleaned and
+        Size_Extracted; styles without a suffix get an empty size
+    """
+    # An empty column partitions into a frame without columns
+    parts = styles.fillna('').astype(str).str.partition('_').reindex(columns=range(3), fill_value='')
+    return pd.DataFrame({
+        'Style_Cleaned': parts[0].str.strip(),
+        'Size_Extracted': parts[2].str.strip()
+    }, index=styles.index)
+
+
+def _load_script(name: str):
+    """Import a hyphenated sibling script (e.g. process-top-sellers) as a module"""
+    import importlib.util
+    import os
+
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), f"{name}.py")
+    spec = importlib.util.spec_from_file_location(name.replace('-', '_'), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _verify() -> int:
+    """Compare clean_styles with StyleCleaner.clean_style on the embedded CSVs"""
+    from io import StringIO
+
+    mismatches = 0
+    for name in ('process-top-sellers', 'process-new-products'):
+        script = _load_script(name)
+        styles = pd.read_csv(StringIO(script.CSV_DATA))['Style']
+        expected = styles.map(script.StyleCleaner.clean_style)
+        actual = clean_styles(styles)
+
+        for style, (cleaned, size), got_cleaned, got_size in zip(
+                styles, expected, actual['Style_Cleaned'], actual['Size_Extracted']):
+            if (cleaned, size) != (got_cleaned, got_size):
+                mismatches += 1
+                print(f"[ERROR] {name}: {style!r} -> {(got_cleaned, got_size)!r}, expected {(cleaned, size)!r}")
+        print(f"[OK] {name}: {len(styles)} styles checked")
+
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(_verify())
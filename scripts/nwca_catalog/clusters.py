@@ -0,0 +1,452 @@
+"""
+Near-duplicate description clustering
+
+The scripts dedupe on exact keys (Style_Cleaned + Order Type / Category),
+so the same product keyed under two style numbers, or typed as "Port  Co
+Core Blend Tee" and "Port & Company - Core Blend Tee.", survives as two rows.
+This module groups such rows without comparing every pair:
+
+1. normalize: descriptions are factorized and only the distinct values go
+   through vectorized pandas string operations (case, punctuation, "Port Co"
+   -> "port company", brand names glued to the next word split off)
+2. block: each distinct (group, normalized description) gets a MinHash
+   signature over its character trigrams; the signature is cut into bands
+   and every band is hashed together with the group, so two descriptions
+   share a block when any band matches
+3. cluster: only pairs that share a block are compared. Pairs whose
+   lengths or signatures already rule them out are dropped with array
+   operations; the rest get an exact trigram Jaccard. A pair at or above the
+   threshold must also use the same words up to typos - numbers equal
+   ("1/4-Zip" is not "1/2-Zip"), no extra word ("Contrast") - and matching
+   pairs are joined with union-find
+4. canonical: each cluster keeps one row - the preferred one (e.g. found in
+   the API), then the most common wording, then the shortest style number
+
+Identical normalized descriptions are one distinct value, so they cluster
+without a comparison. Within a block larger than max_block each description
+is only compared with its max_block - 1 neighbours, which keeps the pair
+count linear.
+
+Usage:
+    clusters = cluster_descriptions(df, group='Order Type', prefer='API_Exists')
+    duplicates = cluster_members(df.join(clusters))
+
+Cluster a CSV, or time a synthetic import:
+    python -m nwca_catalog.clusters cleaned_top_sellers.csv --group "Order Type"
+    python -m nwca_catalog.clusters --bench 100000
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .suggest import edit_similarity
+from .vendors import vendor_trie
+
+DEFAULT_THRESHOLD = 0.8    # trigram Jaccard for two descriptions to count as the same product
+SHINGLE = 3                # character n-gram size
+BANDS = 16                 # MinHash bands x rows per band: pairs near the threshold share a
+ROWS_PER_BAND = 4          # band with p = 1 - (1 - J^4)^16 (0.97 at J=0.6, 0.9999 at J=0.8)
+MAX_BLOCK = 200            # larger blocks compare each member with its MAX_BLOCK - 1 neighbours only
+WORD_SIMILARITY = 0.75     # a differing word must be this close to one on the other side (one typo in 4 letters)
+ESTIMATE_SLACK = 0.15      # pairs whose MinHash estimate is this far below the threshold skip the exact check
+SEED = 20250
+
+# Wordings of the same brand, after punctuation is dropped (whole words)
+BRAND_ALIASES = {
+    'port co': 'port company',
+    'port and company': 'port company',
+    'bellacanvas': 'bella canvas',
+    'sporttek': 'sport tek',
+    'travis mathew': 'travismathew',
+    'the northface': 'the north face',
+    'tnf': 'the north face',
+}
+
+CLUSTER_COLUMNS = ['Description_Normalized', 'Cluster', 'Cluster_Size', 'Canonical', 'Similarity']
+
+
+def brand_phrases() -> List[str]:
+    """Vendor names from the prefix table, normalized ("Port & Company" -> "port company")"""
+    vendors = {vendor for level in vendor_trie().by_length().values() for vendor in level.values()}
+    phrases = {' '.join(re.sub(r'[^a-z0-9]+', ' ', vendor.lower()).split()) for vendor in vendors}
+    return sorted(phrases, key=len, reverse=True)
+
+
+def normalize_descriptions(descriptions: pd.Series) -> pd.Series:
+    """
+    Canonical wording of a column of product descriptions
+
+    Each distinct description is normalized once and the result is mapped
+    back onto the rows.
+
+    Examples:
+        "Port  Co Core Blend Tee."         -> "port company core blend tee"
+        "Port  Companyknit Cap"            -> "port company knit cap"
+        "BellaCanvas  Unisex Jersey Tee"   -> "bella canvas unisex jersey tee"
+
+    Returns:
+        Series aligned to descriptions.index
+    """
+    codes, uniques = pd.factorize(descriptions.fillna('').astype(str))
+    text = pd.Series(uniques, dtype=object).str.lower()
+    text = text.str.replace(r"[™®©']", '', regex=True)
+    text = text.str.replace('&', ' and ', regex=False)
+    text = text.str.replace(r'[^a-z0-9]+', ' ', regex=True).str.strip()
+
+    aliases = re.compile(r'\b(' + '|'.join(map(re.escape, BRAND_ALIASES)) + r')\b')
+    text = text.str.replace(aliases, lambda m: BRAND_ALIASES[m.group(1)], regex=True)
+    glued = re.compile(r'\b(' + '|'.join(map(re.escape, brand_phrases())) + r')(?=[a-z0-9])')
+    text = text.str.replace(glued, r'\1 ', regex=True)
+    text = text.str.replace(r'\s+', ' ', regex=True).str.strip()
+
+    values = text.to_numpy(dtype=object)
+    return pd.Series(values[codes] if len(values) else [], index=descriptions.index, dtype=object)
+
+
+def shingles(text: str, n: int = SHINGLE) -> List[str]:
+    """Character n-grams of text (the whole text when shorter than n)"""
+    if len(text) <= n:
+        return [text] if text else []
+    return [text[i:i + n] for i in range(len(text) - n + 1)]
+
+
+def _mix(values: np.ndarray, salt: np.uint64) -> np.ndarray:
+    """splitmix64 finalizer of values + salt (one MinHash permutation)"""
+    x = values + salt
+    x ^= x >> np.uint64(30)
+    x *= np.uint64(0xBF58476D1CE4E5B9)
+    x ^= x >> np.uint64(27)
+    x *= np.uint64(0x94D049BB133111EB)
+    x ^= x >> np.uint64(31)
+    return x
+
+
+def minhash_signatures(grams: List[List[str]], permutations: int = BANDS * ROWS_PER_BAND,
+                       seed: int = SEED) -> np.ndarray:
+    """
+    MinHash signatures, one row per document
+
+    Args:
+        grams: Shingles per document; every document needs at least one
+
+    Returns:
+        uint64 array of shape (len(grams), permutations)
+    """
+    lengths = np.fromiter((len(g) for g in grams), dtype=np.int64, count=len(grams))
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    # Trigrams repeat heavily across descriptions: permute each distinct one once, then gather
+    codes, vocabulary = pd.factorize(np.array([gram for doc in grams for gram in doc], dtype=object))
+    hashes = pd.util.hash_array(np.asarray(vocabulary, dtype=object))
+    salts = np.random.default_rng(seed).integers(0, 2 ** 63, size=permutations, dtype=np.uint64)
+
+    signatures = np.empty((len(grams), permutations), dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        for p, salt in enumerate(salts):
+            signatures[:, p] = np.minimum.reduceat(_mix(hashes, salt)[codes], starts)
+    return signatures
+
+
+def candidate_pairs(signatures: np.ndarray, groups: np.ndarray, bands: int = BANDS,
+                    max_block: int = MAX_BLOCK) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Document pairs sharing at least one (group, band) block
+
+    Returns:
+        (left, right) index arrays with left < right, without repeats
+    """
+    n = len(signatures)
+    rows = signatures.shape[1] // bands
+    left: List[np.ndarray] = []
+    right: List[np.ndarray] = []
+    for band in range(bands):
+        block = pd.DataFrame(signatures[:, band * rows:(band + 1) * rows])
+        block['group'] = groups
+        keys = pd.util.hash_pandas_object(block, index=False).to_numpy()
+        order = np.argsort(keys, kind='stable')
+        ordered = keys[order]
+        # Blocks are runs of equal keys; pairing each position with the one
+        # `offset` further on covers every pair of a run once offsets reach its length
+        for offset in range(1, max_block):
+            same = ordered[offset:] == ordered[:-offset]
+            if not same.any():
+                break
+            left.append(order[:-offset][same])
+            right.append(order[offset:][same])
+    if not left:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    a, b = np.concatenate(left), np.concatenate(right)
+    low, high = np.minimum(a, b).astype(np.int64), np.maximum(a, b).astype(np.int64)
+    pairs = pd.unique(low * n + high)
+    return pairs // n, pairs % n
+
+
+def jaccard(a: frozenset, b: frozenset) -> float:
+    """Jaccard similarity of two shingle sets"""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def same_wording(a: str, b: str, similarity: float = WORD_SIMILARITY) -> bool:
+    """
+    True when two normalized descriptions differ only by typos
+
+    Text that only differs in where the spaces are ("fullzip" / "full zip")
+    is the same. Otherwise words with a digit must match exactly, and every
+    other word found on one side only must be a near match of a word found
+    on the other side only.
+
+    Examples:
+        same_wording("core blend tee", "core bledn tee")           -> True
+        same_wording("full zip jacket", "fullzip jacket")          -> True
+        same_wording("stretch 1 4 zip", "stretch 1 2 zip")         -> False
+        same_wording("stretch pullover", "stretch contrast pullover") -> False
+    """
+    if a.replace(' ', '') == b.replace(' ', ''):
+        return True
+    words_a, words_b = set(a.split()), set(b.split())
+    only_a, only_b = words_a - words_b, words_b - words_a
+    if any(any(ch.isdigit() for ch in word) for word in only_a | only_b):
+        return False
+    return (all(any(edit_similarity(x, y) >= similarity for y in only_b) for x in only_a)
+            and all(any(edit_similarity(y, x) >= similarity for x in only_a) for y in only_b))
+
+
+def estimated_similarity(signatures: np.ndarray, left: np.ndarray, right: np.ndarray,
+                         chunk: int = 65536) -> np.ndarray:
+    """MinHash estimate of each pair's Jaccard (share of equal signature slots)"""
+    estimates = np.empty(len(left), dtype=np.float64)
+    for start in range(0, len(left), chunk):
+        stop = start + chunk
+        estimates[start:stop] = (signatures[left[start:stop]] == signatures[right[start:stop]]).mean(axis=1)
+    return estimates
+
+
+def _components(n: int, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """Union-find over the matched pairs; returns a root label per document"""
+    parent = list(range(n))
+
+    def find(x: int) -> int:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for a, b in zip(left.tolist(), right.tolist()):
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            parent[max(root_a, root_b)] = min(root_a, root_b)
+    return np.fromiter((find(x) for x in range(n)), dtype=np.int64, count=n)
+
+
+def cluster_descriptions(df: pd.DataFrame, column: str = 'Description', group: Optional[str] = None,
+                         prefer: Optional[str] = None, style: str = 'Style_Cleaned',
+                         threshold: float = DEFAULT_THRESHOLD, max_block: int = MAX_BLOCK) -> pd.DataFrame:
+    """
+    Cluster rows whose descriptions are near-duplicates
+
+    Args:
+        df: Rows to cluster (one per product after exact-key dedupe)
+        column: Description column
+        group: Only rows with the same value here can cluster (Order Type,
+            Category); None clusters across the whole frame
+        prefer: Boolean column; True rows are chosen as canonical first
+        style: Style column; shorter styles win ties (the base part over
+            size variants); ignored when missing
+        threshold: Minimum trigram Jaccard to join two descriptions
+        max_block: See candidate_pairs()
+
+    Returns:
+        CLUSTER_COLUMNS aligned to df.index. Cluster numbers start at 1 and
+        follow the first row of each cluster; every row is in a cluster
+        (Cluster_Size 1 when it has no near-duplicate, or a blank
+        description). Similarity is the row's Jaccard to its canonical row.
+    """
+    normalized = normalize_descriptions(df[column])
+    keys = pd.DataFrame({'text': normalized.to_numpy()})
+    keys['group'] = df[group].fillna('').astype(str).to_numpy() if group else ''
+    codes = keys.groupby(['group', 'text'], sort=False).ngroup().to_numpy()
+    distinct = keys.drop_duplicates()    # same first-appearance order as ngroup(sort=False)
+    texts = distinct['text'].tolist()
+    group_codes = pd.factorize(distinct['group'])[0]
+
+    grams = [shingles(text) for text in texts]
+    sets = [frozenset(g) for g in grams]
+    labels = np.arange(len(texts), dtype=np.int64)
+    comparable = np.flatnonzero([bool(g) for g in grams])
+    if len(comparable) > 1:
+        signatures = minhash_signatures([grams[i] for i in comparable])
+        left, right = candidate_pairs(signatures, group_codes[comparable], max_block=max_block)
+        # Jaccard can't exceed the ratio of the set sizes; the estimate drops most of the rest
+        sizes = np.fromiter((len(sets[i]) for i in comparable), dtype=np.float64, count=len(comparable))
+        keep = np.minimum(sizes[left], sizes[right]) >= threshold * np.maximum(sizes[left], sizes[right])
+        left, right = left[keep], right[keep]
+        keep = estimated_similarity(signatures, left, right) >= threshold - ESTIMATE_SLACK
+        left, right = comparable[left[keep]], comparable[right[keep]]
+        matched = np.fromiter((jaccard(sets[a], sets[b]) >= threshold and same_wording(texts[a], texts[b])
+                               for a, b in zip(left.tolist(), right.tolist())), dtype=bool, count=len(left))
+        labels = _components(len(texts), left[matched], right[matched])
+
+    # A blank description says nothing about the product; such rows stay on their own
+    row_labels = labels[codes]
+    blank = np.flatnonzero(normalized.to_numpy() == '')
+    row_labels[blank] = len(texts) + blank
+    rows = pd.DataFrame({'label': row_labels, 'distinct': codes}, index=df.index)
+    rows['Cluster'] = pd.factorize(rows['label'])[0] + 1
+    rows['Cluster_Size'] = rows.groupby('Cluster')['Cluster'].transform('size')
+
+    # Canonical: preferred, then the wording most rows share, then the shortest style, then the first row
+    ranking = pd.DataFrame({
+        'Cluster': rows['Cluster'].to_numpy(),
+        'preferred': df[prefer].fillna(False).astype(bool).to_numpy() if prefer else False,
+        'wording': rows.groupby('distinct')['distinct'].transform('size').to_numpy(),
+        'style_len': df[style].fillna('').astype(str).str.len().to_numpy() if style in df.columns else 0,
+        'position': np.arange(len(df)),
+    })
+    ranking = ranking.sort_values(['Cluster', 'preferred', 'wording', 'style_len', 'position'],
+                                  ascending=[True, False, False, True, True])
+    canonical_positions = ranking.drop_duplicates('Cluster')['position'].to_numpy()
+    canonical = np.zeros(len(df), dtype=bool)
+    canonical[canonical_positions] = True
+    rows['Canonical'] = canonical
+
+    canonical_distinct = pd.Series(codes[canonical_positions],
+                                   index=rows['Cluster'].to_numpy()[canonical_positions])
+    target = canonical_distinct.reindex(rows['Cluster']).to_numpy()
+    rows['Similarity'] = [1.0 if a == b else round(jaccard(sets[a], sets[b]), 3)
+                          for a, b in zip(codes.tolist(), target.tolist())]
+    rows['Description_Normalized'] = normalized
+    return rows[CLUSTER_COLUMNS]
+
+
+def cluster_members(df: pd.DataFrame) -> pd.DataFrame:
+    """Rows of clusters with more than one row, canonical row first, by cluster"""
+    members = df[df['Cluster_Size'] > 1]
+    return members.sort_values(['Cluster', 'Canonical'], ascending=[True, False], kind='stable')
+
+
+def cluster_summary(df: pd.DataFrame) -> Dict[str, int]:
+    """Clusters with near-duplicates, their rows, and rows that would be folded away"""
+    members = df[df['Cluster_Size'] > 1]
+    clusters = members['Cluster'].nunique()
+    return {'clusters': clusters, 'rows': len(members), 'redundant': len(members) - clusters}
+
+
+BRANDS = ['Port & Company', 'Port Authority', 'Sport-Tek', 'District', 'Nike', 'Carhartt', 'New Era',
+          'Eddie Bauer', 'Bella+Canvas', 'CornerStone', 'OGIO', 'TravisMathew', 'The North Face']
+WORDS = ['Core', 'Essential', 'Heavyweight', 'Midweight', 'Tri-Blend', 'Micropique', 'Stretch', 'Soft Shell',
+         'Fleece', 'Cotton', 'Performance', 'Long Sleeve', 'Snapback', 'Trucker', 'Structured', 'Rain',
+         'Sport-Wick', 'Pocket', 'Youth', 'Ladies', 'Tall', 'Full-Zip', '1/4-Zip', 'Pullover', 'Hooded']
+GARMENTS = ['Tee', 'Polo', 'Cap', 'Jacket', 'Sweatshirt', 'Vest', 'Beanie', 'Hoodie', 'Shirt', 'Pant']
+
+
+def _noisy(description: str, rng: np.random.Generator) -> str:
+    """One ShopWorks-style rewording of a description"""
+    text = description
+    roll = rng.random(5)
+    if roll[0] < 0.3:
+        text = text.replace('Port & Company', rng.choice(['Port  Company', 'Port  Co', 'Port  Company -']))
+    if roll[1] < 0.3:
+        text = text + '.'
+    if roll[2] < 0.3:
+        text = text.replace(' ', '  ', 1)
+    if roll[3] < 0.2:
+        text = text.upper() if rng.random() < 0.5 else text.lower()
+    if roll[4] < 0.2 and len(text) > 8:
+        i = int(rng.integers(4, len(text) - 2))
+        text = text[:i] + text[i + 1] + text[i] + text[i + 2:]
+    return text
+
+
+def _synthetic_import(rows: int, seed: int = SEED) -> pd.DataFrame:
+    """Rows drawn from about rows/5 products, each repeated under noisy wordings and style numbers"""
+    rng = np.random.default_rng(seed)
+    products = max(rows // 5, 1)
+    letters = np.array(list('abcdefghijklmnopqrstuvwxyz'))
+    descriptions = [
+        f"{rng.choice(BRANDS)} {''.join(rng.choice(letters, size=6)).title()} "
+        f"{' '.join(rng.choice(WORDS, size=int(rng.integers(1, 4)), replace=False))} {rng.choice(GARMENTS)}"
+        for _ in range(products)
+    ]
+    picks = rng.integers(0, products, size=rows)
+    return pd.DataFrame({
+        'Style_Cleaned': [f"S{p}" + ('' if rng.random() < 0.8 else 'X') for p in picks.tolist()],
+        'Description': [_noisy(descriptions[p], rng) for p in picks.tolist()],
+        'Order Type': rng.choice(['Screenprinting', 'Custom Embroidery', 'Cap Order'], size=rows),
+        'Product': picks,
+    })
+
+
+def _benchmark(rows: int) -> int:
+    """Cluster a synthetic import and check the clusters against the products it was drawn from"""
+    import time
+
+    df = _synthetic_import(rows)
+    started = time.perf_counter()
+    clusters = cluster_descriptions(df, group='Order Type')
+    elapsed = time.perf_counter() - started
+
+    df = df.join(clusters)
+    summary = cluster_summary(df)
+    truth = df.groupby(['Product', 'Order Type']).ngroup()
+    # Pure: a cluster never mixes products; complete: the share of products kept in one cluster
+    impure = int((df.groupby('Cluster')['Product'].nunique() > 1).sum())
+    split = float((df.groupby(truth)['Cluster'].nunique() == 1).mean())
+    print(f"[INFO] {rows:,} rows, {df['Description_Normalized'].nunique():,} distinct normalized "
+          f"descriptions, clustered in {elapsed:.2f}s ({rows / elapsed:,.0f} rows/s)")
+    print(f"[INFO] {summary['clusters']:,} clusters with near-duplicates, {summary['rows']:,} rows, "
+          f"{summary['redundant']:,} redundant")
+    print(f"[INFO] {impure} cluster(s) mixing products, {split:.1%} of products in a single cluster")
+    return 0
+
+
+def _cluster_csv(path: str, column: str, group: Optional[str], threshold: float, out: Optional[str]) -> int:
+    df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    missing = [c for c in (column, group) if c and c not in df.columns]
+    if missing:
+        print(f"[ERROR] {path}: missing column(s) {', '.join(missing)}")
+        return 1
+    prefer = None
+    if 'API_Exists' in df.columns:
+        df['API_Exists'] = df['API_Exists'].eq('True')
+        prefer = 'API_Exists'
+    df = df.drop(columns=CLUSTER_COLUMNS, errors='ignore')
+    df = df.join(cluster_descriptions(df, column=column, group=group, prefer=prefer, threshold=threshold))
+
+    summary = cluster_summary(df)
+    print(f"[INFO] {path}: {len(df):,} rows, {summary['clusters']} cluster(s) with near-duplicates "
+          f"({summary['rows']} rows, {summary['redundant']} redundant)")
+    style = 'Style_Cleaned' if 'Style_Cleaned' in df.columns else column
+    for cluster, members in cluster_members(df).groupby('Cluster', sort=False):
+        print(f"\n   Cluster {cluster}:")
+        for row in members.itertuples(index=False):
+            mark = '*' if row.Canonical else ' '
+            print(f"   {mark} {getattr(row, style):<12} {row.Similarity:.2f}  {getattr(row, column)}")
+    if out:
+        cluster_members(df).to_csv(out, index=False)
+        print(f"\n[OK] Saved: {out}")
+    return 0
+
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('csv', nargs='?', help="CSV with a description column")
+    parser.add_argument('--column', default='Description', help="Description column (default Description)")
+    parser.add_argument('--group', help="Only cluster rows that share this column (e.g. \"Order Type\")")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Trigram Jaccard to join two descriptions (default {DEFAULT_THRESHOLD})")
+    parser.add_argument('--out', help="Write the clustered rows to this CSV")
+    parser.add_argument('--bench', type=int, metavar='ROWS', help="Cluster a synthetic import of ROWS rows")
+    args = parser.parse_args()
+    if args.bench:
+        sys.exit(_benchmark(args.bench))
+    if not args.csv:
+        parser.error("a CSV is required unless --bench is given")
+    sys.exit(_cluster_csv(args.csv, args.column, args.group, args.threshold, args.out))
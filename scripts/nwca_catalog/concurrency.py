@@ -0,0 +1,316 @@
+"""
+Adaptive (AIMD) concurrency for the API validators
+
+A fixed batch of 5 is too timid when the Heroku proxy is idle and too
+aggressive when it is throttling. AdaptiveLimiter lets the number of
+in-flight requests find the proxy's capacity on its own:
+
+- additive increase: every full window of fast, successful responses
+  (latency under target, recent success rate high) raises the limit by one
+- multiplicative decrease: a 429, a 5xx, a timeout or a connection error
+  halves it, at most once per window, since one overload burst fails many
+  requests at once
+
+Every change of the limit is kept in a trace that can be written to CSV.
+
+See it adapt to a local stand-in server whose capacity changes mid-run:
+    python -m nwca_catalog.concurrency --capacity 16 6 16
+"""
+
+import asyncio
+import contextlib
+import csv
+import itertools
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Deque, Iterable, List, Optional
+
+import aiohttp
+
+DEFAULT_INITIAL = 5
+DEFAULT_MINIMUM = 1
+DEFAULT_MAXIMUM = 32
+DEFAULT_TARGET_LATENCY = 1.0   # seconds
+DECREASE_FACTOR = 0.5
+SUCCESS_WINDOW = 20            # outcomes used for the recent success rate
+MIN_SUCCESS_RATE = 0.95
+
+
+@dataclass
+class TracePoint:
+    """One change of the concurrency limit"""
+    elapsed: float      # seconds since the limiter was created
+    limit: int
+    in_flight: int
+    reason: str         # 'start', 'increase', '429', '5xx', 'timeout', 'error'
+
+
+class Slot:
+    """Handle for one in-flight request; set status once the response arrives"""
+
+    __slots__ = ('started', 'status')
+
+    def __init__(self, started: float):
+        self.started = started
+        self.status: Optional[int] = None
+
+    def restart(self) -> None:
+        """Start the latency clock now, after any client-side wait inside the slot"""
+        self.started = time.monotonic()
+
+
+class AdaptiveLimiter:
+    """Concurrency limit driven by latency and error signals (AIMD)"""
+
+    def __init__(self, initial: int = DEFAULT_INITIAL, minimum: int = DEFAULT_MINIMUM,
+                 maximum: int = DEFAULT_MAXIMUM, target_latency: float = DEFAULT_TARGET_LATENCY,
+                 decrease: float = DECREASE_FACTOR):
+        self.minimum = minimum
+        self.maximum = max(maximum, minimum)
+        self.target_latency = target_latency
+        self.decrease = decrease
+        self.limit = float(min(max(initial, minimum), self.maximum))
+        self.in_flight = 0
+        self.decreases = 0
+
+        self._origin = time.monotonic()
+        self._last_cut = float('-inf')
+        self._outcomes = deque(maxlen=SUCCESS_WINDOW)
+        # Requests waiting for a slot, oldest first; each release wakes only as many as it frees
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.trace: List[TracePoint] = [TracePoint(0.0, int(self.limit), 0, 'start')]
+
+    @property
+    def current(self) -> int:
+        """Requests allowed in flight right now"""
+        return int(self.limit)
+
+    @property
+    def peak(self) -> int:
+        return max(point.limit for point in self.trace)
+
+    @property
+    def waiting(self) -> int:
+        """Requests queued for a slot"""
+        return len(self._waiters)
+
+    async def _acquire(self) -> None:
+        if self.in_flight < self.current and not self._waiters:
+            self.in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Cancelled after the slot was handed over: pass it on
+                self.in_flight -= 1
+                self._wake()
+            else:
+                # _wake may already have popped (and skipped) the cancelled waiter
+                with contextlib.suppress(ValueError):
+                    self._waiters.remove(waiter)
+            raise
+
+    def _wake(self) -> None:
+        """Hand free slots to the oldest waiters (in_flight is counted for them here)"""
+        while self._waiters and self.in_flight < self.current:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def _set_limit(self, value: float, reason: str) -> None:
+        before = int(self.limit)
+        self.limit = min(max(value, self.minimum), self.maximum)
+        if int(self.limit) != before:
+            self.trace.append(TracePoint(round(time.monotonic() - self._origin, 3),
+                                         int(self.limit), self.in_flight, reason))
+
+    def _on_success(self, latency: float) -> None:
+        self._outcomes.append(True)
+        success_rate = sum(self._outcomes) / len(self._outcomes)
+        # Only grow when the current limit is actually being used
+        saturated = self.in_flight + 1 >= self.current
+        if latency <= self.target_latency and success_rate >= MIN_SUCCESS_RATE and saturated:
+            # +1 per window of `limit` successes
+            self._set_limit(self.limit + 1.0 / self.limit, 'increase')
+
+    def _on_congestion(self, started: float, reason: str) -> None:
+        self._outcomes.append(False)
+        # Requests sent before the last cut report the same overload again
+        if started <= self._last_cut:
+            return
+        self._last_cut = time.monotonic()
+        self.decreases += 1
+        self._set_limit(self.limit * self.decrease, reason)
+
+    @contextlib.asynccontextmanager
+    async def slot(self) -> AsyncIterator[Slot]:
+        """
+        Hold one of the limited request slots
+
+        Set slot.status to the HTTP status inside the block. 429 and 5xx
+        statuses, timeouts and aiohttp/OS errors count as congestion; any
+        other status counts as a success with the block's duration as its
+        latency.
+        """
+        await self._acquire()
+        handle = Slot(time.monotonic())
+        reason = None
+        try:
+            yield handle
+        except asyncio.TimeoutError:
+            reason = 'timeout'
+            raise
+        except (aiohttp.ClientError, OSError):
+            reason = 'error'
+            raise
+        finally:
+            latency = time.monotonic() - handle.started
+            if reason is None and handle.status is not None:
+                if handle.status == 429:
+                    reason = '429'
+                elif handle.status >= 500:
+                    reason = '5xx'
+            self.in_flight -= 1
+            if reason:
+                self._on_congestion(handle.started, reason)
+            elif handle.status is not None:
+                self._on_success(latency)
+            self._wake()
+
+    def summary(self) -> str:
+        return (f"concurrency {self.trace[0].limit} -> {self.current} "
+                f"(peak {self.peak}, {self.decreases} decrease(s), {len(self.trace) - 1} change(s))")
+
+    def write_trace(self, path: str) -> None:
+        """Save the limit changes as CSV (elapsed, limit, in_flight, reason)"""
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['elapsed', 'limit', 'in_flight', 'reason'])
+            for point in self.trace:
+                writer.writerow([point.elapsed, point.limit, point.in_flight, point.reason])
+
+
+async def as_completed_batches(aws: Iterable[Awaitable], size: int,
+                               window: int = 2 * DEFAULT_MAXIMUM) -> AsyncIterator[List]:
+    """
+    Run awaitables with at most window scheduled at a time and yield results in groups of size
+
+    The iterable is consumed lazily, so a generator of coroutines for 10k
+    styles only ever has window tasks alive. Pick a window above the
+    limiter's maximum so retries sleeping in their backoff do not leave
+    slots idle. Results come in completion order.
+
+    Unfinished tasks are cancelled if the consumer stops early or is cancelled.
+    """
+    pending = iter(aws)
+    running = set()
+    try:
+        batch = []
+        while True:
+            for aw in itertools.islice(pending, max(window - len(running), 0)):
+                running.add(asyncio.ensure_future(aw))
+            if not running:
+                break
+            done, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                batch.append(task.result())
+                if len(batch) >= size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+    finally:
+        for task in running:
+            task.cancel()
+
+
+async def _demo(capacities: List[int], requests: int, service_time: float,
+                maximum: int, trace_path: Optional[str]) -> None:
+    """Drive the limiter against a local server that returns 429 above its capacity"""
+    from aiohttp import web
+
+    state = {'active': 0, 'capacity': capacities[0], 'served': 0, 'rejected': 0}
+    # The capacity steps through its phases as requests are served
+    phase_length = -(-requests // len(capacities))
+
+    async def handler(request):
+        state['capacity'] = capacities[min(state['served'] // phase_length, len(capacities) - 1)]
+        if state['active'] >= state['capacity']:
+            state['rejected'] += 1
+            return web.json_response({'error': 'Too many requests'}, status=429)
+        state['active'] += 1
+        try:
+            # Service time degrades as the server approaches its capacity
+            await asyncio.sleep(service_time * (1 + state['active'] / state['capacity']))
+            state['served'] += 1
+            return web.json_response({'products': []})
+        finally:
+            state['active'] -= 1
+
+    app = web.Application()
+    app.router.add_get('/api/products/search', handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    url = f"http://127.0.0.1:{port}/api/products/search"
+
+    limiter = AdaptiveLimiter(maximum=maximum, target_latency=service_time * 4)
+    samples = []
+
+    async def one(session: aiohttp.ClientSession):
+        while True:
+            async with limiter.slot() as slot:
+                async with session.get(url) as response:
+                    slot.status = response.status
+                    await response.read()
+            if response.status != 429:
+                return
+            await asyncio.sleep(service_time)
+
+    async def sample():
+        while True:
+            samples.append((time.monotonic() - limiter._origin, limiter.current, state['capacity']))
+            await asyncio.sleep(service_time)
+
+    start = time.perf_counter()
+    sampler = asyncio.ensure_future(sample())
+    connector = aiohttp.TCPConnector(limit=maximum * 2)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        async for _ in as_completed_batches((one(session) for _ in range(requests)), size=50,
+                                              window=2 * maximum):
+            pass
+    sampler.cancel()
+    elapsed = time.perf_counter() - start
+    await runner.cleanup()
+
+    print(f"{requests} requests against capacity {' -> '.join(map(str, capacities))} "
+          f"in {elapsed:.1f}s ({requests / elapsed:.0f} req/s, {state['rejected']} x 429)")
+    print(limiter.summary())
+    print("\n  time  capacity  limit")
+    step = max(len(samples) // 40, 1)
+    for t, limit, capacity in samples[::step]:
+        print(f"{t:6.2f}  {capacity:8d}  {limit:5d}  {'#' * limit}")
+    if trace_path:
+        limiter.write_trace(trace_path)
+        print(f"\nTrace: {trace_path}")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--capacity', type=int, nargs='+', default=[16, 6, 16],
+                        help="Concurrent requests the stand-in accepts, one value per phase")
+    parser.add_argument('--requests', type=int, default=3000)
+    parser.add_argument('--service-time', type=float, default=0.02, help="Seconds per request when idle")
+    parser.add_argument('--maximum', type=int, default=DEFAULT_MAXIMUM)
+    parser.add_argument('--trace', help="Write the limit changes to this CSV")
+    args = parser.parse_args()
+    asyncio.run(_demo(args.capacity, args.requests, args.service_time, args.maximum, args.trace))
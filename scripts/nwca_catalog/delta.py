@@ -0,0 +1,153 @@
+"""
+Delta validation against the previous run's output
+
+A run normally re-validates every style even though the last run's
+cleaned CSV already holds the answers. DeltaBaseline reads that CSV back
+and keeps two things: the result for each style and a 64-bit hash of each
+(style, description, order type / category) row.
+
+For each new chunk, a style is looked up again when:
+
+- it is new (not in the previous output)
+- one of its rows changed (a row hash the previous output does not have)
+- its previous status was transient (timeout, error, circuit open)
+
+Every other style is carried forward: its previous result is put in the
+validator cache and no request is sent. What changed is collected for the
+run report.
+
+Usage:
+    baseline = DeltaBaseline.load("cleaned_top_sellers.csv", ['Style_Cleaned', 'Description', 'Order Type'])
+    baseline.carry_forward(chunk, validator.results_cache)
+    results = await validator.validate_batch(styles)
+    baseline.record(results)
+"""
+
+from typing import Dict, List, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .journal import RETRY_STATUSES
+from .results import StyleResult, results_from_frame
+
+STYLE_COLUMN = 'Style_Cleaned'
+
+
+def row_hashes(df: pd.DataFrame, columns: List[str]) -> np.ndarray:
+    """64-bit hash per row of columns, with missing values treated as ''"""
+    keys = df[columns].astype(object).fillna('').astype(str)
+    return pd.util.hash_pandas_object(keys, index=False).to_numpy()
+
+
+class DeltaBaseline:
+    """Previous run's results and row hashes, plus what changed this run"""
+
+    def __init__(self, path: str, results: Dict[str, StyleResult], hashes: Set[int], columns: List[str]):
+        self.path = path
+        self.results = results
+        self.hashes = hashes
+        self.columns = columns
+
+        self.seen: Set[str] = set()
+        self.carried: Set[str] = set()
+        self.new: Set[str] = set()
+        self.changed: Set[str] = set()
+        self.retried: Set[str] = set()
+        # style -> (previous status, new status) for revalidated styles
+        self.status_changes: Dict[str, Tuple[str, str]] = {}
+
+    @classmethod
+    def load(cls, path: str, columns: List[str]) -> 'DeltaBaseline':
+        """
+        Read a previous cleaned output CSV
+
+        Args:
+            path: cleaned_top_sellers.csv / cleaned_new_products.csv from the last run
+            columns: Row identity columns (style column first)
+
+        Raises:
+            FileNotFoundError: No previous output at path
+            ValueError: The file lacks the identity or result columns
+        """
+        previous = pd.read_csv(path, dtype=str, keep_default_na=False)
+        missing = [c for c in columns + ['API_Exists', 'API_Status'] if c not in previous.columns]
+        if missing:
+            raise ValueError(f"{path} is not a previous output (missing {', '.join(missing)})")
+        return cls(path, results_from_frame(previous, key=STYLE_COLUMN),
+                   set(row_hashes(previous, columns).tolist()), columns)
+
+    def carry_forward(self, chunk: pd.DataFrame, cache: Dict[str, StyleResult]) -> int:
+        """
+        Seed cache with previous results for the chunk's unchanged styles
+
+        Styles that need a fresh lookup are left out of the cache (and taken
+        back out if an earlier chunk carried them forward).
+
+        Returns:
+            Number of styles carried forward by this chunk
+        """
+        known = np.fromiter((h in self.hashes for h in row_hashes(chunk, self.columns)),
+                            dtype=bool, count=len(chunk))
+        changed = set(chunk.loc[~known, STYLE_COLUMN])
+        carried = 0
+        for style in chunk[STYLE_COLUMN].unique():
+            first_time = style not in self.seen
+            self.seen.add(style)
+            previous = self.results.get(style)
+            if previous is None:
+                if first_time:
+                    self.new.add(style)
+            elif style in changed:
+                self.changed.add(style)
+                if style in self.carried:
+                    self.carried.discard(style)
+                    cache.pop(style, None)
+            elif previous.status in RETRY_STATUSES:
+                self.retried.add(style)
+            elif style not in cache:
+                cache[style] = previous
+                self.carried.add(style)
+                carried += 1
+        return carried
+
+    def record(self, results: Dict[str, StyleResult]) -> None:
+        """Note status changes among the revalidated styles of a chunk"""
+        for style, result in results.items():
+            previous = self.results.get(style)
+            if previous is None or style in self.carried:
+                continue
+            if previous.status != result.status:
+                self.status_changes[style] = (previous.status, result.status)
+
+    @property
+    def removed(self) -> List[str]:
+        """Styles in the previous output that are not in this run's input"""
+        return sorted(set(self.results) - self.seen)
+
+    def summary(self) -> str:
+        return (f"{len(self.carried)} style(s) carried forward, {len(self.new)} new, "
+                f"{len(self.changed)} changed, {len(self.retried)} previous error(s) retried, "
+                f"{len(self.removed)} removed")
+
+    def report_lines(self) -> List[str]:
+        """What changed since the previous run, for the run report"""
+        lines = [
+            f"Baseline: {self.path} ({len(self.results)} styles)",
+            f"Carried Forward: {len(self.carried)}",
+            f"New Styles: {len(self.new)}",
+            f"Changed Styles: {len(self.changed)}",
+            f"Previous Errors Retried: {len(self.retried)}",
+            f"Removed Styles: {len(self.removed)}",
+            f"Status Changes: {len(self.status_changes)}",
+        ]
+        for title, styles in (("New", sorted(self.new)), ("Changed", sorted(self.changed)),
+                              ("Removed", self.removed)):
+            if styles:
+                lines.append(f"\n{title}:")
+                lines.extend(f"  {style}" for style in styles)
+        if self.status_changes:
+            lines.append("\nStatus Changes:")
+            lines.extend(f"  {style}: {old or '(none)'} -> {new}"
+                         for style, (old, new) in sorted(self.status_changes.items()))
+        return lines
@@ -0,0 +1,347 @@
+"""
+Batched isNew / isBestSeller flag updates
+
+Both validators list the products whose flag still needs setting. Until
+now those were set by hand or one PUT per style. This module turns a
+need-flag set into a few bulk updates against the Caspio products table:
+
+- chunked WHERE STYLE IN (...) clauses, sized so each one fits in a
+  request URL (q.where) and stays under MAX_BATCH_STYLES styles
+- written as SQL statements and as Caspio REST bulk requests
+  (PUT /tables/<table>/records?q.where=... with the flag in the body)
+
+Each clause also carries "AND (<flag> = 0 OR <flag> IS NULL)". Rows that
+are already flagged are never touched again, and re-running a batch
+changes nothing. With a live endpoint the plan is first checked against
+the table: styles flagged since the validation run drop out and the
+dry-run diff shows exactly what would change. After an update, each
+batch is queried again to verify that no unflagged rows remain.
+
+Usage:
+    python -m nwca_catalog.flags cleaned_new_products.csv --flag isNew --dry-run
+    CASPIO_TOKEN=... python -m nwca_catalog.flags cleaned_new_products.csv --flag isNew \\
+        --apply https://c3eku948.caspio.com/rest/v3
+    python -m nwca_catalog.flags --demo        # against a local stand-in table
+"""
+
+import asyncio
+import json
+import os
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+import aiohttp
+import pandas as pd
+
+TABLE_NAME = 'Sanmar_Bulk_251816_Feb2024'
+STYLE_FIELD = 'STYLE'
+TOKEN_VARIABLE = 'CASPIO_TOKEN'
+
+MAX_BATCH_STYLES = 100
+MAX_WHERE_CHARS = 1500      # q.where is sent in the query string
+REQUEST_TIMEOUT = 30
+SELECT_LIMIT = 1000         # rows per Caspio records query
+
+
+class Flag(NamedTuple):
+    """A product flag as the API reports it, as the table stores it, and as the output CSVs carry it"""
+    name: str
+    field: str
+    column: str
+
+
+FLAGS: Dict[str, Flag] = {
+    'isNew': Flag('isNew', 'IsNew', 'API_IsNew'),
+    'isBestSeller': Flag('isBestSeller', 'IsTopSeller', 'API_BestSeller'),
+}
+
+
+def quote(style: str) -> str:
+    """SQL string literal (single quotes doubled)"""
+    return "'" + str(style).replace("'", "''") + "'"
+
+
+def where_clause(styles: Iterable[str], field: str) -> str:
+    """Rows of these styles whose flag is not set yet"""
+    return f"{STYLE_FIELD} IN ({','.join(quote(s) for s in styles)}) AND ({field} = 0 OR {field} IS NULL)"
+
+
+def batch_styles(styles: List[str], field: str, max_styles: int = MAX_BATCH_STYLES,
+                 max_chars: int = MAX_WHERE_CHARS) -> List[List[str]]:
+    """Greedy chunks of styles whose where_clause stays within max_chars and max_styles"""
+    batches: List[List[str]] = []
+    batch: List[str] = []
+    length = len(where_clause([], field))
+    for style in styles:
+        added = len(quote(style)) + (1 if batch else 0)
+        if batch and (len(batch) >= max_styles or length + added > max_chars):
+            batches.append(batch)
+            batch, length = [], len(where_clause([], field))
+            added = len(quote(style))
+        batch.append(style)
+        length += added
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+class FlagPlan:
+    """Styles whose flag needs setting, split into bulk update batches"""
+
+    def __init__(self, flag: Flag, to_set: Iterable[str], already_set: Iterable[str] = (),
+                 table: str = TABLE_NAME, max_styles: int = MAX_BATCH_STYLES, max_chars: int = MAX_WHERE_CHARS):
+        self.flag = flag
+        self.table = table
+        self.max_styles = max_styles
+        self.max_chars = max_chars
+        self.already_set = sorted(set(already_set))
+        self.to_set = sorted(set(to_set) - set(self.already_set))
+        # Styles found flagged at the table by check() since the validation run
+        self.set_since: List[str] = []
+        self.batches = batch_styles(self.to_set, flag.field, max_styles, max_chars)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, flag: Flag, style_column: str = 'Style_Cleaned', **options) -> 'FlagPlan':
+        """
+        Plan from validator output (cleaned_*.csv or a need-flag CSV)
+
+        Styles the API did not find are left out; styles whose flag column
+        is already true are reported as already set.
+        """
+        def truthy(values: pd.Series) -> pd.Series:
+            return values.astype(str).str.lower() == 'true'
+
+        rows = df[truthy(df['API_Exists'])] if 'API_Exists' in df.columns else df
+        flagged = truthy(rows[flag.column]) if flag.column in rows.columns else pd.Series(False, index=rows.index)
+        return cls(flag, rows.loc[~flagged, style_column], rows.loc[flagged, style_column], **options)
+
+    def _rebatch(self, to_set: List[str]) -> None:
+        self.to_set = to_set
+        self.batches = batch_styles(to_set, self.flag.field, self.max_styles, self.max_chars)
+
+    def sql(self) -> List[str]:
+        return [f"UPDATE {self.table} SET {self.flag.field} = 1 WHERE {where_clause(batch, self.flag.field)};"
+                for batch in self.batches]
+
+    def bulk_requests(self) -> List[Dict]:
+        """Caspio REST v3 bulk updates, one per batch"""
+        return [{
+            'method': 'PUT',
+            'path': f"/tables/{self.table}/records",
+            'params': {'q.where': where_clause(batch, self.flag.field)},
+            'body': {self.flag.field: True},
+            'styles': batch
+        } for batch in self.batches]
+
+    def write(self, base_path: str) -> List[str]:
+        """Write <base>.sql and <base>.json; returns the paths"""
+        sql_path, json_path = f"{base_path}.sql", f"{base_path}.json"
+        with open(sql_path, 'w', encoding='utf-8') as f:
+            f.write(f"-- Set {self.flag.field} for {len(self.to_set)} style(s) in {len(self.batches)} batch(es); "
+                    f"already-flagged rows are skipped, so re-running is safe\n")
+            for statement in self.sql():
+                f.write(statement + '\n')
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump({'flag': self.flag.name, 'field': self.flag.field, 'table': self.table,
+                       'styles': len(self.to_set), 'already_set': len(self.already_set),
+                       'requests': self.bulk_requests()}, f, indent=2)
+            f.write('\n')
+        return [sql_path, json_path]
+
+    def summary(self) -> str:
+        return (f"{len(self.to_set)} style(s) to set {self.flag.field} in {len(self.batches)} bulk update(s), "
+                f"{len(self.already_set) + len(self.set_since)} already set")
+
+    def diff_lines(self) -> List[str]:
+        """Dry-run diff: what an update would change and what it would leave alone"""
+        lines = [f"{self.table}.{self.flag.field}: {self.summary()}"]
+        lines.extend(f"  ~ {style}: {self.flag.field} false -> true" for style in self.to_set)
+        lines.extend(f"  = {style}: already true (since validation)" for style in self.set_since)
+        lines.extend(f"  = {style}: already true" for style in self.already_set)
+        return lines
+
+
+class CaspioTable:
+    """Minimal Caspio REST v3 client for bulk flag updates"""
+
+    def __init__(self, session: aiohttp.ClientSession, base_url: str, table: str, token: Optional[str] = None):
+        self.session = session
+        self.url = f"{base_url.rstrip('/')}/tables/{table}/records"
+        self.headers = {'Accept': 'application/json'}
+        if token:
+            self.headers['Authorization'] = f"Bearer {token}"
+
+    async def select(self, fields: List[str], where: str) -> List[Dict]:
+        params = {'q.select': ','.join(fields), 'q.where': where, 'q.limit': str(SELECT_LIMIT)}
+        async with self.session.get(self.url, params=params, headers=self.headers) as response:
+            response.raise_for_status()
+            return (await response.json()).get('Result', [])
+
+    async def update(self, where: str, values: Dict) -> int:
+        """Bulk update; returns the number of records changed"""
+        async with self.session.put(self.url, params={'q.where': where}, json=values,
+                                    headers=self.headers) as response:
+            response.raise_for_status()
+            return (await response.json()).get('RecordsAffected', 0)
+
+
+async def check(plan: FlagPlan, table: CaspioTable) -> None:
+    """Idempotency check: drop styles the table no longer needs flagged"""
+    pending = set()
+    for batch in plan.batches:
+        rows = await table.select([STYLE_FIELD], where_clause(batch, plan.flag.field))
+        if len(rows) >= SELECT_LIMIT:
+            # Styles have one row per color/size; a full page may hide some, so keep the whole batch
+            pending.update(batch)
+        else:
+            pending.update(row[STYLE_FIELD] for row in rows)
+    plan.set_since = [style for style in plan.to_set if style not in pending]
+    plan._rebatch([style for style in plan.to_set if style in pending])
+
+
+async def apply(plan: FlagPlan, table: CaspioTable) -> Dict[str, int]:
+    """
+    Send the plan's bulk updates and verify each batch afterwards
+
+    Returns:
+        Counts: batches sent, records changed, styles still unflagged after the update
+    """
+    counts = {'batches': 0, 'records': 0, 'unverified': 0}
+    for batch in plan.batches:
+        where = where_clause(batch, plan.flag.field)
+        counts['records'] += await table.update(where, {plan.flag.field: True})
+        counts['batches'] += 1
+        # Anything still matching the clause was not flagged
+        counts['unverified'] += len({row[STYLE_FIELD] for row in await table.select([STYLE_FIELD], where)})
+        print(f"[OK] Batch {counts['batches']}/{len(plan.batches)}: {len(batch)} style(s)")
+    return counts
+
+
+async def run(plan: FlagPlan, base_url: Optional[str], dry_run: bool, token: Optional[str]) -> int:
+    """Print the diff, and with a live endpoint check and (unless dry_run) apply the plan"""
+    if base_url:
+        timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            table = CaspioTable(session, base_url, plan.table, token)
+            await check(plan, table)
+            for line in plan.diff_lines():
+                print(line)
+            if dry_run or not plan.batches:
+                return 0
+            counts = await apply(plan, table)
+        print(f"[OK] {counts['records']} record(s) updated in {counts['batches']} bulk call(s)")
+        if counts['unverified']:
+            print(f"[ERROR] {counts['unverified']} style(s) still unflagged after the update")
+            return 1
+        return 0
+    for line in plan.diff_lines():
+        print(line)
+    return 0
+
+
+# Local stand-in for the Caspio records endpoint (demo / verification)
+
+_IN_CLAUSE = re.compile(r"(\w+) IN \(([^)]*)\)")
+_UNSET = re.compile(r"\((\w+) = 0 OR \1 IS NULL\)")
+
+
+def _matches(where: str, row: Dict) -> bool:
+    """Evaluate the WHERE clauses this module writes against one row"""
+    clause = _IN_CLAUSE.search(where)
+    styles = {value.strip()[1:-1].replace("''", "'") for value in clause.group(2).split(',')} if clause else set()
+    if clause and row.get(clause.group(1)) not in styles:
+        return False
+    unset = _UNSET.search(where)
+    return not (unset and row.get(unset.group(1)))
+
+
+def stand_in_app(rows: List[Dict], log: List[str]):
+    """aiohttp app serving GET / PUT /tables/<table>/records over rows"""
+    from aiohttp import web
+
+    async def records(request):
+        where = request.query.get('q.where', '')
+        matched = [row for row in rows if _matches(where, row)]
+        log.append(f"{request.method} ({len(matched)} rows)")
+        if request.method == 'PUT':
+            values = await request.json()
+            for row in matched:
+                row.update(values)
+            return web.json_response({'RecordsAffected': len(matched)})
+        fields = [f for f in request.query.get('q.select', '').split(',') if f]
+        return web.json_response({'Result': [{f: row.get(f) for f in fields} if fields else row for row in matched]})
+
+    app = web.Application()
+    app.router.add_route('*', '/tables/{table}/records', records)
+    return app
+
+
+async def _demo(styles: int) -> None:
+    """Plan, dry-run, apply and re-apply against a local table with several rows per style"""
+    from aiohttp import web
+
+    # Three color/size rows per style; every 4th style is already flagged
+    rows = [{STYLE_FIELD: f"ST{i}", 'COLOR': color, 'IsNew': i % 4 == 0}
+            for i in range(styles) for color in ('Black', 'Navy', 'Red')]
+    validated = pd.DataFrame({'Style_Cleaned': [f"ST{i}" for i in range(styles)],
+                              'API_Exists': True, 'API_IsNew': [i % 4 == 0 for i in range(styles)]})
+    # One style gets flagged by someone else after the validation run
+    for row in rows:
+        if row[STYLE_FIELD] == 'ST1':
+            row['IsNew'] = True
+
+    log: List[str] = []
+    runner = web.AppRunner(stand_in_app(rows, log))
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    base_url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+    try:
+        plan = FlagPlan.from_frame(validated, FLAGS['isNew'])
+        print(f"Validated: {plan.summary()}")
+        print("\n--- dry run ---")
+        await run(plan, base_url, dry_run=True, token=None)
+        print(f"(requests so far: {', '.join(log)})")
+
+        print("\n--- apply ---")
+        log.clear()
+        await run(FlagPlan.from_frame(validated, FLAGS['isNew']), base_url, dry_run=False, token=None)
+        print(f"requests: {len(log)} ({sum(1 for entry in log if entry.startswith('PUT'))} bulk PUTs) "
+              f"instead of {len(plan.to_set)} per-style PUTs")
+        unflagged = sum(1 for row in rows if not row['IsNew'])
+        print(f"rows still unflagged: {unflagged}")
+
+        print("\n--- apply again (idempotent) ---")
+        log.clear()
+        await run(FlagPlan.from_frame(validated, FLAGS['isNew']), base_url, dry_run=False, token=None)
+        print(f"requests: {', '.join(log)}")
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('csv', nargs='?', help="cleaned_*.csv or a need-flag CSV from either validator")
+    parser.add_argument('--flag', choices=sorted(FLAGS), default='isNew')
+    parser.add_argument('--table', default=TABLE_NAME)
+    parser.add_argument('--max-batch', type=int, default=MAX_BATCH_STYLES, help="Styles per bulk update")
+    parser.add_argument('--out', metavar='BASE', help="Write BASE.sql and BASE.json")
+    parser.add_argument('--apply', metavar='URL', help=f"Caspio REST base URL (token from ${TOKEN_VARIABLE})")
+    parser.add_argument('--dry-run', action='store_true', help="With --apply: check and show the diff only")
+    parser.add_argument('--demo', action='store_true', help="Run against a local stand-in table")
+    parser.add_argument('--styles', type=int, default=500, help="Styles in the --demo table")
+    args = parser.parse_args()
+
+    if args.demo:
+        asyncio.run(_demo(args.styles))
+        sys.exit(0)
+    if not args.csv:
+        parser.error("a CSV is required (or --demo)")
+    plan = FlagPlan.from_frame(pd.read_csv(args.csv, dtype=str, keep_default_na=False), FLAGS[args.flag],
+                               table=args.table, max_styles=args.max_batch)
+    if args.out:
+        print(f"[OK] Wrote {', '.join(plan.write(args.out))}")
+    sys.exit(asyncio.run(run(plan, args.apply, args.dry_run, os.environ.get(TOKEN_VARIABLE))))
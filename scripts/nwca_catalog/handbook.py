@@ -0,0 +1,71 @@
+"""
+Employee-handbook chapters from the public policies API
+
+build-handbook-pdf.py renders the chapters; fetching them needs only the
+standard library. So the fetch lives here, where the stand-in benchmark can
+run it without the PDF toolchain (xhtml2pdf, reportlab, Pillow, PyMuPDF).
+
+Usage:
+    parent, chapters = fetch_handbook_chapters()
+"""
+
+import json
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+PROXY = 'https://caspio-pricing-proxy-ab30a049961a.herokuapp.com'
+PARENT_ID = 'employee-handbook'
+FETCH_TIMEOUT = 15      # seconds
+CHAPTER_PACE = 0.4      # seconds between chapter requests (the proxy answers bursts with 429)
+
+
+def fetch_json(url: str, timeout: float = FETCH_TIMEOUT):
+    """GET a URL and return parsed JSON. Cache-busts via timestamp."""
+    import urllib.request  # http.client, ssl and email: imported on the first fetch, not at startup
+
+    sep = '&' if '?' in url else '?'
+    full = f'{url}{sep}_={int(time.time())}'
+    with urllib.request.urlopen(full, timeout=timeout) as resp:
+        return json.load(resp)
+
+
+def fetch_handbook_chapters(proxy: str = PROXY, parent_id: str = PARENT_ID, pace: float = CHAPTER_PACE,
+                            fetch: Callable[[str], Dict] = fetch_json) -> Tuple[Optional[Dict], List[Dict]]:
+    """
+    Fetch the parent policy and all child chapters (full Body_HTML)
+
+    The tree endpoint nests children under the parent and strips Body_HTML to
+    keep the payload small, so it is used only to discover ordered chapter IDs,
+    then each chapter is fetched individually (throttled to avoid 429).
+
+    Args:
+        proxy: Proxy root (without /api)
+        parent_id: Policy_ID of the handbook's parent policy
+        pace: Seconds to sleep after each chapter request
+        fetch: URL -> parsed JSON (fetch_json; the benchmark passes a timed one)
+
+    Returns:
+        (parent policy or None, chapter policies in Sort_Order)
+    """
+    tree = fetch(f'{proxy}/api/policies-public/tree')
+    chapter_ids = []
+    for cat in tree.get('tree', []):
+        for p in cat.get('policies', []):
+            if p.get('Policy_ID') == parent_id:
+                for child in p.get('children', []):
+                    chapter_ids.append((
+                        child['Policy_ID'],
+                        child.get('Sort_Order', 99999),
+                    ))
+                break
+    chapter_ids.sort(key=lambda x: x[1])
+
+    parent_res = fetch(f'{proxy}/api/policies-public/{parent_id}')
+    parent = parent_res.get('policy')
+
+    full_chapters = []
+    for cid, _ in chapter_ids:
+        full = fetch(f'{proxy}/api/policies-public/{cid}')
+        full_chapters.append(full['policy'])
+        time.sleep(pace)
+    return parent, full_chapters
@@ -0,0 +1,144 @@
+"""
+Chunked CSV input for the validation scripts
+
+Reads one or more CSV files, glob patterns or stdin ("-"), gzip-compressed
+or plain, in fixed-size chunks so an export of any size flows through the
+cleaning / dedupe / validation pipeline with bounded memory.
+
+Usage:
+    for chunk in iter_csv_chunks(["exports/*.csv.gz", "-"], chunk_size=50_000):
+        ...
+"""
+
+import contextlib
+import glob
+import gzip
+import os
+import sys
+from typing import IO, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CHUNK_SIZE = 50_000
+GZIP_MAGIC = b'\x1f\x8b'
+STDIN = '-'
+
+
+def expand_sources(sources: Iterable[str]) -> List[str]:
+    """
+    Resolve glob patterns to files (sorted per pattern), keeping "-" as stdin
+
+    Raises:
+        FileNotFoundError: A path or pattern matched nothing
+    """
+    resolved = []
+    for source in sources:
+        if source == STDIN:
+            resolved.append(source)
+        elif glob.has_magic(source):
+            matches = sorted(glob.glob(source))
+            if not matches:
+                raise FileNotFoundError(f"No files match {source}")
+            resolved.extend(matches)
+        elif os.path.exists(source):
+            resolved.append(source)
+        else:
+            raise FileNotFoundError(f"Input file not found: {source}")
+    return resolved
+
+
+@contextlib.contextmanager
+def open_source(source: str) -> Iterator[IO[bytes]]:
+    """Open a file or stdin for binary reading, transparently un-gzipping it"""
+    if source == STDIN:
+        raw = sys.stdin.buffer
+        magic = raw.peek(2)[:2] if hasattr(raw, 'peek') else b''
+        yield gzip.GzipFile(fileobj=raw) if magic == GZIP_MAGIC else raw
+        return
+
+    with open(source, 'rb') as raw:
+        magic = raw.read(2)
+        raw.seek(0)
+        if magic == GZIP_MAGIC:
+            with gzip.GzipFile(fileobj=raw) as unzipped:
+                yield unzipped
+        else:
+            yield raw
+
+
+def iter_csv_chunks(sources: Iterable[str], chunk_size: int = DEFAULT_CHUNK_SIZE,
+                    required: Optional[Iterable[str]] = None, dtype=str) -> Iterator[pd.DataFrame]:
+    """
+    Yield DataFrames of at most chunk_size rows from every source in order
+
+    By default all columns are read as strings (so "2000" stays a style, not
+    an int), and blank cells stay blank rather than becoming NaN.
+
+    Args:
+        sources: File paths, glob patterns, or "-" for stdin
+        chunk_size: Rows per chunk
+        required: Column names every source must provide
+        dtype: read_csv dtype; a {column: str} dict leaves the other columns to type inference
+
+    Raises:
+        ValueError: A source is missing a required column
+    """
+    required = list(required or [])
+    for source in expand_sources(sources):
+        name = '<stdin>' if source == STDIN else source
+        with open_source(source) as f:
+            reader = pd.read_csv(f, chunksize=chunk_size, dtype=dtype, keep_default_na=False)
+            for chunk in reader:
+                missing = [c for c in required if c not in chunk.columns]
+                if missing:
+                    raise ValueError(f"{name}: missing column(s) {', '.join(missing)}")
+                yield chunk
+
+
+class ChunkDeduper:
+    """drop_duplicates(subset, keep='first') applied across a stream of chunks"""
+
+    def __init__(self, subset: List[str]):
+        self.subset = subset
+        # 64-bit row hashes of every key seen so far (memory grows with
+        # distinct keys, not with rows)
+        self.seen = set()
+
+    def filter(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """Drop rows whose key appeared earlier in this chunk or a previous one"""
+        hashes = pd.util.hash_pandas_object(chunk[self.subset], index=False).to_numpy()
+        first_here = ~chunk.duplicated(subset=self.subset, keep='first').to_numpy()
+        unseen = np.fromiter((h not in self.seen for h in hashes), dtype=bool, count=len(hashes))
+        keep = first_here & unseen
+        self.seen.update(hashes[keep].tolist())
+        return chunk[keep].copy()
+
+
+class CsvAppender:
+    """Write a CSV one chunk at a time (header on the first chunk only)"""
+
+    def __init__(self, path: str, columns: Sequence[str] = ()):
+        """
+        Args:
+            path: Output CSV
+            columns: Header written by finish() when no chunk arrived; otherwise
+                the first chunk's columns are used
+        """
+        self.path = path
+        self.default_columns = list(columns)
+        self.columns: Optional[List[str]] = None
+        self.rows = 0
+
+    def write(self, chunk: pd.DataFrame) -> None:
+        if self.columns is None:
+            self.columns = list(chunk.columns)
+            chunk.to_csv(self.path, index=False)
+        else:
+            chunk.reindex(columns=self.columns).to_csv(self.path, mode='a', header=False, index=False)
+        self.rows += len(chunk)
+
+    def finish(self) -> None:
+        """Write a header-only file if no chunk arrived (empty input, or a shard with no styles)"""
+        if self.columns is None:
+            self.write(pd.DataFrame(columns=self.default_columns))
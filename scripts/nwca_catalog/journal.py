@@ -0,0 +1,153 @@
+"""
+Append-only journal of completed validations
+
+Every style result is appended to a JSON-lines file as soon as its batch
+finishes, so an interrupted or crashed run can be resumed with --resume:
+the journal is replayed into the validator cache and only the styles it
+does not cover are requested again from the rate-limited proxy.
+
+Lines are flushed to the OS after every batch (enough to survive a crash of
+the process) and fsync'd in batches of sync_every records or every
+sync_interval seconds (enough to survive a crash of the machine without
+paying an fsync per style).
+
+Usage:
+    cache, _ = replay_journal(path) if resume else ({}, 0)
+    with ResultJournal(path, append=resume) as journal:
+        journal.record_many(batch_results)
+"""
+
+import asyncio
+import json
+import os
+import signal
+import sys
+import time
+from typing import Dict, Tuple
+
+from .breaker import CIRCUIT_OPEN_STATUS
+
+SYNC_EVERY = 200
+SYNC_INTERVAL = 2.0
+
+# Transient outcomes are retried on resume instead of being replayed
+RETRY_STATUSES = frozenset({'Timeout', 'Error', 'API Error', CIRCUIT_OPEN_STATUS})
+
+
+class ResultJournal:
+    """JSON-lines writer for style -> result records with batched fsync"""
+
+    def __init__(self, path: str, append: bool = False,
+                 sync_every: int = SYNC_EVERY, sync_interval: float = SYNC_INTERVAL):
+        self.path = path
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.records = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._file = open(path, 'a' if append else 'w', encoding='utf-8')
+        if append and self._file.tell() > 0:
+            # Terminate a line cut short by a crash so the next record starts clean
+            with open(path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    self._file.write('\n')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def record(self, style: str, result: Dict) -> None:
+        """Append one result (call flush() or record_many() to push it to the OS)"""
+        self._file.write(json.dumps({'style': style, 'result': result}, separators=(',', ':')) + '\n')
+        self.records += 1
+        self._unsynced += 1
+
+    def record_many(self, results: Dict[str, Dict]) -> None:
+        """Append a finished batch and flush it, fsync'ing when a sync is due"""
+        for style, result in results.items():
+            self.record(style, result)
+        self.flush()
+
+    def flush(self, sync: bool = False) -> None:
+        """Write buffered lines to the OS; fsync if forced or a sync is due"""
+        if self._file.closed:
+            return
+        self._file.flush()
+        due = (self._unsynced >= self.sync_every
+               or time.monotonic() - self._last_sync >= self.sync_interval)
+        if self._unsynced and (sync or due):
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+            self._last_sync = time.monotonic()
+
+    def close(self) -> None:
+        """Flush, fsync and close (safe to call twice)"""
+        if not self._file.closed:
+            self.flush(sync=True)
+            self._file.close()
+
+
+def replay_journal(path: str, retry_statuses=RETRY_STATUSES) -> Tuple[Dict[str, Dict], int]:
+    """
+    Load a journal back into a results cache
+
+    The last record for a style wins. Results whose status is transient
+    (timeouts, errors) are left out so they are requested again, and a
+    truncated final line from a crash mid-write is skipped.
+
+    Args:
+        path: Journal file written by ResultJournal
+        retry_statuses: Statuses to leave out of the cache
+
+    Returns:
+        (style -> result cache, number of unreadable lines skipped)
+    """
+    cache: Dict[str, Dict] = {}
+    skipped = 0
+    if not os.path.exists(path):
+        return cache, skipped
+
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+                style, result = entry['style'], entry['result']
+            except (ValueError, KeyError, TypeError):
+                skipped += 1
+                continue
+            if result.get('status') in retry_statuses:
+                cache.pop(style, None)
+            else:
+                cache[style] = result
+    return cache, skipped
+
+
+def cancel_on_sigint(task: asyncio.Task) -> bool:
+    """
+    Turn Ctrl+C into a cancellation of task
+
+    The cancellation unwinds the run's with-blocks, so the journal is
+    flushed and fsync'd before the process exits. A second Ctrl+C falls
+    back to the default KeyboardInterrupt.
+
+    Returns:
+        False where the event loop cannot install signal handlers (Windows);
+        KeyboardInterrupt unwinds the same with-blocks there
+    """
+    loop = asyncio.get_running_loop()
+
+    def interrupted():
+        print("\n[WARN] Interrupted - flushing journal and stopping...", file=sys.stderr)
+        loop.remove_signal_handler(signal.SIGINT)
+        task.cancel()
+
+    try:
+        loop.add_signal_handler(signal.SIGINT, interrupted)
+    except (NotImplementedError, RuntimeError):
+        return False
+    return True
@@ -0,0 +1,273 @@
+"""
+Per-run request metrics for the API validators
+
+ValidatorMetrics counts what the validators used to leave to scattered
+print statements: requests sent, their latency, status codes, retries,
+cache hits and misses, coalesced duplicate lookups, bytes read and
+throughput. At the end of a run it is written as a JSON file and as a
+summary block for the text report.
+
+Latencies go into an HDR-style histogram: values are bucketed on a
+log-linear scale (each power-of-two range split into 2^(precision_bits-1)
+sub-buckets), so p50 and p99.9 are both within 1% of the true value.
+Memory stays the same whether a run makes a hundred requests or a million.
+
+Usage:
+    async with metrics.request() as request:
+        async with session.get(url) as response:
+            request.status = response.status
+    metrics.write_json(path)
+"""
+
+import asyncio
+import contextlib
+import json
+import time
+from collections import Counter
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import aiohttp
+
+PRECISION_BITS = 8          # 128 sub-buckets per power of two (<0.8% error)
+UNIT = 1e-6                 # histogram resolution in seconds (1 microsecond)
+REPORT_PERCENTILES = (50, 90, 95, 99, 99.9)
+
+
+class LatencyHistogram:
+    """Log-linear latency histogram with bounded relative error (HDR-style)"""
+
+    def __init__(self, precision_bits: int = PRECISION_BITS, unit: float = UNIT):
+        self.precision_bits = precision_bits
+        self.unit = unit
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self._buckets: Counter = Counter()
+
+    def _index(self, ticks: int) -> int:
+        # Values below 2^bits get a bucket each; above, keep the top bits only
+        shift = max(ticks.bit_length() - self.precision_bits, 0)
+        return (shift << self.precision_bits) | (ticks >> shift)
+
+    def _upper(self, index: int) -> float:
+        """Highest value that falls into a bucket, in seconds"""
+        shift, mantissa = index >> self.precision_bits, index & ((1 << self.precision_bits) - 1)
+        return (((mantissa + 1) << shift) - 1) * self.unit
+
+    def record(self, seconds: float) -> None:
+        seconds = max(seconds, 0.0)
+        self._buckets[self._index(int(seconds / self.unit))] += 1
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+
+    def merge(self, other: 'LatencyHistogram') -> None:
+        """Add another histogram's values (same precision and unit)"""
+        if (other.precision_bits, other.unit) != (self.precision_bits, self.unit):
+            raise ValueError("Histograms with different precision cannot be merged")
+        self._buckets.update(other._buckets)
+        self.count += other.count
+        self.total += other.total
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+
+    @classmethod
+    def from_dict(cls, data: Dict, precision_bits: int = PRECISION_BITS, unit: float = UNIT) -> 'LatencyHistogram':
+        """Rebuild a histogram from to_dict() output (bucket upper bounds map back to their buckets)"""
+        histogram = cls(precision_bits, unit)
+        for upper, count in data.get('buckets', []):
+            histogram._buckets[histogram._index(round(upper / unit))] += count
+        histogram.count = data.get('count', 0)
+        histogram.total = data.get('mean', 0.0) * histogram.count
+        if histogram.count:
+            histogram.min, histogram.max = data.get('min', 0.0), data.get('max', 0.0)
+        return histogram
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, p: float) -> float:
+        """Value at or below which p percent of the recordings fall (0.0 when empty)"""
+        if not self.count:
+            return 0.0
+        rank = max(int(-(-p * self.count // 100)), 1)
+        seen = 0
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if seen >= rank:
+                return min(self._upper(index), self.max)
+        return self.max
+
+    def buckets(self) -> List[Tuple[float, int]]:
+        """Non-empty buckets as (upper bound in seconds, count), ascending"""
+        return [(round(self._upper(index), 6), self._buckets[index]) for index in sorted(self._buckets)]
+
+    def to_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'min': round(self.min or 0.0, 6),
+            'mean': round(self.mean, 6),
+            'max': round(self.max or 0.0, 6),
+            'percentiles': {f"p{p:g}": round(self.percentile(p), 6) for p in REPORT_PERCENTILES},
+            'buckets': self.buckets()
+        }
+
+
+class RequestTimer:
+    """Handle for one timed request; set status once the response arrives"""
+
+    __slots__ = ('status', 'bytes')
+
+    def __init__(self):
+        self.status: Optional[int] = None
+        self.bytes = 0
+
+
+class ValidatorMetrics:
+    """Counters and latency histogram for one validation run"""
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.requests = 0
+        self.status_codes: Counter = Counter()
+        self.retries = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.coalesced = 0
+        self.short_circuited = 0
+        self.bytes_read = 0
+        self.styles = 0
+        self._started = time.monotonic()
+        self._elapsed: Optional[float] = None
+
+    @contextlib.asynccontextmanager
+    async def request(self) -> AsyncIterator[RequestTimer]:
+        """
+        Time one HTTP request
+
+        Set timer.status (and timer.bytes when known) inside the block.
+        Timeouts and connection failures are counted under 'timeout' and
+        'connection error' and still recorded in the latency histogram.
+        """
+        timer = RequestTimer()
+        started = time.monotonic()
+        outcome = None
+        try:
+            yield timer
+        except asyncio.TimeoutError:
+            outcome = 'timeout'
+            raise
+        except (aiohttp.ClientError, OSError):
+            outcome = 'connection error'
+            raise
+        finally:
+            if outcome is None and timer.status is not None:
+                outcome = str(timer.status)
+            if outcome is not None:
+                self.requests += 1
+                self.status_codes[outcome] += 1
+                self.latency.record(time.monotonic() - started)
+                self.bytes_read += timer.bytes
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ValidatorMetrics':
+        """Rebuild a finished run's metrics from its JSON file (see to_dict)"""
+        metrics = cls()
+        metrics.latency = LatencyHistogram.from_dict(data.get('latency_seconds', {}))
+        metrics.requests = data.get('requests', 0)
+        metrics.status_codes.update(data.get('status_codes', {}))
+        metrics.retries = data.get('retries', 0)
+        cache = data.get('cache', {})
+        metrics.cache_hits = cache.get('hits', 0)
+        metrics.cache_misses = cache.get('misses', 0)
+        metrics.coalesced = cache.get('coalesced', 0)
+        metrics.short_circuited = data.get('short_circuited', 0)
+        metrics.bytes_read = data.get('bytes_read', 0)
+        metrics.styles = data.get('styles', 0)
+        metrics._elapsed = data.get('elapsed_seconds', 0.0)
+        return metrics
+
+    def merge(self, other: 'ValidatorMetrics') -> None:
+        """
+        Add the counters of a run that went on in parallel (e.g. another shard)
+
+        The elapsed time becomes the longer of the two, so throughput is
+        the combined rate of the runs.
+        """
+        self.latency.merge(other.latency)
+        self.requests += other.requests
+        self.status_codes.update(other.status_codes)
+        self.retries += other.retries
+        self.cache_hits += other.cache_hits
+        self.cache_misses += other.cache_misses
+        self.coalesced += other.coalesced
+        self.short_circuited += other.short_circuited
+        self.bytes_read += other.bytes_read
+        self.styles += other.styles
+        self._elapsed = max(self.elapsed, other.elapsed)
+
+    def stop(self) -> None:
+        """Freeze the elapsed time used for throughput"""
+        if self._elapsed is None:
+            self._elapsed = time.monotonic() - self._started
+
+    @property
+    def elapsed(self) -> float:
+        return self._elapsed if self._elapsed is not None else time.monotonic() - self._started
+
+    def to_dict(self) -> Dict:
+        elapsed = self.elapsed
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            'elapsed_seconds': round(elapsed, 3),
+            'styles': self.styles,
+            'requests': self.requests,
+            'retries': self.retries,
+            'short_circuited': self.short_circuited,
+            'status_codes': dict(sorted(self.status_codes.items())),
+            'cache': {
+                'hits': self.cache_hits,
+                'misses': self.cache_misses,
+                'hit_rate': round(self.cache_hits / lookups, 4) if lookups else 0.0,
+                'coalesced': self.coalesced
+            },
+            'bytes_read': self.bytes_read,
+            'throughput': {
+                'requests_per_second': round(self.requests / elapsed, 2) if elapsed else 0.0,
+                'styles_per_second': round(self.styles / elapsed, 2) if elapsed else 0.0
+            },
+            'latency_seconds': self.latency.to_dict()
+        }
+
+    def write_json(self, path: str) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+            f.write('\n')
+
+    def summary(self) -> str:
+        """One line for the console"""
+        return (f"{self.requests} request(s), p50 {self.latency.percentile(50) * 1000:.0f}ms, "
+                f"p99 {self.latency.percentile(99) * 1000:.0f}ms, {self.cache_hits} cache hit(s), "
+                f"{self.styles / self.elapsed if self.elapsed else 0:.1f} styles/s")
+
+    def report_lines(self) -> List[str]:
+        """Summary block for the run report"""
+        ms = {p: self.latency.percentile(p) * 1000 for p in (50, 95, 99)}
+        codes = ', '.join(f"{code} x {count}" for code, count in sorted(self.status_codes.items())) or 'none'
+        elapsed = self.elapsed
+        return [
+            f"Requests: {self.requests} ({self.retries} retries, {self.short_circuited} short-circuited)",
+            f"Latency: p50 {ms[50]:.1f} ms, p95 {ms[95]:.1f} ms, p99 {ms[99]:.1f} ms, "
+            f"max {(self.latency.max or 0) * 1000:.1f} ms",
+            f"Status Codes: {codes}",
+            f"Cache: {self.cache_hits} hit(s), {self.cache_misses} miss(es), {self.coalesced} coalesced",
+            f"Bytes Read: {self.bytes_read:,}",
+            f"Throughput: {self.styles} styles in {elapsed:.1f}s "
+            f"({self.styles / elapsed if elapsed else 0:.1f} styles/s, "
+            f"{self.requests / elapsed if elapsed else 0:.1f} requests/s)"
+        ]
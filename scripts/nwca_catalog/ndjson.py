@@ -0,0 +1,114 @@
+"""
+Progressive NDJSON stream of validation results
+
+The output CSVs and the report only exist once every chunk has been
+validated. With a stream, downstream consumers (dashboards, the flag-update
+scripts) see one JSON line per style as soon as its result is known.
+Lines are flushed as they are written.
+
+    {"style":"PC54","source":"api","elapsed":1.204,"result":{"exists":true,...}}
+
+source is "api" for a fresh lookup and "cache" for a result the run
+already had (from --resume, --delta, the shared cache or an earlier chunk).
+A style is written again only if its result changes, e.g. a circuit-open
+skip that is retried in a later chunk. The last line for a style wins.
+
+The target is a file, a named pipe (opening waits for a reader) or "-" for
+stdout; the scripts then print their console output to stderr. Each line
+has the journal's {"style", "result"} shape, so a saved stream can be
+replayed like a journal:
+
+    python process-new-products.py --resume --journal results.ndjson
+
+Usage:
+    with ResultStream('results.ndjson') as stream:
+        validator.stream = stream
+        ...
+"""
+
+import json
+import os
+import stat
+import sys
+import time
+from typing import Dict, IO, Optional
+
+from .results import StyleResult
+
+STDOUT = '-'
+
+
+def is_fifo(path: str) -> bool:
+    try:
+        return stat.S_ISFIFO(os.stat(path).st_mode)
+    except OSError:
+        return False
+
+
+class ResultStream:
+    """Line-flushed NDJSON writer for style results, to a file, named pipe or stdout"""
+
+    def __init__(self, target: str):
+        self.target = target
+        self.lines = 0
+        self.sent: Dict[str, StyleResult] = {}
+        self.broken = False
+        self._started = time.monotonic()
+        if target == STDOUT:
+            # The real stdout, even while console output is redirected to stderr
+            self._file: Optional[IO[str]] = sys.__stdout__
+        else:
+            if is_fifo(target):
+                print(f"[INFO] Waiting for a reader on {target}...", file=sys.stderr)
+            self._file = open(target, 'w', encoding='utf-8')
+
+    def __enter__(self) -> 'ResultStream':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def name(self) -> str:
+        return '<stdout>' if self.target == STDOUT else self.target
+
+    def emit(self, style: str, result: StyleResult, source: str) -> None:
+        """Write and flush one style's line, unless the same result was already sent"""
+        if self.broken or self.sent.get(style) == result:
+            return
+        self.sent[style] = result
+        line = json.dumps({'style': style, 'source': source,
+                           'elapsed': round(time.monotonic() - self._started, 3),
+                           'result': result.to_dict()}, separators=(',', ':'))
+        try:
+            self._file.write(line + '\n')
+            self._file.flush()
+        except BrokenPipeError:
+            self._reader_gone()
+            return
+        self.lines += 1
+
+    def _reader_gone(self) -> None:
+        """The consumer closed the pipe: stop streaming and let the run finish"""
+        self.broken = True
+        print(f"[WARN] Result stream reader on {self.name} went away - streaming stopped",
+              file=sys.stderr)
+        # Point the descriptor at /dev/null so the final flush at close/exit cannot fail
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, self._file.fileno())
+        os.close(devnull)
+
+    def summary(self) -> str:
+        return f"{self.lines} line(s) for {len(self.sent)} style(s) to {self.name}"
+
+    def close(self) -> None:
+        if self._file is None:
+            return
+        try:
+            if self.target == STDOUT:
+                self._file.flush()
+            else:
+                self._file.close()
+        except BrokenPipeError:
+            pass
+        self._file = None
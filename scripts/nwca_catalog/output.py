@@ -0,0 +1,181 @@
+"""
+Single-pass partitioned output for validated chunks
+
+A validated chunk goes to one file with every row plus one file per
+status (not found / needs flag / already flagged). Writing those as four
+filtered frames means scanning the chunk once per mask and formatting each
+row to CSV twice.
+
+PartitionedWriter gives each row its partition once (the first matching
+condition, the last partition otherwise) and formats the chunk's CSV text
+once. It writes that text to the combined file and the matching lines to
+each partition file. Files stay open for the whole run.
+
+With parquet=True each CSV also gets a .parquet sibling (needs pyarrow).
+String columns are stored dictionary-encoded, so downstream tools load them
+as categoricals without re-parsing text.
+
+Usage:
+    with PartitionedWriter('all.csv', {'not_found': 'nf.csv', 'found': 'f.csv'}) as writer:
+        codes = writer.write(chunk, [~chunk['API_Exists']])
+"""
+
+import importlib.util
+import os
+from typing import IO, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+LINE_END = os.linesep
+
+
+def parquet_available() -> bool:
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def parquet_path(csv_path: str) -> str:
+    return os.path.splitext(csv_path)[0] + '.parquet'
+
+
+def arrow_schema(chunk: pd.DataFrame):
+    """Arrow schema for a chunk: bool / int64 / float64 as-is, everything else dictionary strings"""
+    import pyarrow as pa
+
+    fields = []
+    for name, dtype in chunk.dtypes.items():
+        if pd.api.types.is_bool_dtype(dtype):
+            arrow_type = pa.bool_()
+        elif pd.api.types.is_integer_dtype(dtype):
+            arrow_type = pa.int64()
+        elif pd.api.types.is_float_dtype(dtype):
+            arrow_type = pa.float64()
+        else:
+            arrow_type = pa.dictionary(pa.int32(), pa.string())
+        fields.append(pa.field(str(name), arrow_type))
+    return pa.schema(fields)
+
+
+def arrow_table(chunk: pd.DataFrame, schema):
+    """Chunk as an Arrow table matching schema (strings dictionary-encoded per chunk)"""
+    import pyarrow as pa
+
+    arrays = []
+    for field, (_, values) in zip(schema, chunk.items()):
+        if pa.types.is_dictionary(field.type):
+            strings = values.astype(object).where(values.notna(), None)
+            strings = [value if value is None else str(value) for value in strings]
+            arrays.append(pa.array(strings, type=pa.string()).dictionary_encode())
+        else:
+            arrays.append(pa.Array.from_pandas(values, type=field.type))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+class PartitionedWriter:
+    """Stream chunks to a combined CSV and per-partition CSVs (and optional Parquet) in one pass"""
+
+    def __init__(self, combined: str, partitions: Dict[str, str], parquet: bool = False,
+                 columns: Sequence[str] = ()):
+        """
+        Args:
+            combined: CSV that receives every row
+            partitions: Partition name -> CSV path, in condition order
+            parquet: Also write a .parquet file next to each CSV
+            columns: Header written when no chunk arrives (e.g. a shard with no styles);
+                otherwise the first chunk's columns are used
+        """
+        self.combined = combined
+        self.names: List[str] = list(partitions)
+        self.paths: List[str] = [combined] + list(partitions.values())
+        self.parquet = parquet
+        self.default_columns = list(columns)
+        self.columns: Optional[List[str]] = None
+        self.rows: Dict[str, int] = {name: 0 for name in ['combined'] + self.names}
+        self._files: List[IO[str]] = []
+        self._parquet_writers: list = []
+        self._schema = None
+
+    def __enter__(self) -> 'PartitionedWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        # A failed run leaves the previous outputs alone if it never got to write
+        self.close(finished=exc_type is None)
+
+    def _open(self, chunk: pd.DataFrame) -> None:
+        self.columns = list(chunk.columns)
+        header = chunk.head(0).to_csv(index=False, lineterminator=LINE_END)
+        for path in self.paths:
+            f = open(path, 'w', encoding='utf-8', newline='')
+            f.write(header)
+            self._files.append(f)
+        if self.parquet:
+            import pyarrow.parquet as pq
+
+            self._schema = arrow_schema(chunk)
+            self._parquet_writers = [pq.ParquetWriter(parquet_path(path), self._schema) for path in self.paths]
+
+    def partition(self, conditions: Sequence) -> np.ndarray:
+        """Partition index per row: the first true condition, else the last partition"""
+        masks = [np.asarray(condition, dtype=bool) for condition in conditions]
+        if len(masks) != len(self.names) - 1:
+            raise ValueError(f"Expected {len(self.names) - 1} condition(s) for {len(self.names)} partitions")
+        return np.select(masks, list(range(len(masks))), default=len(masks))
+
+    def write(self, chunk: pd.DataFrame, conditions: Sequence) -> np.ndarray:
+        """
+        Append a chunk to every output file
+
+        Args:
+            chunk: Validated rows (reordered to the first chunk's columns)
+            conditions: One boolean mask per partition except the last
+
+        Returns:
+            Partition index per row of chunk (position in the partitions dict)
+        """
+        if self.columns is None:
+            self._open(chunk)
+        else:
+            chunk = chunk.reindex(columns=self.columns)
+        codes = self.partition(conditions)
+
+        body = chunk.to_csv(index=False, header=False, lineterminator=LINE_END)
+        lines = body.split(LINE_END)
+        self._files[0].write(body)
+        if len(lines) == len(chunk) + 1:
+            lines = np.array(lines[:-1], dtype=object)
+            for code, f in enumerate(self._files[1:]):
+                selected = lines[codes == code]
+                if len(selected):
+                    f.write(LINE_END.join(selected) + LINE_END)
+        else:
+            # A quoted value spans lines, so rows cannot be split from the text
+            for code, f in enumerate(self._files[1:]):
+                f.write(chunk[codes == code].to_csv(index=False, header=False, lineterminator=LINE_END))
+
+        if self._parquet_writers:
+            self._parquet_writers[0].write_table(arrow_table(chunk, self._schema))
+            for code, writer in enumerate(self._parquet_writers[1:]):
+                part = chunk[codes == code]
+                if len(part):
+                    writer.write_table(arrow_table(part, self._schema))
+
+        self.rows['combined'] += len(chunk)
+        for code, name in enumerate(self.names):
+            self.rows[name] += int(np.count_nonzero(codes == code))
+        return codes
+
+    def close(self, finished: bool = True) -> None:
+        """
+        Flush and close every file (Parquet footers are written here)
+
+        Args:
+            finished: The run completed; if it wrote no chunk, header-only files are created
+        """
+        if finished and self.columns is None:
+            self._open(pd.DataFrame({column: pd.Series(dtype=object) for column in self.default_columns}))
+        for f in self._files:
+            f.close()
+        for writer in self._parquet_writers:
+            writer.close()
+        self._files, self._parquet_writers = [], []
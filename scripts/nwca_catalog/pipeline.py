@@ -0,0 +1,170 @@
+"""
+Producer/consumer pipeline for the validation scripts
+
+Each input chunk passes through three stages that run concurrently:
+
+    prepare (worker thread)  ->  validate (event loop)  ->  write (worker thread)
+
+Reading, cleaning and de-duplicating the next chunk happens while the async
+validator works on the current one, and the writer appends finished chunks
+to disk while the validator moves on. The stages are joined by bounded
+queues, so a slow stage blocks the one feeding it (backpressure) and at
+most depth chunks wait between any two stages; memory stays flat however
+large the input is.
+
+A thread rather than a process does the preparation: pandas releases the
+GIL in read_csv and most string kernels, and the de-duplication state has
+to persist from chunk to chunk.
+
+Usage:
+    stats = await run_pipeline(chunks, prepare, validate, write, depth=2)
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Iterable, TypeVar
+
+DEFAULT_DEPTH = 2
+
+Raw = TypeVar('Raw')
+Prepared = TypeVar('Prepared')
+Validated = TypeVar('Validated')
+
+_DONE = object()
+
+
+class _Failure:
+    """Carries an exception from the producer thread to the event loop"""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+@dataclass
+class PipelineStats:
+    """Time spent in each stage; busy totals above elapsed mean they overlapped"""
+    chunks: int = 0
+    prepare_seconds: float = 0.0
+    validate_seconds: float = 0.0
+    write_seconds: float = 0.0
+    elapsed: float = 0.0
+
+    @property
+    def overlap_saved(self) -> float:
+        """Seconds saved compared with running the stages back to back"""
+        busy = self.prepare_seconds + self.validate_seconds + self.write_seconds
+        return max(busy - self.elapsed, 0.0)
+
+    def summary(self) -> str:
+        return (f"{self.chunks} chunk(s) in {self.elapsed:.1f}s "
+                f"(prepare {self.prepare_seconds:.1f}s, validate {self.validate_seconds:.1f}s, "
+                f"write {self.write_seconds:.1f}s; {self.overlap_saved:.1f}s overlapped)")
+
+
+async def _put(queue: asyncio.Queue, item, watch: asyncio.Future) -> None:
+    """queue.put() that gives up (re-raising its error) if the consumer task dies"""
+    put = asyncio.ensure_future(queue.put(item))
+    await asyncio.wait({put, watch}, return_when=asyncio.FIRST_COMPLETED)
+    if not put.done():
+        put.cancel()
+        watch.result()
+        raise RuntimeError("Pipeline writer stopped before the end of input")
+
+
+async def run_pipeline(items: Iterable[Raw],
+                       prepare: Callable[[Raw], Prepared],
+                       validate: Callable[[Prepared], Awaitable[Validated]],
+                       write: Callable[[Validated], None],
+                       depth: int = DEFAULT_DEPTH) -> PipelineStats:
+    """
+    Stream items through prepare -> validate -> write with bounded queues
+
+    Chunks are written in input order. Iterating items and calling prepare()
+    happen in one worker thread, write() in another (one call at a time),
+    and validate() runs on the event loop.
+
+    Args:
+        items: Raw input chunks (iterated lazily in the worker thread)
+        prepare: Synchronous clean / dedupe step
+        validate: Coroutine validating a prepared chunk
+        write: Synchronous step persisting a validated chunk
+        depth: Chunks allowed to wait between two stages
+
+    Returns:
+        PipelineStats with per-stage busy time
+
+    Raises:
+        Whatever a stage raised; the other stages are stopped first
+    """
+    loop = asyncio.get_running_loop()
+    prepared: asyncio.Queue = asyncio.Queue(maxsize=depth)
+    validated: asyncio.Queue = asyncio.Queue(maxsize=depth)
+    stop = threading.Event()
+    stats = PipelineStats()
+
+    def hand_over(item) -> None:
+        # Blocks the worker thread while the prepared queue is full
+        asyncio.run_coroutine_threadsafe(prepared.put(item), loop).result()
+
+    def produce() -> None:
+        try:
+            iterator = iter(items)
+            while not stop.is_set():
+                start = time.perf_counter()
+                item = next(iterator, _DONE)
+                if item is _DONE:
+                    break
+                item = prepare(item)
+                stats.prepare_seconds += time.perf_counter() - start
+                hand_over(item)
+        except BaseException as e:
+            hand_over(_Failure(e))
+        else:
+            hand_over(_DONE)
+
+    async def drain(executor: ThreadPoolExecutor) -> None:
+        while True:
+            item = await validated.get()
+            if item is _DONE:
+                return
+            start = time.perf_counter()
+            await loop.run_in_executor(executor, write, item)
+            stats.write_seconds += time.perf_counter() - start
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix='nwca-prepare') as producer_pool, \
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix='nwca-write') as writer_pool:
+        producer = loop.run_in_executor(producer_pool, produce)
+        writer = asyncio.ensure_future(drain(writer_pool))
+        try:
+            while True:
+                item = await prepared.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, _Failure):
+                    raise item.error
+
+                start = time.perf_counter()
+                result = await validate(item)
+                stats.validate_seconds += time.perf_counter() - start
+                stats.chunks += 1
+                await _put(validated, result, writer)
+
+            await _put(validated, _DONE, writer)
+            await writer
+            await producer
+        except BaseException:
+            # Stop the producer, unblocking it if it is waiting on a full queue
+            stop.set()
+            writer.cancel()
+            while not producer.done():
+                while not prepared.empty():
+                    prepared.get_nowait()
+                await asyncio.sleep(0.01)
+            raise
+
+    stats.elapsed = time.perf_counter() - started
+    return stats
@@ -0,0 +1,344 @@
+"""
+Top sellers ranked from ShopWorks order lines
+
+The top-sellers list used to be pasted into process-top-sellers.py by hand,
+with the same cap repeated once per order type and size suffix. Here it is
+derived from an order-line export instead (CSV, CSV.gz or Parquet, e.g. the
+ManageOrders line items joined with each order's OrderType):
+
+1. each chunk of lines gets the scripts' style cleaning (clean_styles), its
+   order type mapped to a decoration method, and fee / service parts
+   (DECG, SEG, Freight, ...) and lines without a style or order number
+   dropped
+2. each chunk is reduced to one row per (style, method, order), so memory
+   follows distinct orders rather than lines
+3. one groupby over those rows totals units, distinct orders and revenue per
+   (style, decoration method)
+4. heapq.nlargest picks the top K of each method; it never sorts the long
+   tail of styles that sold once
+
+Usage:
+    history = OrderHistory(ORDER_TYPE_MAP)
+    for chunk in read_order_lines(['orders-2025.csv.gz']):
+        history.add(chunk)
+    top = history.top(15, by='Units')
+
+Rank an export, or time a synthetic one:
+    python -m nwca_catalog.ranking orders.csv --top 15 --by revenue
+    python -m nwca_catalog.ranking --bench 2000000
+"""
+
+import heapq
+import os
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .cleaning import clean_styles
+from .ingest import DEFAULT_CHUNK_SIZE, expand_sources, iter_csv_chunks
+from .output import parquet_available
+
+DEFAULT_TOP = 15
+RANK_BY = ('Units', 'Orders', 'Revenue')
+
+# Order type -> decoration method for the command line (process-top-sellers.py passes its ORDER_TYPE_MAP)
+DEFAULT_METHODS = {'Screenprinting': 'screenprint', 'Custom Embroidery': 'embroidery', 'Cap Order': 'caps'}
+
+# Standard column -> headers accepted for it (ShopWorks names first)
+ORDER_LINE_COLUMNS = {
+    'Style': ('PartNumber', 'Part Number', 'Style'),
+    'Description': ('PartDescription', 'Part Description', 'Description'),
+    'Order Type': ('OrderType', 'Order Type'),
+    'Order': ('id_Order', 'ID_Order', 'Order'),
+    'Quantity': ('LineQuantity', 'Quantity', 'Qty'),
+    'Unit Price': ('LineUnitPrice', 'Unit Price', 'UnitPrice'),
+    'Line Total': ('LineTotal', 'Line Total', 'Line_Total'),
+}
+REQUIRED_COLUMNS = ['Style', 'Order Type', 'Order', 'Quantity']
+# Read as text; quantities and prices are left to the CSV parser's number parsing
+TEXT_COLUMNS = {alias: str for column in ('Style', 'Description', 'Order Type', 'Order')
+                for alias in ORDER_LINE_COLUMNS[column]}
+
+# Line items that are charges, not garments (compared upper-case)
+SERVICE_PARTS = frozenset(part.upper() for part in [
+    'SEG', 'DECG', 'DECC', 'Monogram', 'RUSH', 'Freight', 'DD', 'DDE', 'DDT', 'AL', 'DT', 'Pallet', 'Art',
+    'AS-Garm', 'CDP', 'AS-CAP', 'LTM', 'CTR-Garmt', 'CTR-Cap', 'AL-CAP', 'DECG-FB', '3D-EMB', 'GRT-50',
+    'GRT-75', 'SPRESET', 'SPSU', 'Vellum', 'Color Chg', 'Laser Patch', 'SECC', 'CB', 'CS', 'FB', 'WEIGHT',
+    'Name/Number', 'NAME', 'NAMES', 'SHIP', 'SHIPPING', 'DGT-001', 'DGT-002', 'DGT-003', 'DGT-004',
+])
+
+
+def standardize_columns(chunk: pd.DataFrame, name: str = '<input>') -> pd.DataFrame:
+    """
+    Rename export headers to the ORDER_LINE_COLUMNS names
+
+    Raises:
+        ValueError: A required column (or both unit price and line total) is missing
+    """
+    renames = {}
+    for column, aliases in ORDER_LINE_COLUMNS.items():
+        for alias in aliases:
+            if alias in chunk.columns:
+                renames[alias] = column
+                break
+    chunk = chunk.rename(columns=renames)
+    missing = [column for column in REQUIRED_COLUMNS if column not in chunk.columns]
+    if 'Unit Price' not in chunk.columns and 'Line Total' not in chunk.columns:
+        missing.append('Unit Price or Line Total')
+    if missing:
+        raise ValueError(f"{name}: missing column(s) {', '.join(missing)} "
+                         f"(e.g. {', '.join(ORDER_LINE_COLUMNS[c][0] for c in REQUIRED_COLUMNS)})")
+    return chunk
+
+
+def read_order_lines(sources: Iterable[str], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """
+    Yield order-line chunks with standard column names
+
+    CSV sources are read in chunks (see iter_csv_chunks), styles and order
+    numbers as text; a .parquet file is read whole, only the needed columns.
+
+    Raises:
+        FileNotFoundError: A path or pattern matched nothing
+        ImportError: A Parquet source without pyarrow installed
+        ValueError: A source lacks a required column
+    """
+    for source in expand_sources(sources):
+        if source.lower().endswith('.parquet'):
+            if not parquet_available():
+                raise ImportError(f"{source}: reading Parquet needs pyarrow (pip install pyarrow)")
+            import pyarrow.parquet as pq
+
+            present = set(pq.read_schema(source).names)
+            wanted = [alias for aliases in ORDER_LINE_COLUMNS.values() for alias in aliases if alias in present]
+            frame = pd.read_parquet(source, columns=wanted)
+            for start in range(0, len(frame), chunk_size):
+                yield standardize_columns(frame.iloc[start:start + chunk_size], source)
+        else:
+            for chunk in iter_csv_chunks([source], chunk_size, dtype=TEXT_COLUMNS):
+                yield standardize_columns(chunk, source)
+
+
+def to_number(values: pd.Series) -> pd.Series:
+    """Numeric column from text like "1,234", "$12.50" or "" (blank and junk become 0)"""
+    numbers = pd.to_numeric(values, errors='coerce')
+    if values.dtype.kind not in 'biuf':
+        # Only cells that did not parse as plain numbers go through the regex
+        retry = (numbers.isna() & values.notna()).to_numpy()
+        if retry.any():
+            cleaned = values[retry].astype(str).str.replace(r'[$,\s]', '', regex=True)
+            numbers = numbers.copy()
+            numbers[retry] = pd.to_numeric(cleaned, errors='coerce')
+    return numbers.fillna(0)
+
+
+class OrderHistory:
+    """Units, orders and revenue per (style, decoration method), built one chunk of order lines at a time"""
+
+    def __init__(self, methods: Dict[str, str]):
+        """
+        Args:
+            methods: Order type -> decoration method (types not listed are skipped)
+        """
+        self.methods = methods
+        self.lines = 0
+        self.skipped: Counter = Counter()
+        self._parts: List[pd.DataFrame] = []
+        self._totals: Optional[pd.DataFrame] = None
+
+    def add(self, chunk: pd.DataFrame) -> None:
+        """Clean one chunk of standardized order lines and keep its per-order totals"""
+        self.lines += len(chunk)
+        # An export repeats a few thousand part numbers and a handful of order
+        # types, so the string work runs once per distinct value
+        part_codes, parts = pd.factorize(chunk['Style'], use_na_sentinel=False)
+        cleaned = clean_styles(pd.Series(parts, dtype=object))['Style_Cleaned']
+        style_of_part, styles = pd.factorize(cleaned)
+        blank_part = cleaned.eq('').to_numpy()
+        service_part = cleaned.str.upper().isin(SERVICE_PARTS).to_numpy() & ~blank_part
+        type_codes, types = pd.factorize(chunk['Order Type'], use_na_sentinel=False)
+        method_of_type, methods = pd.factorize(
+            pd.Series(types, dtype=object).astype(str).str.strip().map(self.methods))
+        order_codes, orders = pd.factorize(chunk['Order'].to_numpy(), use_na_sentinel=False)
+        order_values = pd.Series(orders, dtype=object)
+        blank_order_value = (order_values.isna() | order_values.astype(str).str.strip().eq('')).to_numpy()
+
+        blank = blank_part[part_codes]
+        service = service_part[part_codes]
+        unmapped = ~blank & ~service & (method_of_type[type_codes] < 0)
+        # A line without an order number cannot be counted as a distinct order
+        blank_order = ~blank & ~service & ~unmapped & blank_order_value[order_codes]
+        self.skipped['blank style'] += int(blank.sum())
+        self.skipped['fee / service part'] += int(service.sum())
+        self.skipped['unmapped order type'] += int(unmapped.sum())
+        self.skipped['blank order'] += int(blank_order.sum())
+        keep = ~(blank | service | unmapped | blank_order)
+
+        units = to_number(chunk['Quantity']).to_numpy()
+        if 'Line Total' in chunk.columns:
+            revenue = to_number(chunk['Line Total']).to_numpy()
+        else:
+            revenue = units * to_number(chunk['Unit Price']).to_numpy()
+
+        lines = pd.DataFrame({
+            'style': style_of_part[part_codes[keep]],
+            'method': method_of_type[type_codes[keep]],
+            'order': order_codes[keep],
+            'row': np.flatnonzero(keep),
+            'type': type_codes[keep],
+            'Units': units[keep],
+            'Revenue': revenue[keep],
+        })
+        per_order = lines.groupby(['style', 'method', 'order'], sort=False, as_index=False).agg(
+            row=('row', 'first'), type=('type', 'first'), Units=('Units', 'sum'), Revenue=('Revenue', 'sum'))
+        descriptions = (chunk['Description'].to_numpy(dtype=object) if 'Description' in chunk.columns
+                        else np.full(len(chunk), '', dtype=object))
+        self._parts.append(pd.DataFrame({
+            'Style_Cleaned': np.asarray(styles, dtype=object)[per_order['style'].to_numpy()],
+            'Decoration_Method': np.asarray(methods, dtype=object)[per_order['method'].to_numpy()],
+            # Parquet order numbers are integers, CSV ones text; compare them as text
+            'Order': pd.Index(orders).astype(str).to_numpy(dtype=object)[per_order['order'].to_numpy()],
+            'Description': descriptions[per_order['row'].to_numpy()],
+            'Order Type': np.asarray(types, dtype=object)[per_order['type'].to_numpy()],
+            'Units': per_order['Units'].to_numpy(),
+            'Revenue': per_order['Revenue'].to_numpy(),
+        }))
+        self._totals = None
+
+    def totals(self) -> pd.DataFrame:
+        """
+        One row per (style, decoration method), sorted by method then style
+
+        An order split across chunks has one row per chunk here, so Orders
+        counts distinct order numbers rather than rows.
+        """
+        if self._totals is None:
+            columns = ['Style_Cleaned', 'Decoration_Method', 'Description', 'Order Type', 'Units', 'Orders', 'Revenue']
+            if not self._parts:
+                return pd.DataFrame(columns=columns)
+            orders = pd.concat(self._parts, ignore_index=True)
+            totals = orders.groupby(['Decoration_Method', 'Style_Cleaned'], sort=True, as_index=False).agg(
+                Description=('Description', 'first'),
+                **{'Order Type': ('Order Type', 'first')},
+                Units=('Units', 'sum'),
+                Orders=('Order', 'nunique'),
+                Revenue=('Revenue', 'sum'),
+            )
+            totals['Revenue'] = totals['Revenue'].round(2)
+            self._totals = totals[columns]
+        return self._totals
+
+    def top(self, k: int = DEFAULT_TOP, by: str = 'Units') -> pd.DataFrame:
+        """
+        The k best styles of each decoration method
+
+        Ties on `by` go to the style that is ahead on units, then orders,
+        then revenue, then alphabetically.
+
+        Args:
+            k: Styles per method
+            by: 'Units', 'Orders' or 'Revenue'
+
+        Returns:
+            Rank, Style, Description, Order Type, Decoration_Method, Units,
+            Orders, Revenue; the first three columns are process-top-sellers.py's
+            input columns
+        """
+        if by not in RANK_BY:
+            raise ValueError(f"Unknown ranking {by!r} (use one of {', '.join(RANK_BY)})")
+        totals = self.totals()
+        keys = [by] + [column for column in RANK_BY if column != by]
+        values = [totals[column].tolist() for column in keys]
+        picked, ranks = [], []
+        for positions in totals.groupby('Decoration_Method', sort=True).indices.values():
+            # nlargest keeps input order among equal keys, and totals is sorted by style
+            best = heapq.nlargest(k, positions.tolist(), key=lambda i: tuple(column[i] for column in values))
+            picked.extend(best)
+            ranks.extend(range(1, len(best) + 1))
+        top = totals.iloc[picked].rename(columns={'Style_Cleaned': 'Style'})
+        top.insert(0, 'Rank', ranks)
+        return top[['Rank', 'Style', 'Description', 'Order Type', 'Decoration_Method',
+                    'Units', 'Orders', 'Revenue']].reset_index(drop=True)
+
+    def summary(self) -> str:
+        skipped = ', '.join(f"{count:,} {reason}" for reason, count in self.skipped.items() if count)
+        return (f"{self.lines:,} order line(s) -> {len(self.totals()):,} style/method total(s)"
+                + (f" (skipped {skipped})" if skipped else ""))
+
+
+def rank_order_lines(sources: Iterable[str], methods: Dict[str, str],
+                     chunk_size: int = DEFAULT_CHUNK_SIZE) -> OrderHistory:
+    """Read every source into an OrderHistory (call .top(k, by) on the result)"""
+    history = OrderHistory(methods)
+    for chunk in read_order_lines(sources, chunk_size):
+        history.add(chunk)
+    return history
+
+
+def _synthetic_export(path: str, lines: int, seed: int = 0) -> None:
+    """ManageOrders-shaped order lines: a few hundred styles with a long tail, sizes, fees and other order types"""
+    rng = np.random.default_rng(seed)
+    styles = np.array([f"{p}{n}" for p in ('PC', 'DT', 'ST', 'C', 'NE', 'CT', 'EB') for n in range(100, 180)])
+    weights = 1 / np.arange(1, len(styles) + 1) ** 1.1          # Zipf-like: a few styles sell most
+    picks = rng.choice(len(styles), size=lines, p=weights / weights.sum())
+    sizes = np.array(['', '', '', '_2X', '_3X', '_OSFA', '_XS'])
+    part = styles[picks] + sizes[rng.integers(0, len(sizes), lines)]
+    fee = rng.random(lines) < 0.08
+    part[fee] = rng.choice(['DECG', 'SEG', 'Freight', 'AS-Garm', 'LTM'], size=int(fee.sum()))
+    order_types = np.array(['Screenprinting', 'Custom Embroidery', 'Cap Order', 'Transfers', 'Screenprinting'])
+    pd.DataFrame({
+        'id_Order': rng.integers(100_000, 100_000 + lines // 6, lines),
+        'OrderType': order_types[rng.integers(0, len(order_types), lines)],
+        'PartNumber': part,
+        'PartDescription': np.char.add('Item ', styles[picks]),
+        'LineQuantity': rng.integers(1, 72, lines),
+        'LineUnitPrice': rng.uniform(4, 60, lines).round(2),
+    }).to_csv(path, index=False)
+
+
+def _benchmark(lines: int, k: int, by: str) -> None:
+    import tempfile
+    import time
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'order_lines.csv')
+        _synthetic_export(path, lines)
+        size = os.path.getsize(path)
+        start = time.perf_counter()
+        history = rank_order_lines([path], DEFAULT_METHODS)
+        history.totals()
+        aggregated = time.perf_counter() - start
+        start = time.perf_counter()
+        top = history.top(k, by)
+        selected = time.perf_counter() - start
+    print(f"{history.summary()}")
+    print(f"  read + clean + aggregate: {aggregated:.2f}s ({size / 1e6:.0f} MB, {lines / aggregated:,.0f} lines/s)")
+    print(f"  top {k} per method by {by.lower()}: {selected * 1000:.1f}ms")
+    print(top.head(5).to_string(index=False))
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('sources', nargs='*', help="Order-line CSV / CSV.gz / Parquet files or globs")
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP, help=f"Styles per decoration method (default {DEFAULT_TOP})")
+    parser.add_argument('--by', type=str.title, choices=RANK_BY, default='Units', help="Ranking measure")
+    parser.add_argument('--out', help="Write the ranking to this CSV")
+    parser.add_argument('--bench', type=int, metavar='LINES', help="Rank a synthetic export of LINES lines instead")
+    args = parser.parse_args()
+
+    if args.bench:
+        _benchmark(args.bench, args.top, args.by)
+    elif not args.sources:
+        parser.error("give an order-line export or --bench LINES")
+    else:
+        history = rank_order_lines(args.sources, DEFAULT_METHODS)
+        top = history.top(args.top, args.by)
+        print(history.summary())
+        print(top.to_string(index=False))
+        if args.out:
+            top.to_csv(args.out, index=False)
+            print(f"Ranking: {args.out}")
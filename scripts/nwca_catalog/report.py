@@ -0,0 +1,222 @@
+"""
+Vectorized rendering of the per-product report sections
+
+The validation reports list every not-found product and every product
+needing a flag, one block of labelled lines each. Writing those with
+df.iterrows() builds a Series per row and makes one f.write() call per
+line. The new-products report also re-filtered the whole not-found frame
+once per vendor. Both get slow past a few thousand rows.
+
+Here each block is built for all rows at once by concatenating string
+columns. Optional lines become '' through a boolean mask. The finished
+blocks are written in chunks of joined text. Vendor sections come from one
+factorize/stable-sort pass instead of a filter per vendor. The output is
+byte-identical to the row loop.
+
+Benchmark against the iterrows loop:
+    python -m nwca_catalog.report --rows 200000
+"""
+
+from typing import IO, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+WRITE_CHUNK_ROWS = 10_000
+
+# (line prefix, column, mask of rows that get the line; None = every row)
+Field = Tuple[str, str, Optional[Union[pd.Series, np.ndarray]]]
+
+
+def text(values: pd.Series) -> np.ndarray:
+    """Column as an object array of str, formatted the way an f-string formats each value"""
+    # Series.astype(str) keeps missing values as NaN; an f-string prints 'nan' / 'None'
+    return values.to_numpy(dtype=object).astype(str).astype(object)
+
+
+def truthy(values: pd.Series) -> np.ndarray:
+    """Rows whose value would pass an `if value:` test"""
+    return np.fromiter(map(bool, values.to_numpy(dtype=object)), dtype=bool, count=len(values))
+
+
+def did_you_mean(suggestions: pd.DataFrame) -> Dict[str, str]:
+    """
+    "STYLE (0.93), STYLE2 (0.88)" candidate lists by not-found style
+
+    Args:
+        suggestions: suggest_alternatives() output (Style_Cleaned, Suggested_Style, Score)
+    """
+    if suggestions.empty:
+        return {}
+    candidates = (text(suggestions['Suggested_Style']) + ' ('
+                  + suggestions['Score'].map('{:.2f}'.format).to_numpy(dtype=object) + ')')
+    grouped: Dict[str, List[str]] = {}
+    for style, candidate in zip(suggestions['Style_Cleaned'].tolist(), candidates.tolist()):
+        grouped.setdefault(style, []).append(candidate)
+    return {style: ', '.join(group) for style, group in grouped.items()}
+
+
+def render_blocks(df: pd.DataFrame, fields: Sequence[Field], lead: str = '', trail: str = '') -> List[str]:
+    """
+    One text block per row, built column-wise
+
+    Each field contributes f"{prefix}{row[column]}\\n" to the rows where its
+    mask is True (all rows when the mask is None).
+
+    Args:
+        df: Rows to render, in report order
+        fields: (prefix, column, mask) per line of the block
+        lead: Text before each block (e.g. a blank line)
+        trail: Text after each block
+
+    Returns:
+        List of blocks, one per row of df
+    """
+    if df.empty:
+        return []
+    blocks = np.full(len(df), lead, dtype=object)
+    for prefix, column, mask in fields:
+        line = prefix + text(df[column]) + '\n'
+        if mask is not None:
+            line = np.where(np.asarray(mask, dtype=bool), line, '')
+        blocks = blocks + line
+    if trail:
+        blocks = blocks + trail
+    return blocks.tolist()
+
+
+def write_blocks(f: IO[str], blocks: Sequence[str], chunk_rows: int = WRITE_CHUNK_ROWS) -> None:
+    """Write rendered blocks as a few large joined writes"""
+    for start in range(0, len(blocks), chunk_rows):
+        f.write(''.join(blocks[start:start + chunk_rows]))
+
+
+def write_grouped(f: IO[str], keys: pd.Series, blocks: Sequence[str],
+                  header: str, chunk_rows: int = WRITE_CHUNK_ROWS) -> None:
+    """
+    Write blocks grouped by key, groups in order of first appearance
+
+    Rows keep their original order within a group, so this matches
+    `for key in keys.unique(): rows = df[keys == key]` without the
+    per-key filter.
+
+    Args:
+        keys: Group key per block (e.g. the Vendor_Detected column)
+        blocks: render_blocks() output for the same rows
+        header: Format string for each group's heading, with {key} and {count}
+    """
+    codes, uniques = pd.factorize(keys, use_na_sentinel=False)
+    order = np.argsort(codes, kind='stable')
+    bounds = np.cumsum(np.bincount(codes, minlength=len(uniques)))
+    start = 0
+    for key, end in zip(uniques, bounds.tolist()):
+        f.write(header.format(key=key, count=end - start))
+        write_blocks(f, [blocks[i] for i in order[start:end]], chunk_rows)
+        start = end
+
+
+def _sample_frame(rows: int) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Synthetic not-found rows and suggestions shaped like the new-products report"""
+    import random
+
+    random.seed(0)
+    vendors = ['Sanmar', 'Port Authority', 'District', 'Richardson', 'Unknown', 'OGIO']
+    styles = [f"ST{random.randrange(rows)}" for _ in range(rows)]
+    df = pd.DataFrame({
+        'Style_Cleaned': styles,
+        'Style_Original': [s if i % 4 else s.lower() + ' ' for i, s in enumerate(styles)],
+        'Description': [f"Item {i} Tee" if i % 50 else None for i in range(rows)],
+        'Category': [['Tees', 'Caps', 'Bags'][i % 3] for i in range(rows)],
+        'Vendor_Detected': [vendors[i % 7 % len(vendors)] for i in range(rows)],
+        'API_Title': [f"Title {s}" for s in styles],
+    })
+    df['API_Error'] = pd.Series(['' if i % 9 else 'Timeout' for i in range(rows)], dtype='string')
+    suggested = df['Style_Cleaned'].drop_duplicates().iloc[::5]
+    suggestions = pd.DataFrame({
+        'Style_Cleaned': suggested.repeat(2).to_numpy(),
+        'Suggested_Style': [f"{s}X" for s in suggested.repeat(2)],
+        'Score': [0.9 - (i % 2) * 0.05 for i in range(len(suggested) * 2)],
+    })
+    return df, suggestions
+
+
+def _render_iterrows(f: IO[str], need_flag: pd.DataFrame, not_found: pd.DataFrame,
+                     suggestions: pd.DataFrame) -> None:
+    """The original row-by-row report sections, kept for comparison"""
+    for _, row in need_flag.iterrows():
+        f.write(f"Style: {row['Style_Cleaned']}\n")
+        f.write(f"  Description: {row['Description']}\n")
+        f.write(f"  Category: {row['Category']}\n")
+        f.write(f"  Vendor: {row['Vendor_Detected']}\n")
+        f.write(f"  API Title: {row['API_Title']}\n")
+        f.write("\n")
+    candidates = {
+        style: ', '.join(f"{c} ({score:.2f})" for c, score in zip(group['Suggested_Style'], group['Score']))
+        for style, group in suggestions.groupby('Style_Cleaned', sort=False)
+    }
+    for vendor in not_found['Vendor_Detected'].unique():
+        vendor_products = not_found[not_found['Vendor_Detected'] == vendor]
+        f.write(f"\n{vendor} ({len(vendor_products)} products):\n")
+        f.write("-" * 70 + "\n")
+        for _, row in vendor_products.iterrows():
+            f.write(f"\nStyle: {row['Style_Cleaned']}\n")
+            if row['Style_Original'] != row['Style_Cleaned']:
+                f.write(f"  Original: {row['Style_Original']}\n")
+            f.write(f"  Description: {row['Description']}\n")
+            f.write(f"  Category: {row['Category']}\n")
+            if row['API_Error']:
+                f.write(f"  Error: {row['API_Error']}\n")
+            if candidates.get(row['Style_Cleaned']):
+                f.write(f"  Did You Mean: {candidates[row['Style_Cleaned']]}\n")
+
+
+def _render_vectorized(f: IO[str], need_flag: pd.DataFrame, not_found: pd.DataFrame,
+                       suggestions: pd.DataFrame) -> None:
+    write_blocks(f, render_blocks(need_flag, [
+        ("Style: ", 'Style_Cleaned', None),
+        ("  Description: ", 'Description', None),
+        ("  Category: ", 'Category', None),
+        ("  Vendor: ", 'Vendor_Detected', None),
+        ("  API Title: ", 'API_Title', None),
+    ], trail="\n"))
+    candidates = did_you_mean(suggestions)
+    frame = not_found.assign(Did_You_Mean=not_found['Style_Cleaned'].map(candidates).fillna(''))
+    blocks = render_blocks(frame, [
+        ("Style: ", 'Style_Cleaned', None),
+        ("  Original: ", 'Style_Original', frame['Style_Original'] != frame['Style_Cleaned']),
+        ("  Description: ", 'Description', None),
+        ("  Category: ", 'Category', None),
+        ("  Error: ", 'API_Error', truthy(frame['API_Error'])),
+        ("  Did You Mean: ", 'Did_You_Mean', truthy(frame['Did_You_Mean'])),
+    ], lead="\n")
+    write_grouped(f, frame['Vendor_Detected'], blocks, "\n{key} ({count} products):\n" + "-" * 70 + "\n")
+
+
+def _benchmark(rows: int) -> None:
+    import io
+    import time
+
+    df, suggestions = _sample_frame(rows)
+    timings = {}
+    outputs = {}
+    for name, render in (('iterrows', _render_iterrows), ('vectorized', _render_vectorized)):
+        buffer = io.StringIO()
+        start = time.perf_counter()
+        render(buffer, df, df, suggestions)
+        timings[name] = time.perf_counter() - start
+        outputs[name] = buffer.getvalue()
+
+    assert outputs['iterrows'] == outputs['vectorized'], "report text differs"
+    print(f"{rows:,} need-flag + {rows:,} not-found rows ({len(outputs['vectorized']) / 1e6:.1f} MB of report text)")
+    print(f"  iterrows:   {timings['iterrows']:.3f}s")
+    print(f"  vectorized: {timings['vectorized']:.3f}s")
+    print(f"  speedup:    {timings['iterrows'] / timings['vectorized']:.1f}x  (output identical)")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200_000)
+    args = parser.parse_args()
+    _benchmark(args.rows)
@@ -0,0 +1,279 @@
+"""
+Compact validation results and their columnar handoff to pandas
+
+Each style's result is a StyleResult: a NamedTuple, so a cached result
+costs one tuple instead of a per-key hash table. The repeated strings
+(status, brand, category, error) are interned, so a million results share
+a few hundred string objects.
+
+Instead of one df['Style_Cleaned'].map(lambda ...) pass per API_* column
+(a Python lookup per row, per column), results are transposed into
+ResultColumns (one list per field) and turned into a single typed frame
+keyed by style, which is joined onto the product frame once.
+
+Benchmark against the per-column map approach, and the cache's memory
+against plain dicts:
+    python -m nwca_catalog.results --rows 500000
+    python -m nwca_catalog.results --memory 1000000
+"""
+
+import sys
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+import pandas as pd
+
+# (result field, output column, dtype, fill value for styles with no result)
+RESULT_COLUMNS: List[Tuple[str, str, str, object]] = [
+    ('exists', 'API_Exists', 'bool', False),
+    ('api_is_new', 'API_IsNew', 'bool', False),
+    ('api_best_seller', 'API_BestSeller', 'bool', False),
+    ('title', 'API_Title', 'string', ''),
+    ('brand', 'API_Brand', 'category', ''),
+    ('category', 'API_Category', 'category', ''),
+    ('status', 'API_Status', 'category', ''),
+    ('error', 'API_Error', 'string', ''),
+    ('retries', 'API_Retries', 'int64', 0),
+]
+
+
+# Fields with few distinct values, shared through sys.intern
+INTERNED_FIELDS = ('brand', 'category', 'status', 'error')
+
+
+class StyleResult(NamedTuple):
+    """One style's validation result (api_is_new is None when the endpoint did not settle it)"""
+    exists: bool = False
+    api_is_new: Optional[bool] = False
+    api_best_seller: bool = False
+    title: str = ''
+    brand: str = ''
+    category: str = ''
+    status: str = 'Not Found'
+    error: Optional[str] = None
+    retries: int = 0
+
+    @classmethod
+    def make(cls, **fields) -> 'StyleResult':
+        """Build a result with the repeated strings interned"""
+        for name in INTERNED_FIELDS:
+            value = fields.get(name)
+            if isinstance(value, str):
+                fields[name] = sys.intern(value)
+        return cls(**fields)
+
+    @classmethod
+    def from_dict(cls, record: Mapping) -> 'StyleResult':
+        """Result from a journal / cache record (unknown keys are ignored)"""
+        return cls.make(**{name: record[name] for name in cls._fields if name in record})
+
+    def to_dict(self) -> Dict:
+        return self._asdict()
+
+
+# Result fields, in RESULT_COLUMNS order
+RESULT_FIELDS: List[str] = list(StyleResult._fields)
+
+
+class ResultColumns:
+    """A batch of results stored column-wise (one list per field), ready for one DataFrame build"""
+
+    def __init__(self):
+        self.styles: List[str] = []
+        self.columns: Dict[str, list] = {name: [] for name in RESULT_FIELDS}
+
+    @classmethod
+    def from_results(cls, validation_results: Mapping[str, StyleResult]) -> 'ResultColumns':
+        batch = cls()
+        batch.styles = list(validation_results)
+        if batch.styles:
+            # Transposing the tuples is one C-level pass per field
+            for name, values in zip(RESULT_FIELDS, zip(*validation_results.values())):
+                batch.columns[name] = list(values)
+        return batch
+
+    def append(self, style: str, result: StyleResult) -> None:
+        self.styles.append(style)
+        for values, value in zip(self.columns.values(), result):
+            values.append(value)
+
+    def __len__(self) -> int:
+        return len(self.styles)
+
+    def to_frame(self, fields: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """Typed API_* frame indexed by style (see results_frame)"""
+        wanted = set(fields) if fields is not None else None
+        index = pd.Index(self.styles, name='Style_Cleaned', dtype=object)
+        frame = pd.DataFrame(index=index)
+        for field, column, dtype, fill in RESULT_COLUMNS:
+            if wanted is None or field in wanted:
+                frame[column] = _coerce(pd.Series(self.columns[field], index=index, dtype=object), dtype, fill)
+        return frame
+
+
+def _coerce(values: pd.Series, dtype: str, fill) -> pd.Series:
+    """Fill missing values and cast to the column dtype"""
+    values = values.where(values.notna(), fill)
+    if dtype == 'bool':
+        if values.dtype != object:
+            return values.astype(bool)
+        # Caspio sometimes sends the flags as "true"/"false" strings
+        return values.map(lambda v: v is True or str(v).lower() == 'true').astype(bool)
+    return values.astype(dtype)
+
+
+def results_frame(validation_results: Mapping[str, StyleResult],
+                  fields: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """
+    Build one typed DataFrame from validator output, indexed by style
+
+    Args:
+        validation_results: Mapping of cleaned style -> StyleResult
+        fields: Result fields to keep (default: every field in RESULT_COLUMNS)
+
+    Returns:
+        DataFrame with API_* columns (bool flags, categorical brand/category/
+        status, string title/error, integer retry count) and the style as index
+    """
+    return ResultColumns.from_results(validation_results).to_frame(fields)
+
+
+def join_results(df: pd.DataFrame, frame: pd.DataFrame, key: str = 'Style_Cleaned') -> pd.DataFrame:
+    """
+    Attach a results_frame to the product frame in one vectorized join
+
+    Rows whose style has no result get each column's fill value, and the
+    product frame's index and row order are preserved.
+    """
+    joined = df.join(frame, on=key)
+    for field, column, dtype, fill in RESULT_COLUMNS:
+        if column in frame.columns and joined[column].isna().any():
+            joined[column] = _coerce(joined[column].astype(object), dtype, fill)
+    return joined
+
+
+def results_from_frame(df: pd.DataFrame, key: str = 'Style_Cleaned') -> Dict[str, StyleResult]:
+    """
+    Rebuild validator results from a saved output CSV (the inverse of join_results)
+
+    Args:
+        df: Output rows read back with dtype=str, keep_default_na=False
+        key: Style column
+
+    Returns:
+        Mapping of style -> StyleResult from the API_* columns present
+        (first row per style); an empty error becomes None as in the validators
+    """
+    first = df.drop_duplicates(subset=key).set_index(key)
+    fields, columns = [], []
+    for field, column, dtype, fill in RESULT_COLUMNS:
+        if column not in first.columns:
+            continue
+        values = first[column].astype(object)
+        if dtype == 'bool':
+            values = values.astype(str).str.lower() == 'true'
+        elif dtype == 'int64':
+            values = pd.to_numeric(values, errors='coerce').fillna(fill).astype('int64')
+        elif field == 'error':
+            values = values.where(values != '', None)
+        fields.append(field)
+        columns.append(values.tolist())
+    return {style: StyleResult.make(**dict(zip(fields, row))) for style, row in zip(first.index, zip(*columns))}
+
+
+def _sample_results(styles: int) -> Dict[str, StyleResult]:
+    """Synthetic results with catalog-like repetition in brand/category/status"""
+    statuses = ['Active', 'Discontinued', 'Not Found', 'Error']
+    return {
+        f"ST{i}": StyleResult.make(
+            exists=i % 7 != 0, api_is_new=i % 3 == 0, api_best_seller=i % 5 == 0,
+            title=f"Title {i}", brand=f"Brand {i % 40}", category=f"Category {i % 12}",
+            status=statuses[i % 4], error=None if i % 9 else f"HTTP {500 + i % 4}"
+        )
+        for i in range(styles)
+    }
+
+
+def _benchmark(rows: int, styles: int) -> None:
+    """Compare eight .map(lambda) passes with the single join"""
+    import random
+    import time
+
+    random.seed(0)
+    validation_results = _sample_results(styles)
+    df = pd.DataFrame({'Style_Cleaned': [f"ST{random.randrange(styles)}" for _ in range(rows)]})
+    missing = StyleResult()
+
+    start = time.perf_counter()
+    mapped = df.copy()
+    for field, column, _, fill in RESULT_COLUMNS:
+        mapped[column] = mapped['Style_Cleaned'].map(
+            lambda s, f=field, d=fill: getattr(validation_results.get(s, missing), f) or d
+        )
+    map_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    joined = join_results(df, results_frame(validation_results))
+    join_time = time.perf_counter() - start
+
+    assert (mapped['API_Exists'].astype(bool) == joined['API_Exists']).all()
+    assert (mapped['API_Title'] == joined['API_Title'].astype(object)).all()
+
+    print(f"{rows:,} rows / {styles:,} styles")
+    print(f"  per-column map: {map_time:.3f}s  ({mapped.memory_usage(deep=True).sum() / 1e6:.1f} MB)")
+    print(f"  single join:    {join_time:.3f}s  ({joined.memory_usage(deep=True).sum() / 1e6:.1f} MB)")
+    print(f"  speedup:        {map_time / join_time:.1f}x")
+
+
+def _memory_benchmark(styles: int) -> None:
+    """Peak traced memory of a results cache held as dicts, StyleResults and columns"""
+    import gc
+    import json
+    import tracemalloc
+
+    def measure(build):
+        gc.collect()
+        tracemalloc.start()
+        held = build()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del held
+        return size
+
+    # Records as decoded from API responses / the journal
+    lines = [json.dumps(result._asdict()) for result in _sample_results(styles).values()]
+    keys = [f"ST{i}" for i in range(styles)]
+    gc.collect()
+
+    # Literal keys are shared between dicts; the values are fresh per response
+    as_dicts = measure(lambda: {key: dict(zip(RESULT_FIELDS, json.loads(line).values()))
+                                for key, line in zip(keys, lines)})
+    as_records = measure(lambda: {key: StyleResult.from_dict(json.loads(line))
+                                  for key, line in zip(keys, lines)})
+
+    def columns():
+        batch = ResultColumns()
+        for key, line in zip(keys, lines):
+            batch.append(key, StyleResult.from_dict(json.loads(line)))
+        return batch
+
+    as_columns = measure(columns)
+
+    print(f"Results cache for {styles:,} styles (style keys excluded)")
+    print(f"  dict per style:        {as_dicts / 1e6:8.1f} MB")
+    print(f"  StyleResult, interned: {as_records / 1e6:8.1f} MB  ({as_dicts / as_records:.1f}x smaller)")
+    print(f"  ResultColumns:         {as_columns / 1e6:8.1f} MB  ({as_dicts / as_columns:.1f}x smaller)")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=500_000)
+    parser.add_argument('--styles', type=int, default=50_000)
+    parser.add_argument('--memory', type=int, metavar='STYLES',
+                        help="Measure cache memory for this many styles instead of the join benchmark")
+    args = parser.parse_args()
+    if args.memory:
+        _memory_benchmark(args.memory)
+    else:
+        _benchmark(args.rows, args.styles)
@@ -0,0 +1,176 @@
+"""
+Shared retry policy for the API validators
+
+One iterative loop instead of per-script recursion:
+
+- classification: 408/429/5xx responses, timeouts, connection resets and
+  truncated bodies are retried; other 4xx and malformed JSON are not
+- backoff: capped exponential with full jitter, sleep = U(0, min(cap, base * 2^n)),
+  so retrying clients spread out instead of hitting the proxy in lockstep
+- Retry-After: a 429/503 that says when to come back is honored (capped)
+- budget: retries are limited per run to a share of the requests sent, so
+  an outage turns into fast failures instead of hours of backoff
+
+Usage:
+    policy = RetryPolicy()
+    try:
+        result, retries = await policy.run(lambda: fetch(style))
+    except RetryError as e:
+        ...  # e.error is the last failure, e.retries the retries spent
+"""
+
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Optional, Tuple, TypeVar
+
+import aiohttp
+
+RETRYABLE_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+
+DEFAULT_MAX_RETRIES = 3
+BASE_DELAY = 0.5           # seconds
+MAX_DELAY = 20.0
+MAX_RETRY_AFTER = 60.0
+BUDGET_RATIO = 0.1         # retries allowed per request sent...
+BUDGET_MINIMUM = 20        # ...on top of this many
+
+T = TypeVar('T')
+
+
+class RetryableStatus(Exception):
+    """Raised by an attempt for an HTTP response worth retrying"""
+
+    def __init__(self, status: int, retry_after: Optional[float] = None):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+class RetryError(Exception):
+    """The last failure of an attempt that will not be retried again"""
+
+    def __init__(self, error: BaseException, retries: int, reason: str):
+        super().__init__(f"{error} ({reason})")
+        self.error = error
+        self.retries = retries
+        self.reason = reason      # 'not retryable', 'attempts exhausted', 'budget exhausted'
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def check_response(response: aiohttp.ClientResponse) -> None:
+    """Raise RetryableStatus (with any Retry-After) for a retryable status"""
+    if response.status in RETRYABLE_STATUSES:
+        raise RetryableStatus(response.status, parse_retry_after(response.headers.get('Retry-After')))
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Transient failures: retryable statuses, timeouts, dropped connections, cut-off bodies"""
+    return isinstance(error, (RetryableStatus, asyncio.TimeoutError,
+                              aiohttp.ClientConnectionError, aiohttp.ClientPayloadError))
+
+
+def describe(error: BaseException) -> str:
+    """Short label for console output"""
+    if isinstance(error, RetryableStatus):
+        return f"HTTP {error.status}"
+    if isinstance(error, asyncio.TimeoutError):
+        return "timeout"
+    return type(error).__name__
+
+
+class RetryBudget:
+    """Per-run cap on retries: minimum + ratio x requests sent so far"""
+
+    def __init__(self, ratio: float = BUDGET_RATIO, minimum: int = BUDGET_MINIMUM):
+        self.ratio = ratio
+        self.minimum = minimum
+        self.requests = 0
+        self.retries = 0
+        self.denied = 0
+
+    @property
+    def allowance(self) -> int:
+        return self.minimum + int(self.ratio * self.requests)
+
+    def spend(self) -> bool:
+        """Take one retry from the budget; False once it is used up"""
+        if self.retries >= self.allowance:
+            self.denied += 1
+            return False
+        self.retries += 1
+        return True
+
+    def summary(self) -> str:
+        text = f"{self.retries} retr{'y' if self.retries == 1 else 'ies'} for {self.requests} request(s)"
+        if self.denied:
+            text += f", {self.denied} refused by the retry budget"
+        return text
+
+
+class RetryPolicy:
+    """Capped exponential backoff with full jitter and a shared budget"""
+
+    def __init__(self, max_retries: int = DEFAULT_MAX_RETRIES, base_delay: float = BASE_DELAY,
+                 max_delay: float = MAX_DELAY, max_retry_after: float = MAX_RETRY_AFTER,
+                 budget: Optional[RetryBudget] = None, rng: Optional[random.Random] = None):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self.budget = budget or RetryBudget()
+        self.rng = rng or random.Random()
+
+    def delay(self, retry: int, retry_after: Optional[float] = None) -> float:
+        """Sleep before the given retry (0-based); Retry-After wins when longer"""
+        jittered = self.rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** retry))
+        if retry_after is not None:
+            return max(min(retry_after, self.max_retry_after), jittered)
+        return jittered
+
+    async def run(self, attempt: Callable[[], Awaitable[T]],
+                  on_retry: Optional[Callable[[BaseException, int, float], None]] = None) -> Tuple[T, int]:
+        """
+        Call attempt() until it succeeds or fails for good
+
+        Args:
+            attempt: Coroutine factory making one request
+            on_retry: Called with (error, retry number, delay) before each sleep
+
+        Returns:
+            (attempt's result, retries used)
+
+        Raises:
+            RetryError: wrapping the last failure, when it is not retryable or
+                the attempts or the run's budget are used up
+        """
+        retries = 0
+        while True:
+            self.budget.requests += 1
+            try:
+                return await attempt(), retries
+            except Exception as e:
+                if not is_retryable(e):
+                    raise RetryError(e, retries, 'not retryable') from e
+                if retries >= self.max_retries:
+                    raise RetryError(e, retries, 'attempts exhausted') from e
+                if not self.budget.spend():
+                    raise RetryError(e, retries, 'budget exhausted') from e
+                wait = self.delay(retries, getattr(e, 'retry_after', None))
+                retries += 1
+                if on_retry:
+                    on_retry(e, retries, wait)
+                await asyncio.sleep(wait)
@@ -0,0 +1,239 @@
+"""
+Deterministic sharding of a validation run across processes or hosts
+
+One event loop in one process only goes so fast, even when the proxy
+allows a larger total request budget. With --shard i/N a script validates
+only the cleaned styles whose hash falls in shard i. The hash is pandas'
+SipHash with a fixed key, so every process and host agrees on it (Python's
+hash() is salted per process). The shards also split the request budget
+(rate limit and concurrency cap) so that their parts add up to exactly
+one run's budget; a budget smaller than N is rejected.
+
+Each shard writes its usual outputs in its own working directory. Its
+journal holds every style's result, whether the API, the shared cache or
+a --delta baseline answered it. The script's --merge DIR... then re-runs
+the pipeline over the full input. It answers every style from the shard
+journals (no API calls, no shared cache) and adds up the shard metrics,
+so the CSVs and report look like those of a single run.
+
+The launcher runs N shards as local subprocesses under shards/<i>-of-<N>/
+and merges them:
+    python -m nwca_catalog.shard process-top-sellers.py --shards 4 -- --input export.csv
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from .journal import replay_journal
+from .metrics import ValidatorMetrics
+
+SHARD_ROOT = 'shards'
+
+# Script options whose values are paths relative to where the launcher was started
+PATH_OPTIONS = ('--input', '-i', '--orders', '--delta')
+# Path options that may be given bare, taking the script's default path (its argparse const)
+BARE_PATH_OPTIONS = ('--delta',)
+
+
+class Shard(NamedTuple):
+    """Shard index (1-based) out of count"""
+    index: int
+    count: int
+
+    @classmethod
+    def parse(cls, text: str) -> 'Shard':
+        """argparse type for "i/N" (1 <= i <= N)"""
+        try:
+            index, count = (int(part) for part in text.split('/'))
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"expected i/N, got {text!r}")
+        if not 1 <= index <= count:
+            raise argparse.ArgumentTypeError(f"shard {index} is not between 1 and {count}")
+        return cls(index, count)
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+    @property
+    def label(self) -> str:
+        """Directory-safe name, e.g. 2-of-4"""
+        return f"{self.index}-of-{self.count}"
+
+    def mask(self, styles: pd.Series) -> np.ndarray:
+        """Rows whose style belongs to this shard"""
+        return shard_numbers(styles, self.count) == self.index - 1
+
+    def select(self, df: pd.DataFrame, column: str = 'Style_Cleaned') -> pd.DataFrame:
+        return df[self.mask(df[column])]
+
+    def share(self, budget: int) -> int:
+        """
+        This shard's part of a request budget
+
+        The remainder goes to the first shards, so the count parts add up to
+        budget exactly (e.g. 10 over 4 shards: 3, 3, 2, 2).
+
+        Raises:
+            ValueError: The budget is smaller than the number of shards
+        """
+        if budget < self.count:
+            raise ValueError(f"a budget of {budget} cannot be split over {self.count} shards")
+        return budget // self.count + (1 if self.index <= budget % self.count else 0)
+
+
+def shard_numbers(styles: pd.Series, count: int) -> np.ndarray:
+    """0-based shard of each style, stable across processes, hosts and runs"""
+    hashes = pd.util.hash_pandas_object(styles.astype(object), index=False, categorize=False)
+    return (hashes.to_numpy() % np.uint64(count)).astype(np.int64)
+
+
+def load_shard_results(dirs: Iterable[str], journal_name: str) -> Dict[str, Dict]:
+    """
+    Combine the shard journals into one results cache
+
+    Every recorded result is kept, transient ones included, so the merge
+    reports what the shards saw instead of calling the API again.
+
+    Raises:
+        FileNotFoundError: A directory has no journal
+    """
+    results: Dict[str, Dict] = {}
+    for directory in dirs:
+        path = os.path.join(directory, journal_name)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No shard journal at {path}")
+        cache, _ = replay_journal(path, retry_statuses=frozenset())
+        results.update(cache)
+    return results
+
+
+def merge_shard_metrics(dirs: Iterable[str], metrics_name: str) -> Optional[ValidatorMetrics]:
+    """Sum the shards' metrics files (None when no shard wrote one)"""
+    merged: Optional[ValidatorMetrics] = None
+    for directory in dirs:
+        path = os.path.join(directory, metrics_name)
+        if not os.path.exists(path):
+            continue
+        with open(path, encoding='utf-8') as f:
+            metrics = ValidatorMetrics.from_dict(json.load(f))
+        if merged is None:
+            merged = metrics
+        else:
+            merged.merge(metrics)
+    return merged
+
+
+def bare_defaults(script: str) -> Dict[str, str]:
+    """The path each of BARE_PATH_OPTIONS takes when given without one, from the script's own parser"""
+    import importlib.util
+
+    spec = importlib.util.spec_from_file_location(os.path.splitext(os.path.basename(script))[0], script)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    if not hasattr(module, 'parse_args'):
+        return {}
+    defaults = {}
+    for option in BARE_PATH_OPTIONS:
+        value = getattr(module.parse_args([option]), option.lstrip('-').replace('-', '_'), None)
+        if value:
+            defaults[option] = value
+    return defaults
+
+
+def absolute_paths(args: List[str], bare: Optional[Dict[str, str]] = None) -> List[str]:
+    """
+    Make the values of PATH_OPTIONS absolute so the shards can run in their own directories
+
+    Args:
+        args: Script options
+        bare: Default path of an option given without a value (see bare_defaults); a
+            bare --delta would otherwise name each shard's own previous output
+    """
+    bare = bare or {}
+    resolved = []
+    expect_path = False
+    for position, arg in enumerate(args):
+        following = args[position + 1] if position + 1 < len(args) else None
+        if expect_path and not arg.startswith('-'):
+            arg = os.path.abspath(arg)
+        elif '=' in arg and arg.split('=', 1)[0] in PATH_OPTIONS:
+            option, value = arg.split('=', 1)
+            arg = f"{option}={os.path.abspath(value)}"
+        elif arg in bare and (following is None or following.startswith('-')):
+            arg = f"{arg}={os.path.abspath(bare[arg])}"
+        expect_path = arg in PATH_OPTIONS
+        resolved.append(arg)
+    return resolved
+
+
+def launch(script: str, count: int, args: List[str], root: str = SHARD_ROOT) -> int:
+    """
+    Run count shards of script in parallel, then merge their outputs into the current directory
+
+    Args:
+        script: process-top-sellers.py or process-new-products.py
+        count: Number of shards
+        args: Options passed to every shard and to the merge
+        root: Parent directory of the per-shard working directories
+
+    Returns:
+        Exit code: the merge's, or 1 if a shard failed
+    """
+    script = os.path.abspath(script)
+    args = absolute_paths(args, bare_defaults(script))
+    shards = [Shard(index, count) for index in range(1, count + 1)]
+    dirs = [os.path.join(root, shard.label) for shard in shards]
+
+    started = time.monotonic()
+    running = []
+    for shard, directory in zip(shards, dirs):
+        os.makedirs(directory, exist_ok=True)
+        log = open(os.path.join(directory, 'shard.log'), 'w', encoding='utf-8')
+        command = [sys.executable, script, '--shard', str(shard)] + args
+        running.append((shard, log, subprocess.Popen(command, cwd=directory, stdout=log, stderr=subprocess.STDOUT)))
+        print(f"[INFO] Shard {shard} started in {directory}")
+
+    failed = []
+    try:
+        for shard, log, process in running:
+            code = process.wait()
+            log.close()
+            print(f"[{'OK' if code == 0 else 'ERROR'}] Shard {shard} exited with {code} "
+                  f"after {time.monotonic() - started:.1f}s")
+            if code != 0:
+                failed.append(shard)
+    except KeyboardInterrupt:
+        # The shards got the same SIGINT and flush their journals; wait for them
+        for _, _, process in running:
+            process.wait()
+        print("[WARN] Interrupted - re-run the failed shards with --resume", file=sys.stderr)
+        return 130
+
+    if failed:
+        print(f"[ERROR] {len(failed)} shard(s) failed, see shard.log under {root}/ - not merging",
+              file=sys.stderr)
+        return 1
+
+    print(f"[INFO] Merging {count} shard(s)...")
+    return subprocess.call([sys.executable, script] + args + ['--merge'] + dirs)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('script', help="Validation script to shard")
+    parser.add_argument('--shards', type=int, default=os.cpu_count() or 2, help="Number of shards (default: CPUs)")
+    parser.add_argument('--root', default=SHARD_ROOT, help=f"Shard working directories (default {SHARD_ROOT}/)")
+    parser.add_argument('script_args', nargs='*', metavar='-- SCRIPT_ARGS', help="Options for the script")
+    # Split at -- by hand: a REMAINDER positional would also swallow launcher options given after the script
+    argv = sys.argv[1:]
+    split = argv.index('--') if '--' in argv else len(argv)
+    args = parser.parse_args(argv[:split])
+    sys.exit(launch(args.script, args.shards, args.script_args + argv[split + 1:], args.root))
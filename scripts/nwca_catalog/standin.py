@@ -0,0 +1,544 @@
+"""
+Local stand-in for the Caspio pricing proxy, for benchmarking the clients
+
+Tuning the validators against the live Heroku proxy is slow and noisy. The
+numbers depend on the proxy's load that day, and a 429 or a 5xx burst cannot
+be produced on demand. StandIn is an aiohttp server on 127.0.0.1. It answers
+the three endpoints the Python tools call from fixture data:
+
+- /api/products/search?q=STYLE&limit=N   {"products": [...]}
+- /api/product-details?styleNumber=STYLE one row per color and size ([] = not found)
+- /api/policies-public/tree and /api/policies-public/<Policy_ID>
+
+Faults are injected in front of every endpoint, in this order: 5xx bursts
+(every request in the burst window gets a 503), timeouts (the request
+hangs past the client's timeout), a token-bucket rate limit (429 with
+Retry-After), random 500s, and finally a response latency drawn from a
+distribution (constant, uniform, exponential, lognormal or pareto).
+
+The fixtures are synthetic by default. --save-fixtures writes them as JSON
+to edit, and --fixtures loads them back.
+
+Benchmark the real StyleValidator (search and details) and the handbook
+fetcher against it, reporting throughput and tail latency:
+    python -m nwca_catalog.standin --styles 2000 --latency lognormal:0.03:0.6 \\
+        --rate-limit 150 --burst 8:1 --timeout-rate 0.002
+
+Check that the scheduling of the validator and the variant fetcher stays
+linear (10k styles against a zero-latency stand-in within a fixed time)
+and that once the circuit breaker opens against an always-500 stand-in,
+queued styles are skipped without a request; exits non-zero on failure:
+    python -m nwca_catalog.standin --check
+
+Serve it on a fixed port for manual testing:
+    python -m nwca_catalog.standin --serve 8780 --latency exponential:0.05
+"""
+
+import asyncio
+import bisect
+import contextlib
+import io
+import json
+import math
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from aiohttp import web
+
+from .validation import REQUEST_TIMEOUT
+
+LATENCY_KINDS = ('constant', 'uniform', 'exponential', 'lognormal', 'pareto')
+DEFAULT_HANG = 16.0      # seconds; past both the validators' and the handbook fetcher's timeout
+CHECK_STYLES = 10000
+CHECK_SECONDS = 30.0     # a scheduler that wakes every waiter per release took minutes here
+CHECK_OUTAGE_STYLES = 200
+
+COLORS = ['Black', 'White', 'Navy', 'Red', 'Royal', 'Athletic Heather', 'Charcoal', 'Forest Green',
+          'Gold', 'Maroon', 'Purple', 'Kelly Green', 'Orange', 'Safety Green', 'Light Blue', 'Pink']
+SIZES = ['XS', 'S', 'M', 'L', 'XL', '2XL', '3XL', '4XL']
+PREFIXES = ['PC', 'DT', 'ST', 'NE', 'C', 'CT', 'EB', 'LPC', 'K', 'L', 'J', 'TM1MU']
+CATEGORIES = ['T-Shirts', 'Polos/Knits', 'Sweatshirts/Fleece', 'Caps', 'Outerwear', 'Bags']
+BRANDS = ['Port & Company', 'District', 'Sport-Tek', 'New Era', 'Port Authority', 'Carhartt', 'Eddie Bauer']
+
+
+class Latency(NamedTuple):
+    """Response delay distribution (seconds)"""
+    kind: str
+    params: Tuple[float, ...]
+
+    @classmethod
+    def parse(cls, text: str) -> 'Latency':
+        """
+        argparse type for KIND:P1[:P2]
+
+            constant:D        always D
+            uniform:LO:HI     between LO and HI
+            exponential:MEAN  memoryless, mean MEAN
+            lognormal:MED:S   median MED, log-space sigma S (S around 0.5-1 gives a long tail)
+            pareto:MIN:A      at least MIN, shape A (A < 2: very heavy tail)
+        """
+        import argparse
+
+        kind, _, rest = text.partition(':')
+        try:
+            params = tuple(float(part) for part in rest.split(':')) if rest else ()
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"bad latency parameters in {text!r}")
+        needed = {'constant': 1, 'uniform': 2, 'exponential': 1, 'lognormal': 2, 'pareto': 2}.get(kind)
+        if needed is None:
+            raise argparse.ArgumentTypeError(f"latency kind must be one of {', '.join(LATENCY_KINDS)}")
+        if len(params) != needed or any(p < 0 for p in params):
+            raise argparse.ArgumentTypeError(f"{kind} takes {needed} non-negative parameter(s)")
+        return cls(kind, params)
+
+    def __str__(self) -> str:
+        return ':'.join([self.kind] + [f"{p:g}" for p in self.params])
+
+    def sample(self, rng: random.Random) -> float:
+        p = self.params
+        if self.kind == 'constant':
+            return p[0]
+        if self.kind == 'uniform':
+            return rng.uniform(p[0], p[1])
+        if self.kind == 'exponential':
+            return rng.expovariate(1 / p[0]) if p[0] else 0.0
+        if self.kind == 'lognormal':
+            return rng.lognormvariate(math.log(p[0]), p[1]) if p[0] else 0.0
+        return p[0] * rng.paretovariate(p[1])
+
+
+@dataclass
+class Faults:
+    """What the stand-in does to requests before answering them"""
+    latency: Latency = Latency('constant', (0.0,))
+    rate_limit: Optional[float] = None    # requests/second (token bucket, burst of one second); None = unlimited
+    error_rate: float = 0.0               # share of requests answered with a 500
+    burst_every: Optional[float] = None   # seconds between the starts of 5xx bursts
+    burst_length: float = 0.0             # seconds each burst lasts (every request gets a 503)
+    timeout_rate: float = 0.0             # share of requests that hang for `hang` seconds
+    hang: float = DEFAULT_HANG
+    seed: int = 0
+
+    def describe(self) -> str:
+        parts = [f"latency {self.latency}"]
+        if self.rate_limit:
+            parts.append(f"rate limit {self.rate_limit:g}/s")
+        if self.error_rate:
+            parts.append(f"{self.error_rate:.1%} 500s")
+        if self.burst_every:
+            parts.append(f"503 burst {self.burst_length:g}s every {self.burst_every:g}s")
+        if self.timeout_rate:
+            parts.append(f"{self.timeout_rate:.1%} hang {self.hang:g}s")
+        return ', '.join(parts)
+
+
+class Fixtures:
+    """Products (detail rows by style) and handbook policies served by the stand-in"""
+
+    def __init__(self, products: Dict[str, List[Dict]], tree: Dict, policies: Dict[str, Dict]):
+        """
+        Args:
+            products: Upper-case style -> /product-details rows
+            tree: /policies-public/tree response
+            policies: Policy_ID -> policy (the "policy" of /policies-public/<id>)
+        """
+        self.products = products
+        self.tree = tree
+        self.policies = policies
+        self.styles = sorted(products)
+
+    @classmethod
+    def synthetic(cls, styles: int = 2000, chapters: int = 22, seed: int = 0) -> 'Fixtures':
+        """Catalog-shaped fixtures: styles with 2-16 colors x 1-8 sizes, and a handbook with chapters"""
+        rng = random.Random(seed)
+        products: Dict[str, List[Dict]] = {}
+        while len(products) < styles:
+            style = f"{rng.choice(PREFIXES)}{rng.randrange(10, 9999)}{rng.choice(['', '', 'LS', 'P', 'H'])}"
+            if style in products:
+                continue
+            title = f"{rng.choice(BRANDS)} {rng.choice(['Core', 'Essential', 'Tri-Blend', 'Fleece', 'Sport'])} {style}"
+            base = {
+                'STYLE': style,
+                'PRODUCT_TITLE': title,
+                'PRODUCT_DESCRIPTION': f"{title}. " + 'Soft, durable and built for decoration. ' * 6,
+                'BRAND_NAME': title.split(' ')[0],
+                'CATEGORY_NAME': rng.choice(CATEGORIES),
+                'PRODUCT_STATUS': rng.choice(['Active'] * 9 + ['Discontinued']),
+                'isNew': rng.random() < 0.1,
+                'isBestSeller': rng.random() < 0.05,
+            }
+            sizes = ['OSFA'] if base['CATEGORY_NAME'] in ('Caps', 'Bags') else SIZES[1:rng.randrange(4, 9)]
+            rows = []
+            for color in rng.sample(COLORS, rng.randrange(2, len(COLORS) + 1)):
+                for size in sizes:
+                    rows.append(dict(base, COLOR_NAME=color, CATALOG_COLOR=color.replace(' ', ''), SIZE=size,
+                                     MAIN_IMAGE_URL=f"https://cdnm.sanmar.com/imglib/mresjpg/{style}_{color}.jpg"))
+            products[style] = rows
+
+        parent_id = 'employee-handbook'
+        children = [{'Policy_ID': f'handbook-chapter-{n:02d}', 'Title': f"Chapter {n}: Policy {n}",
+                     'Sort_Order': n * 10} for n in range(1, chapters + 1)]
+        rng.shuffle(children)   # the fetcher sorts by Sort_Order
+        policies = {parent_id: {'Policy_ID': parent_id, 'Title': 'Employee Handbook',
+                                'Body_HTML': '<h2>Welcome</h2><p>' + 'Intro text. ' * 200 + '</p>'}}
+        for child in children:
+            policies[child['Policy_ID']] = dict(
+                child, Body_HTML=''.join(f"<h3>Section {s}</h3><p>{'Policy text. ' * 120}</p>" for s in range(8))
+                + '<hr><p>Web-only footer</p>')
+        tree = {'tree': [{'Category': 'Human Resources', 'policies': [
+            {'Policy_ID': parent_id, 'Title': 'Employee Handbook', 'children': children}]}]}
+        return cls(products, tree, policies)
+
+    @classmethod
+    def load(cls, path: str) -> 'Fixtures':
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        products = {style.upper(): rows for style, rows in data['products'].items()}
+        return cls(products, data['tree'], data['policies'])
+
+    def save(self, path: str) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'products': self.products, 'tree': self.tree, 'policies': self.policies}, f, indent=1)
+
+    def search(self, query: str, limit: int) -> List[Dict]:
+        """Exact style first, then styles starting with the query (like the proxy's ranking)"""
+        query = query.upper()
+        hits = [query] if query in self.products else []
+        start = bisect.bisect_left(self.styles, query)
+        for style in self.styles[start:]:
+            if len(hits) >= limit or not style.startswith(query):
+                break
+            if style != query:
+                hits.append(style)
+        return [self._summary(style) for style in hits[:limit]]
+
+    def _summary(self, style: str) -> Dict:
+        row = self.products[style][0]
+        return {'style': style, 'title': row['PRODUCT_TITLE'], 'brand': row['BRAND_NAME'],
+                'category': row['CATEGORY_NAME'], 'status': row['PRODUCT_STATUS'],
+                'isNew': row['isNew'], 'isBestSeller': row['isBestSeller']}
+
+
+class StandIn:
+    """The stand-in server; an async context manager that listens until the block exits"""
+
+    def __init__(self, fixtures: Fixtures, faults: Optional[Faults] = None,
+                 host: str = '127.0.0.1', port: int = 0):
+        """
+        Args:
+            fixtures: Data to serve
+            faults: Injected latency and failures (none when omitted)
+            host: Interface to bind
+            port: Port to bind (0 = any free port; see .url)
+        """
+        self.fixtures = fixtures
+        self.faults = faults or Faults()
+        self.host = host
+        self.port = port
+        self.stats: Counter = Counter()
+        self._rng = random.Random(self.faults.seed)
+        self._runner: Optional[web.AppRunner] = None
+        self._started = 0.0
+        self._tokens = 0.0
+        self._refilled = 0.0
+
+    @property
+    def url(self) -> str:
+        """Proxy root (the handbook fetcher's PROXY)"""
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def api_base(self) -> str:
+        """API root (the validators' API_BASE)"""
+        return f"{self.url}/api"
+
+    def reset(self) -> None:
+        """Clear the counters and restart the burst schedule and the token bucket"""
+        self.stats.clear()
+        self._started = self._refilled = time.monotonic()
+        self._tokens = self.faults.rate_limit or 0.0
+
+    async def __aenter__(self) -> 'StandIn':
+        app = web.Application(middlewares=[self._inject_faults])
+        app.router.add_get('/api/products/search', self._search)
+        app.router.add_get('/api/product-details', self._details)
+        app.router.add_get('/api/policies-public/{policy_id}', self._policy)
+        # Cancel hung handlers when the client gives up, so shutdown does not wait for them
+        self._runner = web.AppRunner(app, handler_cancellation=True, shutdown_timeout=1.0)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        self.reset()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self._runner.cleanup()
+
+    def _rate_limited(self, now: float) -> Optional[float]:
+        """Seconds until the next token when the bucket is empty, else None (and take a token)"""
+        rate = self.faults.rate_limit
+        if not rate:
+            return None
+        self._tokens = min(rate, self._tokens + (now - self._refilled) * rate)
+        self._refilled = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return None
+        return (1 - self._tokens) / rate
+
+    @web.middleware
+    async def _inject_faults(self, request: web.Request, handler) -> web.StreamResponse:
+        faults = self.faults
+        now = time.monotonic()
+        delay = faults.latency.sample(self._rng)
+
+        if faults.burst_every and (now - self._started) % faults.burst_every >= faults.burst_every - faults.burst_length:
+            self.stats['503 burst'] += 1
+            await asyncio.sleep(delay)
+            return web.json_response({'error': 'Service Unavailable'}, status=503)
+        if faults.timeout_rate and self._rng.random() < faults.timeout_rate:
+            self.stats['hang'] += 1
+            await asyncio.sleep(faults.hang)
+            return web.json_response({'error': 'Gateway Timeout'}, status=504)
+        wait = self._rate_limited(now)
+        if wait is not None:
+            self.stats['429'] += 1
+            return web.json_response({'error': 'Too many requests'}, status=429,
+                                     headers={'Retry-After': str(max(1, math.ceil(wait)))})
+        if faults.error_rate and self._rng.random() < faults.error_rate:
+            self.stats['500'] += 1
+            await asyncio.sleep(delay)
+            return web.json_response({'error': 'Internal Server Error'}, status=500)
+
+        await asyncio.sleep(delay)
+        response = await handler(request)
+        self.stats[str(response.status)] += 1
+        return response
+
+    async def _search(self, request: web.Request) -> web.Response:
+        limit = int(request.query.get('limit', 10))
+        return web.json_response({'products': self.fixtures.search(request.query.get('q', ''), limit)})
+
+    async def _details(self, request: web.Request) -> web.Response:
+        style = request.query.get('styleNumber', '').upper()
+        return web.json_response(self.fixtures.products.get(style, []))
+
+    async def _policy(self, request: web.Request) -> web.Response:
+        policy_id = request.match_info['policy_id']
+        if policy_id == 'tree':
+            return web.json_response(self.fixtures.tree)
+        policy = self.fixtures.policies.get(policy_id)
+        if policy is None:
+            return web.json_response({'error': 'Policy not found'}, status=404)
+        return web.json_response({'policy': policy})
+
+
+def _benchmark_styles(fixtures: Fixtures, count: int, miss_rate: float, seed: int) -> List[str]:
+    """Styles to validate: fixture styles plus made-up ones that are not found"""
+    rng = random.Random(seed)
+    styles = []
+    for n in range(count):
+        if rng.random() < miss_rate:
+            styles.append(f"ZZ{n}")
+        else:
+            styles.append(rng.choice(fixtures.styles))
+    return list(dict.fromkeys(styles))
+
+
+def _row(name: str, items: int, elapsed: float, requests: int, latency, failed: int, stats: Counter) -> str:
+    ms = [latency.percentile(p) * 1000 for p in (50, 95, 99, 99.9)] + [(latency.max or 0) * 1000]
+    served = ', '.join(f"{code} x {count}" for code, count in sorted(stats.items()))
+    return (f"{name:<17}{items:>7,}{elapsed:>8.1f}s{items / elapsed:>9.1f}{requests / elapsed:>8.1f}"
+            + ''.join(f"{value:>8.0f}" for value in ms) + f"{failed:>8}   {served}")
+
+
+async def _benchmark(fixtures: Fixtures, faults: Faults, styles: int, miss_rate: float,
+                     concurrency: int, pace: float, skip_handbook: bool) -> None:
+    """Run the validators and the handbook fetcher against a stand-in and print a results table"""
+    from .handbook import fetch_handbook_chapters, fetch_json
+    from .metrics import LatencyHistogram
+    from .validation import DETAILS, SEARCH, StyleValidator
+
+    names = _benchmark_styles(fixtures, styles, miss_rate, faults.seed)
+    async with StandIn(fixtures, faults) as server:
+        print(f"Stand-in at {server.url}: {len(fixtures.styles):,} fixture styles, {faults.describe()}")
+        print(f"Validating {len(names):,} unique styles ({miss_rate:.0%} not in the catalog), "
+              f"max {concurrency} in flight, request timeout {REQUEST_TIMEOUT}s")
+        print()
+        print(f"{'':<17}{'items':>7}{'time':>9}{'items/s':>9}{'req/s':>8}"
+              f"{'p50':>8}{'p95':>8}{'p99':>8}{'p99.9':>8}{'max ms':>8}{'failed':>8}   served")
+
+        for endpoint in (SEARCH, DETAILS):
+            server.reset()
+            # The per-batch progress lines would drown the table
+            with contextlib.redirect_stdout(io.StringIO()):
+                async with StyleValidator(server.api_base, endpoint, max_concurrent=concurrency) as validator:
+                    results = await validator.validate_batch(names, batch_size=50)
+            metrics = validator.metrics
+            failed = sum(1 for result in results.values() if result.error and not result.exists
+                         and not result.error.startswith('Partial match'))
+            print(_row(f"{endpoint} validator", metrics.styles, metrics.elapsed, metrics.requests,
+                       metrics.latency, failed, server.stats))
+
+        if skip_handbook:
+            return
+        server.reset()
+        latency = LatencyHistogram()
+        requests = [0]
+
+        def timed_fetch(url: str) -> Dict:
+            started = time.monotonic()
+            try:
+                return fetch_json(url)
+            finally:
+                requests[0] += 1
+                latency.record(time.monotonic() - started)
+
+        started = time.monotonic()
+        try:
+            # urllib blocks, so the fetcher runs in a thread while the server keeps serving
+            parent, chapters = await asyncio.to_thread(fetch_handbook_chapters, server.url, pace=pace,
+                                                       fetch=timed_fetch)
+            failed, error = 0, None
+        except Exception as e:   # the fetcher has no retries: one 429, 5xx or timeout ends it
+            chapters, failed, error = [], 1, e
+        print(_row('handbook fetch', len(chapters), time.monotonic() - started, requests[0], latency,
+                   failed, server.stats))
+        if error is not None:
+            print(f"\n  handbook fetch failed after {requests[0]} request(s): {error!r}")
+
+
+CHECK_CLIENTS = ('search', 'variants')
+
+
+async def _run_client(client: str, api_base: str, names: List[str]) -> Tuple[int, object]:
+    """
+    Validate names with StyleValidator ('search') or index them with VariantFetcher ('variants')
+
+    Returns:
+        (styles answered by the API, the validator or fetcher)
+    """
+    from .breaker import CIRCUIT_OPEN_STATUS
+    from .validation import SEARCH, StyleValidator
+    from .variants import VariantFetcher
+
+    # The per-batch progress lines and breaker warnings would drown the check
+    with contextlib.redirect_stdout(io.StringIO()):
+        if client == 'variants':
+            async with VariantFetcher(api_base) as fetcher:
+                await fetcher.load(names)
+            return len(fetcher.index), fetcher
+        async with StyleValidator(api_base, SEARCH) as validator:
+            results = await validator.validate_batch(names, batch_size=50)
+    return sum(1 for result in results.values() if result.status != CIRCUIT_OPEN_STATUS), validator
+
+
+async def _check_scaling(fixtures: Fixtures, client: str, styles: int, bound: float) -> bool:
+    """Run client over styles unique styles against a zero-latency stand-in in under bound seconds"""
+    names = list(dict.fromkeys(fixtures.styles + [f"ZZ{n}" for n in range(styles)]))[:styles]
+    async with StandIn(fixtures) as server:
+        started = time.monotonic()
+        answered, runner = await _run_client(client, server.api_base, names)
+        elapsed = time.monotonic() - started
+        requests = sum(server.stats.values())
+
+    passed = answered == len(names) == requests and elapsed <= bound
+    print(f"[{'OK' if passed else 'ERROR'}] {client} scaling: {answered:,} of {len(names):,} styles, "
+          f"{requests:,} requests in {elapsed:.1f}s (bound {bound:g}s), {runner.limiter.summary()}")
+    return passed
+
+
+async def _check_outage(fixtures: Fixtures, client: str, styles: int) -> bool:
+    """Run client over styles against a stand-in that answers every request with a 500"""
+    names = fixtures.styles[:styles]
+    async with StandIn(fixtures, Faults(error_rate=1.0)) as server:
+        answered, runner = await _run_client(client, server.api_base, names)
+        requests = sum(server.stats.values())
+
+    # Only the calls that opened the circuit, and those already holding a slot, may reach the server
+    bound = runner.breaker.min_calls + runner.limiter.maximum
+    skipped = len(names) - answered
+    passed = requests <= bound and skipped >= len(names) - requests
+    print(f"[{'OK' if passed else 'ERROR'}] {client} outage: {requests} of {len(names)} styles reached "
+          f"the server (bound {bound}), {skipped} skipped, {runner.breaker.summary()}")
+    return passed
+
+
+async def _check(fixtures: Fixtures) -> int:
+    """Run the self-checks; 1 if any failed"""
+    passed = []
+    for client in CHECK_CLIENTS:
+        passed.append(await _check_scaling(fixtures, client, CHECK_STYLES, CHECK_SECONDS))
+        passed.append(await _check_outage(fixtures, client, CHECK_OUTAGE_STYLES))
+    return 0 if all(passed) else 1
+
+
+async def _serve(fixtures: Fixtures, faults: Faults, port: int) -> None:
+    async with StandIn(fixtures, faults, port=port) as server:
+        print(f"Stand-in proxy at {server.api_base} ({faults.describe()}); Ctrl+C to stop")
+        print(f"  {server.api_base}/products/search?q={fixtures.styles[0]}&limit=1")
+        print(f"  {server.api_base}/product-details?styleNumber={fixtures.styles[0]}")
+        print(f"  {server.api_base}/policies-public/tree")
+        while True:
+            await asyncio.sleep(3600)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    def burst(text: str) -> Tuple[float, float]:
+        try:
+            every, length = (float(part) for part in text.split(':'))
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"expected EVERY:LENGTH seconds, got {text!r}")
+        if not 0 <= length < every:
+            raise argparse.ArgumentTypeError("burst length must be shorter than the interval")
+        return every, length
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--latency', type=Latency.parse, default=Latency('lognormal', (0.03, 0.5)),
+                        help="Response delay, KIND:P1[:P2] (default lognormal:0.03:0.5)")
+    parser.add_argument('--rate-limit', type=float, help="Requests/second before 429s (default unlimited)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Share of requests answered with a 500")
+    parser.add_argument('--burst', type=burst, help="503 bursts, EVERY:LENGTH seconds (e.g. 8:1)")
+    parser.add_argument('--timeout-rate', type=float, default=0.0, help="Share of requests that hang")
+    parser.add_argument('--hang', type=float, default=DEFAULT_HANG, help=f"Seconds a hung request takes (default {DEFAULT_HANG:g})")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--fixtures', help="Load fixtures from this JSON file instead of generating them")
+    parser.add_argument('--save-fixtures', help="Write the fixtures to this JSON file")
+    parser.add_argument('--catalog', type=int, default=2000, help="Synthetic fixture styles (default 2000)")
+    parser.add_argument('--chapters', type=int, default=22, help="Synthetic handbook chapters (default 22)")
+    parser.add_argument('--styles', type=int, default=1000, help="Styles to validate (default 1000)")
+    parser.add_argument('--miss-rate', type=float, default=0.1, help="Share of styles not in the catalog")
+    parser.add_argument('--concurrency', type=int, default=32, help="Validator max in flight (default 32)")
+    parser.add_argument('--pace', type=float, default=0.4, help="Handbook fetcher's sleep per chapter (default 0.4)")
+    parser.add_argument('--no-handbook', action='store_true', help="Skip the handbook fetcher")
+    parser.add_argument('--serve', type=int, metavar='PORT', help="Only serve on PORT until interrupted")
+    parser.add_argument('--check', action='store_true',
+                        help=f"Self-check: {CHECK_STYLES:,} styles at zero latency within {CHECK_SECONDS:g}s, "
+                             f"and the circuit breaker against an always-500 stand-in")
+    args = parser.parse_args()
+
+    fixtures = (Fixtures.load(args.fixtures) if args.fixtures
+                else Fixtures.synthetic(args.catalog, args.chapters, args.seed))
+    if args.save_fixtures:
+        fixtures.save(args.save_fixtures)
+        print(f"Fixtures: {args.save_fixtures}")
+    every, length = args.burst or (None, 0.0)
+    faults = Faults(latency=args.latency, rate_limit=args.rate_limit, error_rate=args.error_rate,
+                    burst_every=every, burst_length=length, timeout_rate=args.timeout_rate,
+                    hang=args.hang, seed=args.seed)
+    if args.check:
+        raise SystemExit(asyncio.run(_check(fixtures)))
+    try:
+        if args.serve is not None:
+            asyncio.run(_serve(fixtures, faults, args.serve))
+        else:
+            asyncio.run(_benchmark(fixtures, faults, args.styles, args.miss_rate, args.concurrency,
+                                   args.pace, args.no_handbook))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,137 @@
+"""
+Incremental JSON parsing for array responses
+
+/product-details returns one object per color variant, but the validators
+only read the first one. read_first_element() decodes the response stream
+just far enough to get data[0] and then drops the connection, so a style with
+dozens of colors costs one variant's worth of bytes and parse time.
+"""
+
+import codecs
+import json
+from dataclasses import dataclass
+from typing import Any, Optional
+
+CHUNK_SIZE = 4096
+# A remainder this small is cheaper to drain than to pay a new TLS handshake
+# for, so the keep-alive connection goes back to the pool instead of closing.
+DRAIN_LIMIT = 16 * 1024
+_WHITESPACE = ' \t\n\r'
+
+
+@dataclass
+class FirstElement:
+    """Result of a partial read of a JSON response"""
+    value: Any              # data[0], or the fully parsed body when not an array
+    found: bool             # False for an empty array
+    is_array: bool          # False -> value is the full-parse fallback
+    bytes_read: int         # body bytes pulled off the wire (decoded)
+    bytes_total: Optional[int] = None   # Content-Length when the body is not compressed
+    compressed: bool = False            # Content-Encoding set: bytes_read are decompressed bytes
+
+    @property
+    def bytes_saved(self) -> Optional[int]:
+        """
+        Bytes never downloaded, when the full size is known
+
+        None for compressed bodies: aiohttp only reports decompressed bytes, so
+        the compressed bytes left unread cannot be measured.
+        """
+        if self.bytes_total is None:
+            return None
+        return max(self.bytes_total - self.bytes_read, 0)
+
+
+def _skip_ws(text: str, pos: int) -> int:
+    while pos < len(text) and text[pos] in _WHITESPACE:
+        pos += 1
+    return pos
+
+
+async def _abandon(response, remaining: Optional[int]) -> int:
+    """
+    Stop reading a response early; returns any bytes drained to keep the connection
+
+    Args:
+        response: aiohttp ClientResponse part-way through its body
+        remaining: Upper bound on the wire bytes still unread (None = unknown)
+    """
+    if remaining is not None and remaining <= DRAIN_LIMIT:
+        drained = len(await response.content.read())
+        response.release()
+        return drained
+    response.close()
+    return 0
+
+
+async def read_first_element(response, chunk_size: int = CHUNK_SIZE) -> FirstElement:
+    """
+    Read an aiohttp response only until the first array element is decoded
+
+    Falls back to parsing the whole body when it is not a JSON array. When the
+    stream is abandoned early the connection is closed rather than returned
+    to the pool, unless the unread remainder is under DRAIN_LIMIT.
+
+    Args:
+        response: aiohttp ClientResponse with an unread body
+        chunk_size: Bytes to pull per read
+
+    Returns:
+        FirstElement with the decoded value and byte accounting
+
+    Raises:
+        json.JSONDecodeError: Body ends before a valid element or document
+    """
+    compressed = bool(response.headers.get('Content-Encoding'))
+    total = response.content_length if not compressed else None
+    decoder = codecs.getincrementaldecoder(response.charset or 'utf-8')()
+    json_decoder = json.JSONDecoder()
+
+    text = ''
+    bytes_read = 0
+    eof = False
+
+    while True:
+        start = _skip_ws(text, 0)
+        if start < len(text):
+            if text[start] != '[':
+                break  # not an array -> full parse below
+
+            pos = _skip_ws(text, start + 1)
+            if pos < len(text):
+                if text[pos] == ']':
+                    return FirstElement(value=None, found=False, is_array=True,
+                                        bytes_read=bytes_read, bytes_total=total, compressed=compressed)
+                try:
+                    value, end = json_decoder.raw_decode(text, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                else:
+                    # A bare number at the buffer edge may continue in the next
+                    # chunk; only trust the value once its delimiter has arrived.
+                    if _skip_ws(text, end) < len(text) or eof:
+                        if not eof:
+                            # A compressed body's whole length bounds its unread remainder
+                            remaining = total - bytes_read if total is not None else response.content_length
+                            bytes_read += await _abandon(response, remaining)
+                        return FirstElement(value=value, found=True, is_array=True,
+                                            bytes_read=bytes_read, bytes_total=total, compressed=compressed)
+
+        if eof:
+            break
+        chunk = await response.content.read(chunk_size)
+        if not chunk:
+            eof = True
+            text += decoder.decode(b'', final=True)
+        else:
+            bytes_read += len(chunk)
+            text += decoder.decode(chunk)
+
+    # Not an array (or an empty body): read the rest and parse it whole
+    rest = await response.content.read()
+    bytes_read += len(rest)
+    text += decoder.decode(rest, final=True)
+    value = json.loads(text)
+    return FirstElement(value=value, found=bool(value), is_array=isinstance(value, list),
+                        bytes_read=bytes_read, bytes_total=total, compressed=compressed)
@@ -0,0 +1,318 @@
+"""
+Near-miss style suggestions for products the API could not find
+
+Builds a local character n-gram index over catalog style numbers and titles.
+Candidates are gathered from the inverted index (no all-pairs scan) and then
+re-ranked with an edit similarity that treats a transposed pair of characters
+as a single edit, so typos like "PC45" -> "PC54" or a dropped suffix like
+"PC55P" -> "PC55" come back near the top.
+
+Usage:
+    index = NgramIndex.from_csv("catalog_styles.csv")
+    index.query("PC45", "Port Company Core Cotton Tee", k=5)
+"""
+
+import csv
+import heapq
+import os
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+
+# Column names accepted when loading a catalog export
+STYLE_COLUMNS = ('STYLE', 'Style', 'style', 'StyleNumber', 'Style_Cleaned')
+TITLE_COLUMNS = ('PRODUCT_TITLE', 'Title', 'title', 'API_Title', 'Description')
+
+
+class Suggestion(NamedTuple):
+    """A catalog candidate for an unmatched style"""
+    style: str
+    title: str
+    score: float
+
+
+def normalize_style(style: str) -> str:
+    """Uppercase and strip separators so "pc-54 " and "PC54" compare equal"""
+    return ''.join(ch for ch in str(style).upper() if ch.isalnum())
+
+
+def normalize_title(title: str) -> str:
+    """Lowercase, drop punctuation/trademark marks and collapse whitespace"""
+    cleaned = ''.join(ch if ch.isalnum() else ' ' for ch in str(title).lower())
+    return ' '.join(cleaned.split())
+
+
+def ngrams(text: str, n: int) -> Set[str]:
+    """
+    Character n-grams of text padded with boundary markers
+
+    Examples:
+        ngrams("PC54", 2) -> {"^P", "PC", "C5", "54", "4$"}
+    """
+    if not text:
+        return set()
+    padded = f"^{text}$"
+    if len(padded) <= n:
+        return {padded}
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+
+def edit_similarity(a: str, b: str) -> float:
+    """
+    1 - (optimal string alignment distance / longer length)
+
+    Adjacent transpositions count as one edit, which is the common typo when
+    style numbers are keyed by hand.
+    """
+    if a == b:
+        return 1.0
+    if not a or not b:
+        return 0.0
+    longest = max(len(a), len(b))
+
+    # Shared prefixes/suffixes never change the distance; style numbers from
+    # one vendor mostly share both, so trimming leaves a tiny table.
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < len(a) - start and end < len(b) - start and a[-1 - end] == b[-1 - end]:
+        end += 1
+    if start and start < len(a) and start < len(b) and a[start] == b[start - 1] and a[start - 1] == b[start]:
+        start -= 1  # keep a transposition that straddles the prefix intact
+    a, b = a[start:len(a) - end], b[start:len(b) - end]
+    if not a or not b:
+        return 1.0 - (len(a) + len(b)) / longest
+
+    prev_prev: List[int] = []
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        ca = a[i - 1]
+        cur = [i] * (len(b) + 1)
+        for j in range(1, len(b) + 1):
+            cb = b[j - 1]
+            best = prev[j - 1] if ca == cb else prev[j - 1] + 1
+            if prev[j] + 1 < best:
+                best = prev[j] + 1
+            if cur[j - 1] + 1 < best:
+                best = cur[j - 1] + 1
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb and prev_prev[j - 2] + 1 < best:
+                best = prev_prev[j - 2] + 1
+            cur[j] = best
+        prev_prev, prev = prev, cur
+
+    return 1.0 - prev[len(b)] / longest
+
+
+def dice(a: Set[str], b: Set[str]) -> float:
+    """Dice coefficient of two n-gram sets"""
+    if not a or not b:
+        return 0.0
+    return 2.0 * len(a & b) / (len(a) + len(b))
+
+
+class NgramIndex:
+    """Inverted character n-gram index over catalog styles and titles"""
+
+    def __init__(self, style_n: int = 2, title_n: int = 3, max_posting: int = 5000):
+        """
+        Args:
+            style_n: Gram size for style numbers (short codes need small grams)
+            title_n: Gram size for product titles
+            max_posting: Grams shared by more entries than this are skipped
+                during candidate generation (they do not discriminate)
+        """
+        self.style_n = style_n
+        self.title_n = title_n
+        self.max_posting = max_posting
+
+        self.styles: List[str] = []
+        self.titles: List[str] = []
+        self._keys: List[str] = []
+        self._style_grams: List[Set[str]] = []
+        self._title_grams: List[Set[str]] = []
+        self._style_postings: Dict[str, List[int]] = {}
+        self._title_postings: Dict[str, List[int]] = {}
+        self._positions: Dict[str, int] = {}
+        self._frozen: Dict[str, Tuple[Dict[str, np.ndarray], np.ndarray]] = {}
+        self._dirty = True
+        self._query_cache: Dict[Tuple[str, str, int], List[Suggestion]] = {}
+
+    def __len__(self) -> int:
+        return len(self.styles)
+
+    def add(self, style: str, title: str = '') -> None:
+        """Add a catalog style (re-adding a style only fills in a missing title)"""
+        key = normalize_style(style)
+        if not key:
+            return
+
+        if key in self._positions:
+            pos = self._positions[key]
+            if title and not self.titles[pos]:
+                self.titles[pos] = title
+                self._title_grams[pos] = ngrams(normalize_title(title), self.title_n)
+                for gram in self._title_grams[pos]:
+                    self._title_postings.setdefault(gram, []).append(pos)
+                self._query_cache.clear()
+                self._dirty = True
+            return
+
+        pos = len(self.styles)
+        self._positions[key] = pos
+        self.styles.append(str(style).strip())
+        self.titles.append(title or '')
+        self._keys.append(key)
+
+        style_grams = ngrams(key, self.style_n)
+        title_grams = ngrams(normalize_title(title), self.title_n) if title else set()
+        self._style_grams.append(style_grams)
+        self._title_grams.append(title_grams)
+
+        for gram in style_grams:
+            self._style_postings.setdefault(gram, []).append(pos)
+        for gram in title_grams:
+            self._title_postings.setdefault(gram, []).append(pos)
+
+        self._query_cache.clear()
+        self._dirty = True
+
+    @classmethod
+    def from_records(cls, records: Iterable[Tuple[str, str]], **kwargs) -> 'NgramIndex':
+        """Build an index from (style, title) pairs"""
+        index = cls(**kwargs)
+        for style, title in records:
+            index.add(style, title)
+        return index
+
+    @classmethod
+    def from_csv(cls, path: str, **kwargs) -> 'NgramIndex':
+        """
+        Build an index from a catalog export CSV
+
+        The style column may be named STYLE, Style, StyleNumber or
+        Style_Cleaned; the title column PRODUCT_TITLE, Title, API_Title or
+        Description. A missing title column is allowed.
+        """
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            reader = csv.DictReader(f)
+            fields = reader.fieldnames or []
+            style_col = next((c for c in STYLE_COLUMNS if c in fields), None)
+            title_col = next((c for c in TITLE_COLUMNS if c in fields), None)
+            if style_col is None:
+                raise ValueError(f"{path}: no style column (expected one of {', '.join(STYLE_COLUMNS)})")
+            return cls.from_records(
+                ((row[style_col], row[title_col] if title_col else '') for row in reader),
+                **kwargs
+            )
+
+    def _freeze(self) -> None:
+        """Convert postings and gram counts to int arrays after the last add()"""
+        if not self._dirty:
+            return
+        for name, postings, grams in (('style', self._style_postings, self._style_grams),
+                                      ('title', self._title_postings, self._title_grams)):
+            self._frozen[name] = (
+                {gram: np.asarray(ids, dtype=np.int32) for gram, ids in postings.items()},
+                np.fromiter((len(g) for g in grams), dtype=np.int32, count=len(grams))
+            )
+        self._dirty = False
+
+    def _candidates(self, grams: Set[str], name: str, limit: int) -> List[int]:
+        """Top entries by n-gram Dice overlap, counted through the postings"""
+        postings, sizes = self._frozen[name]
+        usable = [postings[g] for g in grams if g in postings]
+        if not usable:
+            return []
+        selective = [ids for ids in usable if len(ids) <= self.max_posting]
+
+        positions, counts = np.unique(np.concatenate(selective or usable), return_counts=True)
+        if len(positions) > limit:
+            scores = 2.0 * counts / (len(grams) + sizes[positions])
+            positions = positions[np.argpartition(-scores, limit)[:limit]]
+        return positions.tolist()
+
+    def query(self, style: str, description: str = '', k: int = 5,
+              min_score: float = 0.3) -> List[Suggestion]:
+        """
+        Suggest the k nearest catalog styles for an unmatched style
+
+        Args:
+            style: Cleaned style number that was not found
+            description: Optional product description used as a tie-breaker
+            k: Number of suggestions to return
+            min_score: Drop candidates scoring below this (0-1)
+
+        Returns:
+            Suggestions sorted by descending score
+        """
+        cache_key = (style, description, k)
+        if cache_key in self._query_cache:
+            return self._query_cache[cache_key]
+
+        self._freeze()
+        key = normalize_style(style)
+        style_grams = ngrams(key, self.style_n)
+        title_grams = ngrams(normalize_title(description), self.title_n) if description else set()
+
+        pool = set(self._candidates(style_grams, 'style', k * 4))
+        if title_grams:
+            pool.update(self._candidates(title_grams, 'title', k * 2))
+
+        scored = []
+        for pos in pool:
+            candidate = self._keys[pos]
+            if candidate == key:
+                continue  # the style itself is not a useful suggestion
+            if not title_grams and abs(len(candidate) - len(key)) > (1 - min_score) * max(len(candidate), len(key)):
+                continue  # length alone rules it out
+            score = edit_similarity(key, candidate)
+            if title_grams and self._title_grams[pos]:
+                score = 0.75 * score + 0.25 * dice(title_grams, self._title_grams[pos])
+            if score >= min_score:
+                scored.append(Suggestion(self.styles[pos], self.titles[pos], round(score, 3)))
+
+        result = heapq.nlargest(k, scored, key=lambda s: (s.score, s.style))
+        self._query_cache[cache_key] = result
+        return result
+
+    def query_many(self, rows: Iterable[Tuple[str, str]], k: int = 5,
+                   min_score: float = 0.3) -> Dict[str, List[Suggestion]]:
+        """Suggestions for many (style, description) rows, keyed by style"""
+        results: Dict[str, List[Suggestion]] = {}
+        for style, description in rows:
+            if style not in results:
+                results[style] = self.query(style, description or '', k=k, min_score=min_score)
+        return results
+
+
+def suggestion_rows(suggestions: Dict[str, List[Suggestion]]) -> List[Dict]:
+    """Flatten query_many output into CSV rows (one row per candidate)"""
+    rows = []
+    for style, candidates in suggestions.items():
+        for rank, candidate in enumerate(candidates, start=1):
+            rows.append({
+                'Style_Cleaned': style,
+                'Rank': rank,
+                'Suggested_Style': candidate.style,
+                'Suggested_Title': candidate.title,
+                'Score': candidate.score
+            })
+    return rows
+
+
+def build_index(catalog_path: Optional[str], known: Iterable[Tuple[str, str]] = ()) -> NgramIndex:
+    """
+    Index the catalog export (if present) plus styles the API confirmed
+
+    Args:
+        catalog_path: Catalog CSV path; silently skipped when missing
+        known: (style, title) pairs found during this run
+    """
+    if catalog_path and os.path.exists(catalog_path):
+        index = NgramIndex.from_csv(catalog_path)
+    else:
+        index = NgramIndex()
+    for style, title in known:
+        index.add(style, title)
+    return index
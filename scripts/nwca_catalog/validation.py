@@ -0,0 +1,453 @@
+"""
+Style validation service shared by the catalog scripts
+
+process-top-sellers.py and process-new-products.py used to carry their
+own StyleCleaner and APIValidator. Each used a different endpoint, result
+fields and cache, so a style on both lists was fetched twice and the two
+answers could disagree. Both scripts now go through StyleValidator:
+
+- one result schema whichever endpoint answers (StyleResult): exists,
+  api_is_new, api_best_seller, title, brand, category, status, error and
+  retries
+- /products/search (fast, exact-match check) or /product-details (first
+  color variant only, rate limited), behind the same retry policy,
+  adaptive limiter, circuit breaker and metrics
+- one on-disk cache (SharedStyleCache) that both scripts consult and
+  append to, so a style validated by either is reused by the other while
+  it is fresh
+
+Usage:
+    shared = SharedStyleCache(SHARED_CACHE_FILE)
+    async with StyleValidator(API_BASE, endpoint=DETAILS, shared_cache=shared) as validator:
+        results = await validator.validate_batch(styles)
+"""
+
+import asyncio
+import os
+import time
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import aiohttp
+
+from .breaker import CIRCUIT_OPEN_STATUS, CircuitBreaker, CircuitOpenError
+from .concurrency import DEFAULT_MAXIMUM, DEFAULT_TARGET_LATENCY, AdaptiveLimiter, as_completed_batches
+from .journal import RETRY_STATUSES, ResultJournal, replay_journal
+from .metrics import ValidatorMetrics
+from .ndjson import ResultStream
+from .results import StyleResult
+from .retry import DEFAULT_MAX_RETRIES, RetryableStatus, RetryError, RetryPolicy, check_response, describe
+from .streaming import read_first_element
+from .vendors import detect_vendor
+
+SEARCH = 'search'          # /products/search?q=STYLE&limit=1
+DETAILS = 'details'        # /product-details?styleNumber=STYLE
+
+# Results from both scripts, one JSON line per style (newest entry wins)
+SHARED_CACHE_FILE = "nwca_style_cache.jsonl"
+DEFAULT_CACHE_MAX_AGE = 24 * 3600    # seconds
+
+REQUEST_TIMEOUT = 10       # seconds
+
+
+class StyleCleaner:
+    """Clean and normalize style numbers"""
+
+    @staticmethod
+    def clean_style(style: str) -> Tuple[str, str]:
+        """
+        Clean style number and extract size if present
+
+        Examples:
+            "C112_OSFA" -> ("C112", "OSFA")
+            "PC78H_2X" -> ("PC78H", "2X")
+            "PC54" -> ("PC54", "")
+        """
+        if '_' in style:
+            parts = style.split('_', 1)  # Split on first underscore only
+            return parts[0].strip(), parts[1].strip()
+        return style.strip(), ''
+
+    @staticmethod
+    def detect_vendor(style: str) -> str:
+        """Detect vendor from style prefix (see nwca_catalog/vendor_prefixes.csv)"""
+        return detect_vendor(style)
+
+
+def parse_search(style: str, data: Dict) -> StyleResult:
+    """
+    Result for a /products/search response (exact, case-insensitive style match only)
+
+    Search does not report isNew, and a miss only means the style was not
+    the first hit, so api_is_new stays None unless the product carries it.
+    """
+    products = data.get('products', [])
+    if not products:
+        return StyleResult(api_is_new=None)
+    product = products[0]
+    if product.get('style', '').upper() != style.upper():
+        return StyleResult(api_is_new=None, error=f'Partial match only: {product.get("style")}')
+    return StyleResult.make(
+        exists=True,
+        api_is_new=product.get('isNew'),
+        api_best_seller=product.get('isBestSeller', False),
+        title=product.get('title', ''),
+        brand=product.get('brand', ''),
+        category=product.get('category', ''),
+        status=product.get('status', 'Unknown')
+    )
+
+
+def parse_details(data) -> StyleResult:
+    """Result for /product-details (an array of color variants; empty = not found)"""
+    if not isinstance(data, list) or not data:
+        return StyleResult()
+    variant = data[0]
+    return StyleResult.make(
+        exists=True,
+        api_is_new=variant.get('isNew', False),
+        api_best_seller=variant.get('isBestSeller', False),
+        title=variant.get('PRODUCT_TITLE', ''),
+        brand=variant.get('BRAND_NAME', ''),
+        category=variant.get('CATEGORY_NAME', ''),
+        status=variant.get('PRODUCT_STATUS', 'Unknown')
+    )
+
+
+class SharedStyleCache:
+    """
+    Style results shared between scripts and runs
+
+    A JSON-lines file in the ResultJournal format. Transient statuses are
+    never stored, and entries older than max_age are ignored and dropped
+    from the file when it is opened.
+    """
+
+    def __init__(self, path: str = SHARED_CACHE_FILE, max_age: float = DEFAULT_CACHE_MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+        records, _ = replay_journal(path)
+        cutoff = time.time() - max_age
+        fresh = {style: record for style, record in records.items() if record.get('checked_at', 0) >= cutoff}
+        self.entries: Dict[str, StyleResult] = {style: StyleResult.from_dict(record)
+                                                for style, record in fresh.items()}
+        # style -> (checked_at, source), written back next to each entry
+        self.stamps: Dict[str, Tuple[float, str]] = {
+            style: (record['checked_at'], record.get('source', '')) for style, record in fresh.items()
+        }
+        if len(fresh) < len(records):
+            self._rewrite()
+        self._journal: Optional[ResultJournal] = None
+
+    def _record(self, style: str) -> Dict:
+        checked_at, source = self.stamps[style]
+        return {**self.entries[style]._asdict(), 'checked_at': checked_at, 'source': source}
+
+    def _rewrite(self) -> None:
+        temp = f"{self.path}.tmp"
+        with ResultJournal(temp) as journal:
+            for style in self.entries:
+                journal.record(style, self._record(style))
+        os.replace(temp, self.path)
+
+    def get(self, style: str, required: Sequence[str] = ()) -> Optional[StyleResult]:
+        """A fresh result that answers every required field, or None"""
+        entry = self.entries.get(style)
+        if entry is None or any(getattr(entry, field) is None for field in required):
+            return None
+        return entry._replace(retries=0)
+
+    def record_many(self, results: Dict[str, StyleResult], source: str) -> None:
+        """Store final (non-transient) results, stamped with the time and endpoint"""
+        keep = [style for style, result in results.items() if result.status not in RETRY_STATUSES]
+        if not keep:
+            return
+        if self._journal is None:
+            self._journal = ResultJournal(self.path, append=True)
+        checked_at = round(time.time(), 3)
+        for style in keep:
+            self.entries[style] = results[style]
+            self.stamps[style] = (checked_at, source)
+        self._journal.record_many({style: self._record(style) for style in keep})
+
+    def close(self) -> None:
+        if self._journal:
+            self._journal.close()
+
+
+class StyleValidator:
+    """Validate styles against the Caspio Pricing Proxy API"""
+
+    def __init__(self, base_url: str, endpoint: str = SEARCH, max_concurrent: int = DEFAULT_MAXIMUM,
+                 rate_limit: Optional[int] = None, target_latency: float = DEFAULT_TARGET_LATENCY,
+                 max_retries: int = DEFAULT_MAX_RETRIES, breaker: Optional[CircuitBreaker] = None,
+                 shared_cache: Optional[SharedStyleCache] = None, required: Sequence[str] = (),
+                 indent: str = ''):
+        """
+        Args:
+            base_url: API root (.../api)
+            endpoint: SEARCH or DETAILS
+            max_concurrent: Upper bound for the adaptive in-flight limit
+            rate_limit: Requests per minute, or None for no client-side limit
+            target_latency: Concurrency only grows while responses are faster
+            max_retries: Retries per style for transient failures
+            breaker: Circuit breaker (a default one when omitted)
+            shared_cache: Cross-script cache to read from and append to (closed with the validator)
+            required: Result fields a shared-cache entry must know to be reused
+            indent: Prefix for console lines (to match the calling script)
+        """
+        if endpoint not in (SEARCH, DETAILS):
+            raise ValueError(f"Unknown endpoint: {endpoint}")
+        self.base_url = base_url
+        self.endpoint = endpoint
+        self.rate_limit = rate_limit
+        self.required = tuple(required)
+        self.indent = indent
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.results_cache: Dict[str, StyleResult] = {}
+        self.shared_cache = shared_cache
+        self.shared_hits = 0
+        # In-flight requests adapt between 1 and max_concurrent (starting at 5)
+        self.limiter = AdaptiveLimiter(maximum=max_concurrent, target_latency=target_latency)
+        self.retry_policy = RetryPolicy(max_retries=max_retries)
+        # Fails calls fast while the API looks down
+        self.breaker = breaker or CircuitBreaker(indent=indent)
+        # Completed batches are appended here when set (see --resume); every
+        # style's result is journaled once, whether the API, a cache or a
+        # delta baseline answered it, so --merge can rebuild a run from journals alone
+        self.journal: Optional[ResultJournal] = None
+        self.journaled: Set[str] = set()
+        # Each style's result is written here as soon as it is known when set (see --stream)
+        self.stream: Optional[ResultStream] = None
+        self.metrics = ValidatorMetrics()
+        # style -> lookup in progress, shared by concurrent callers
+        self.in_flight: Dict[str, asyncio.Future] = {}
+        self.request_times: List[float] = []
+        # style -> (bytes read, bytes never downloaded or None when size unknown)
+        self.transfer_log: Dict[str, Tuple[int, Optional[int]]] = {}
+
+    async def __aenter__(self):
+        self.session = aiohttp.ClientSession()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self.session:
+            await self.session.close()
+        if self.shared_cache:
+            self.shared_cache.close()
+        self.metrics.short_circuited = self.breaker.short_circuited
+        self.metrics.stop()
+
+    async def rate_limit_wait(self):
+        """Ensure we don't exceed rate limit"""
+        now = time.time()
+        # Remove requests older than 60 seconds
+        self.request_times = [t for t in self.request_times if now - t < 60]
+
+        if len(self.request_times) >= self.rate_limit:
+            # Wait until oldest request is 60 seconds old
+            wait_time = 60 - (now - self.request_times[0])
+            if wait_time > 0:
+                print(f"{self.indent}[WAIT] Rate limit reached, waiting {wait_time:.1f}s...")
+                await asyncio.sleep(wait_time)
+                self.request_times = []
+
+        self.request_times.append(now)
+
+    def _url(self, style: str) -> str:
+        if self.endpoint == SEARCH:
+            return f"{self.base_url}/products/search?q={style}&limit=1"
+        # Same endpoint as the product.html page
+        return f"{self.base_url}/product-details?styleNumber={style}"
+
+    async def fetch_style(self, style: str) -> StyleResult:
+        """
+        One request for a style
+
+        Raises:
+            RetryableStatus: 408/429/5xx response (retried by the policy)
+            CircuitOpenError: The API circuit is open (no request sent)
+        """
+        # The breaker is asked once the slot is held, so styles queued while the
+        # circuit was closed are still skipped if it opened in the meantime
+        async with self.limiter.slot() as slot, self.breaker.guard():
+            if self.rate_limit:
+                # Wait for the per-minute budget before starting the latency clock
+                await self.rate_limit_wait()
+                slot.restart()
+
+            async with self.metrics.request() as timer, \
+                    self.session.get(self._url(style), timeout=REQUEST_TIMEOUT) as response:
+                slot.status = timer.status = response.status
+                check_response(response)
+                if response.status != 200:
+                    return StyleResult.make(status='API Error', error=f'HTTP {response.status}')
+
+                if self.endpoint == SEARCH:
+                    timer.bytes = len(await response.read())
+                    return parse_search(style, await response.json())
+
+                # Only the first color variant is used, so stop reading once
+                # it has been decoded
+                first = await read_first_element(response)
+                timer.bytes = first.bytes_read
+
+        self.transfer_log[style] = (first.bytes_read, first.bytes_saved)
+        if first.is_array:
+            return parse_details([first.value] if first.found else [])
+        return parse_details(first.value)
+
+    async def validate_style(self, style: str) -> StyleResult:
+        """
+        Validate style against API, retrying transient failures
+
+        Concurrent calls for the same style share a single lookup.
+
+        Args:
+            style: Cleaned style number
+
+        Returns:
+            StyleResult (including the retries used)
+        """
+        # Check cache first
+        if style in self.results_cache:
+            self.metrics.cache_hits += 1
+            return self.results_cache[style]
+        if style in self.in_flight:
+            self.metrics.coalesced += 1
+            return await asyncio.shield(self.in_flight[style])
+
+        self.metrics.cache_misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self.in_flight[style] = future
+        try:
+            result = await self._lookup(style)
+            future.set_result(result)
+            return result
+        except BaseException:
+            future.cancel()
+            raise
+        finally:
+            del self.in_flight[style]
+
+    async def _lookup(self, style: str) -> StyleResult:
+        """Uncached validation of one style (see validate_style)"""
+        def announce(error: BaseException, retry: int, wait: float):
+            print(f"{self.indent}[WAIT] {describe(error)} for {style}, "
+                  f"retry {retry}/{self.retry_policy.max_retries} in {wait:.1f}s...")
+
+        try:
+            result, retries = await self.retry_policy.run(lambda: self.fetch_style(style), on_retry=announce)
+
+        except RetryError as e:
+            retries = e.retries
+            if isinstance(e.error, CircuitOpenError):
+                status, error = CIRCUIT_OPEN_STATUS, str(e.error)
+            elif isinstance(e.error, asyncio.TimeoutError):
+                status, error = 'Timeout', 'Request timed out'
+            elif isinstance(e.error, RetryableStatus) and e.error.status == 429:
+                status, error = 'API Error', f'Rate limited after {retries} retries'
+            elif isinstance(e.error, RetryableStatus):
+                status, error = 'API Error', f'HTTP {e.error.status}'
+            else:
+                status, error = 'Error', str(e.error)
+            if e.reason == 'budget exhausted':
+                error += ' (retry budget exhausted)'
+            result = StyleResult.make(status=status, error=error)
+
+        # Skipped styles are not cached, so they are tried again if they come up later
+        result = result._replace(retries=retries)
+        self.metrics.retries += retries
+        self.metrics.styles += 1
+        if result.status != CIRCUIT_OPEN_STATUS:
+            self.results_cache[style] = result
+        return result
+
+    async def _validate_keyed(self, style: str) -> Tuple[str, StyleResult]:
+        result = await self.validate_style(style)
+        if self.stream:
+            self.stream.emit(style, result, 'api')
+        return style, result
+
+    def restore(self, records: Dict[str, Dict], journaled: bool = False) -> None:
+        """
+        Put journal records (plain dicts, see replay_journal) back into the run's cache
+
+        Args:
+            records: style -> result record
+            journaled: The records are already in this run's journal (--resume)
+        """
+        self.results_cache.update((style, StyleResult.from_dict(record)) for style, record in records.items())
+        if journaled:
+            self.journaled.update(records)
+
+    def _journal(self, results: Dict[str, StyleResult]) -> None:
+        """Append the results not yet in the journal"""
+        fresh = {style: result.to_dict() for style, result in results.items() if style not in self.journaled}
+        if self.journal and fresh:
+            self.journal.record_many(fresh)
+            # Skipped styles are looked up again if they come up later, so their next result is journaled too
+            self.journaled.update(style for style, result in results.items()
+                                  if style in fresh and result.status != CIRCUIT_OPEN_STATUS)
+
+    def _from_shared_cache(self, styles: List[str]) -> int:
+        """Copy fresh shared-cache entries for styles into the run's cache"""
+        if not self.shared_cache:
+            return 0
+        found = 0
+        for style in styles:
+            if style not in self.results_cache:
+                entry = self.shared_cache.get(style, self.required)
+                if entry is not None:
+                    self.results_cache[style] = entry
+                    found += 1
+        return found
+
+    async def validate_batch(self, styles: List[str], batch_size: int = 5) -> Dict[str, StyleResult]:
+        """
+        Validate multiple styles under the adaptive concurrency limit
+
+        Args:
+            styles: List of cleaned style numbers
+            batch_size: Completed styles per progress line / journal write
+
+        Returns:
+            Dictionary mapping style to StyleResult
+        """
+        # Styles validated earlier in this run or by either script are answered from the caches
+        self.shared_hits += self._from_shared_cache(styles)
+        results = {style: self.results_cache[style] for style in styles if style in self.results_cache}
+        styles = [style for style in styles if style not in results]
+        self.metrics.cache_hits += len(results)
+        if self.stream:
+            for style, result in results.items():
+                self.stream.emit(style, result, 'cache')
+        self._journal(results)
+
+        # Styles are started as earlier ones finish; the limiter decides how many are in flight
+        batches = (len(styles) + batch_size - 1) // batch_size
+        completed = as_completed_batches((self._validate_keyed(style) for style in styles), batch_size,
+                                         window=2 * self.limiter.maximum)
+        batch_no = 0
+        async for batch in completed:
+            batch_no += 1
+            print(f"{self.indent}[SEARCH] Validated batch {batch_no}/{batches} ({len(batch)} styles, "
+                  f"concurrency {self.limiter.current})...")
+            results.update(batch)
+            self._journal(dict(batch))
+            if self.shared_cache:
+                self.shared_cache.record_many(dict(batch), self.endpoint)
+
+        return results
+
+    def transfer_summary(self) -> Dict[str, int]:
+        """
+        Total bytes read vs. skipped by the first-variant streaming parse
+
+        bytes_saved covers only the responses whose size is known;
+        unknown_saved counts the others (compressed or without Content-Length).
+        """
+        return {
+            'bytes_read': sum(read for read, _ in self.transfer_log.values()),
+            'bytes_saved': sum(saved or 0 for _, saved in self.transfer_log.values()),
+            'unknown_saved': sum(1 for _, saved in self.transfer_log.values() if saved is None)
+        }
@@ -0,0 +1,275 @@
+"""
+Size and color validation from one /product-details fetch per style
+
+clean_style() splits ShopWorks part numbers like C112_OSFA, PC78H_2X or
+C865_L/XL into a style and a Size_Extracted suffix, but nothing checked that
+the catalog sells the style in that size. Asking the API once per (style,
+size) row would multiply the requests by the number of sizes.
+
+VariantFetcher downloads each style's /product-details once (the whole
+body, one row per color and size) under the same limiter, retry policy,
+circuit breaker and metrics as the validators. It keeps a VariantIndex of
+the sizes and colors each style comes in. resolve() then answers every
+(style, size) row from that index with no further requests, so a 10,000-row
+export with 300 distinct sized styles costs 300 requests.
+
+ShopWorks suffixes are mapped back to catalog sizes before the lookup: _2X
+is 2XL, and lowercase suffixes (_ss, _xxxl) are upper-cased. This mirrors
+SKUValidationService.SIZE_TO_SUFFIX in shared_components/js.
+
+Usage:
+    async with VariantFetcher(API_BASE) as fetcher:
+        await fetcher.load(styles)
+    df = df.join(fetcher.index.resolve(df['Style_Cleaned'], df['Size_Extracted']))
+
+Check a validated output CSV (Style_Cleaned and Size_Extracted columns):
+    python -m nwca_catalog.variants cleaned_top_sellers.csv
+"""
+
+import asyncio
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import aiohttp
+import pandas as pd
+
+from .breaker import CircuitBreaker
+from .concurrency import DEFAULT_MAXIMUM, AdaptiveLimiter, as_completed_batches
+from .metrics import ValidatorMetrics
+from .retry import DEFAULT_MAX_RETRIES, RetryError, RetryPolicy, check_response, describe
+
+REQUEST_TIMEOUT = 20       # seconds; the whole body is read, not just the first variant
+BATCH_SIZE = 25            # styles per progress line
+
+# ShopWorks suffix -> catalog SIZE, where they differ (after upper-casing)
+SUFFIX_SIZES = {'2X': '2XL'}
+# Sizes that are easy to confuse in ShopWorks (2XL is _2X on most styles, _XXL on ladies' styles)
+SIZE_LOOKALIKES = {'2XL': ['XXL'], 'XXL': ['2XL'], '3XL': ['XXXL'], 'XXXL': ['3XL'], 'OSFA': ['S/M', 'L/XL', 'M/L']}
+
+# Size_Status values
+SIZE_OK = 'ok'
+SIZE_INVALID = 'invalid size'
+SIZE_BASE = 'base'                  # no suffix: the S-XL base part, not checked
+STYLE_MISSING = 'style not found'
+UNCHECKED = 'unchecked'             # no product-details for the style (not fetched, or the fetch failed)
+
+VARIANT_COLUMNS = ['Size_Catalog', 'Size_Status', 'Sizes_Available', 'Size_Hint']
+
+
+def catalog_size(suffix: str) -> str:
+    """Catalog size for a ShopWorks size suffix ("2x" -> "2XL", "osfa" -> "OSFA")"""
+    size = suffix.strip().upper()
+    return SUFFIX_SIZES.get(size, size)
+
+
+class StyleVariants(NamedTuple):
+    """Sizes and colors of one style, in catalog order"""
+    sizes: Tuple[str, ...]
+    colors: Tuple[str, ...]
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict]) -> 'StyleVariants':
+        sizes = dict.fromkeys(str(row.get('SIZE', '')).strip().upper() for row in rows)
+        colors = dict.fromkeys(str(row.get('COLOR_NAME') or row.get('CATALOG_COLOR') or '').strip() for row in rows)
+        sizes.pop('', None)
+        colors.pop('', None)
+        return cls(tuple(sizes), tuple(colors))
+
+
+class VariantIndex:
+    """Available sizes and colors per style (None = the catalog has no such style)"""
+
+    def __init__(self):
+        self.styles: Dict[str, Optional[StyleVariants]] = {}
+        self.errors: Dict[str, str] = {}
+
+    def __contains__(self, style: str) -> bool:
+        return style in self.styles
+
+    def __len__(self) -> int:
+        return len(self.styles)
+
+    def add(self, style: str, rows) -> None:
+        """Index one /product-details response (an array of variant rows; empty = not found)"""
+        if isinstance(rows, list) and rows:
+            self.styles[style] = StyleVariants.from_rows(rows)
+        else:
+            self.styles[style] = None
+        self.errors.pop(style, None)
+
+    def check(self, style: str, suffix: str) -> Tuple[str, str, str, str]:
+        """
+        Resolve one (style, size suffix) pair
+
+        Returns:
+            (catalog size, status, available sizes, hint), the VARIANT_COLUMNS
+        """
+        size = catalog_size(suffix)
+        if not size:
+            return size, SIZE_BASE, '', ''
+        if style not in self.styles:
+            return size, UNCHECKED, '', self.errors.get(style, '')
+        variants = self.styles[style]
+        if variants is None:
+            return size, STYLE_MISSING, '', ''
+        available = ', '.join(variants.sizes)
+        if size in variants.sizes:
+            return size, SIZE_OK, available, ''
+        lookalikes = [s for s in SIZE_LOOKALIKES.get(size, []) if s in variants.sizes]
+        hint = f"catalog has {' / '.join(lookalikes)}" if lookalikes else ''
+        return size, SIZE_INVALID, available, hint
+
+    def resolve(self, styles: pd.Series, suffixes: pd.Series) -> pd.DataFrame:
+        """
+        VARIANT_COLUMNS for every row, aligned to styles.index
+
+        Each distinct (style, suffix) pair is checked once and the answers are
+        joined back onto the rows.
+        """
+        pairs = pd.DataFrame({'style': styles.astype(str), 'suffix': suffixes.fillna('').astype(str)})
+        unique = pairs.drop_duplicates()
+        checked = pd.DataFrame([self.check(style, suffix) for style, suffix in
+                                zip(unique['style'].tolist(), unique['suffix'].tolist())],
+                               columns=VARIANT_COLUMNS)
+        checked[['style', 'suffix']] = unique.to_numpy()
+        resolved = pairs.merge(checked, on=['style', 'suffix'], how='left')
+        resolved.index = styles.index
+        return resolved[VARIANT_COLUMNS]
+
+
+class VariantFetcher:
+    """Fetch /product-details once per style into a VariantIndex"""
+
+    def __init__(self, base_url: str, max_concurrent: int = DEFAULT_MAXIMUM,
+                 max_retries: int = DEFAULT_MAX_RETRIES, breaker: Optional[CircuitBreaker] = None,
+                 indent: str = ''):
+        """
+        Args:
+            base_url: API root (.../api)
+            max_concurrent: Upper bound for the adaptive in-flight limit
+            max_retries: Retries per style for transient failures
+            breaker: Circuit breaker (a default one when omitted)
+            indent: Prefix for console lines (to match the calling script)
+        """
+        self.base_url = base_url
+        self.indent = indent
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.index = VariantIndex()
+        self.limiter = AdaptiveLimiter(maximum=max_concurrent)
+        self.retry_policy = RetryPolicy(max_retries=max_retries)
+        self.breaker = breaker or CircuitBreaker(indent=indent)
+        self.metrics = ValidatorMetrics()
+
+    async def __aenter__(self) -> 'VariantFetcher':
+        self.session = aiohttp.ClientSession()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        if self.session:
+            await self.session.close()
+        self.metrics.short_circuited = self.breaker.short_circuited
+        self.metrics.stop()
+
+    async def fetch_rows(self, style: str):
+        """
+        One /product-details request, whole body
+
+        Raises:
+            RetryableStatus: 408/429/5xx response (retried by the policy)
+            CircuitOpenError: The API circuit is open (no request sent)
+        """
+        url = f"{self.base_url}/product-details"
+        # Breaker after the slot, as in StyleValidator.fetch_style
+        async with self.limiter.slot() as slot, self.breaker.guard():
+            async with self.metrics.request() as timer, \
+                    self.session.get(url, params={'styleNumber': style}, timeout=REQUEST_TIMEOUT) as response:
+                slot.status = timer.status = response.status
+                check_response(response)
+                if response.status != 200:
+                    raise aiohttp.ClientResponseError(response.request_info, (), status=response.status)
+                timer.bytes = len(await response.read())
+                return await response.json()
+
+    async def _load_one(self, style: str) -> None:
+        try:
+            rows, retries = await self.retry_policy.run(lambda: self.fetch_rows(style))
+        except RetryError as e:
+            self.metrics.retries += e.retries
+            self.index.errors[style] = f"product-details failed: {describe(e.error)}"
+            return
+        self.metrics.retries += retries
+        self.metrics.styles += 1
+        self.index.add(style, rows)
+
+    async def load(self, styles: Iterable[str]) -> int:
+        """
+        Fetch every style not yet indexed (one request each, plus retries)
+
+        Returns:
+            Number of styles fetched
+        """
+        unique = list(dict.fromkeys(styles))
+        pending = [style for style in unique if style not in self.index]
+        self.metrics.cache_hits += len(unique) - len(pending)
+        self.metrics.cache_misses += len(pending)
+        batches = (len(pending) + BATCH_SIZE - 1) // BATCH_SIZE
+        batch_no = 0
+        async for batch in as_completed_batches((self._load_one(style) for style in pending), BATCH_SIZE,
+                                               window=2 * self.limiter.maximum):
+            batch_no += 1
+            print(f"{self.indent}[VARIANTS] Indexed batch {batch_no}/{batches} ({len(batch)} styles, "
+                  f"concurrency {self.limiter.current})...")
+        return len(pending)
+
+    def summary(self) -> str:
+        found = sum(1 for variants in self.index.styles.values() if variants is not None)
+        failed = len(self.index.errors)
+        return (f"{len(self.index)} style(s) indexed ({found} in the catalog"
+                + (f", {failed} failed" if failed else "") + f"), {self.metrics.summary()}")
+
+
+def count_statuses(resolved: pd.DataFrame) -> Dict[str, int]:
+    """Rows per Size_Status"""
+    return resolved['Size_Status'].value_counts().to_dict()
+
+
+async def _check_csv(path: str, base_url: str, max_concurrent: int, out: Optional[str]) -> int:
+    df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    missing = [column for column in ('Style_Cleaned', 'Size_Extracted') if column not in df.columns]
+    if missing:
+        print(f"[ERROR] {path}: missing column(s) {', '.join(missing)}")
+        return 1
+    sized = df['Size_Extracted'].str.strip() != ''
+    styles = df.loc[sized, 'Style_Cleaned'].unique().tolist()
+    print(f"[INFO] {path}: {len(df):,} rows, {int(sized.sum()):,} with a size suffix, "
+          f"{len(styles):,} style(s) to fetch")
+    async with VariantFetcher(base_url, max_concurrent) as fetcher:
+        await fetcher.load(styles)
+    print(f"[INFO] {fetcher.summary()}")
+
+    # Re-checking an earlier --variants output replaces its size columns
+    df = df.drop(columns=VARIANT_COLUMNS, errors='ignore')
+    df = df.join(fetcher.index.resolve(df['Style_Cleaned'], df['Size_Extracted']))
+    for status, count in count_statuses(df).items():
+        print(f"   {status}: {count}")
+    invalid = df[df['Size_Status'] == SIZE_INVALID]
+    for row in invalid[['Style_Cleaned', 'Size_Extracted', 'Sizes_Available', 'Size_Hint']].itertuples(index=False):
+        print(f"[WARN] {row.Style_Cleaned}_{row.Size_Extracted}: not sold in that size "
+              f"(sizes: {row.Sizes_Available or 'none listed'}){' - ' + row.Size_Hint if row.Size_Hint else ''}")
+    if out:
+        df.to_csv(out, index=False)
+        print(f"[OK] Saved: {out}")
+    return 0
+
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('csv', help="Validated output with Style_Cleaned and Size_Extracted columns")
+    parser.add_argument('--api', default="https://caspio-pricing-proxy-ab30a049961a.herokuapp.com/api",
+                        help="API root")
+    parser.add_argument('--max-concurrency', type=int, default=DEFAULT_MAXIMUM)
+    parser.add_argument('--out', help="Write the rows with the size columns added to this CSV")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(_check_csv(args.csv, args.api, args.max_concurrency, args.out)))
@@ -0,0 +1,134 @@
+"""
+Vendor detection from style number prefixes
+
+Prefixes live in one table (vendor_prefixes.csv next to this module) shared
+by both validation scripts. They are compiled into a trie and matched
+longest-prefix-first, so "CT" (Carhartt) wins over "C" (Port Authority)
+without relying on if/elif order. The table is checked for conflicting or
+malformed rows when it is loaded.
+"""
+
+import csv
+import os
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+VENDOR_TABLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'vendor_prefixes.csv')
+UNKNOWN_VENDOR = 'Unknown'
+
+
+class PrefixTrie:
+    """Longest-prefix-match trie mapping style prefixes to vendors"""
+
+    def __init__(self):
+        self.root: Dict = {}
+        self.size = 0
+
+    def insert(self, prefix: str, vendor: str) -> Optional[str]:
+        """
+        Add a prefix; returns the vendor it was already mapped to, if any
+
+        Prefixes are matched case-insensitively.
+        """
+        node = self.root
+        for ch in prefix.upper():
+            node = node.setdefault(ch, {})
+        existing = node.get(None)
+        if existing is None:
+            self.size += 1
+        node[None] = vendor
+        return existing
+
+    def match(self, style: str, default: str = UNKNOWN_VENDOR) -> str:
+        """Vendor for the longest table prefix of style"""
+        node = self.root
+        best = default
+        for ch in str(style).upper():
+            node = node.get(ch)
+            if node is None:
+                break
+            best = node.get(None, best)
+        return best
+
+    def by_length(self) -> Dict[int, Dict[str, str]]:
+        """Flatten to {prefix length: {prefix: vendor}} for column matching"""
+        levels: Dict[int, Dict[str, str]] = {}
+        stack = [('', self.root)]
+        while stack:
+            prefix, node = stack.pop()
+            for key, child in node.items():
+                if key is None:
+                    levels.setdefault(len(prefix), {})[prefix] = child
+                else:
+                    stack.append((prefix + key, child))
+        return levels
+
+    def classify(self, styles: pd.Series, default: str = UNKNOWN_VENDOR) -> pd.Series:
+        """
+        Vendor for every style in a Series
+
+        Styles are factorized so each distinct value is matched once; the
+        distinct values are then grouped by their length-L prefix and mapped
+        with one dict lookup per table prefix length, longest first.
+        """
+        codes, uniques = pd.factorize(styles.fillna('').astype(str).str.upper())
+        uniques = pd.Series(uniques, dtype=object)
+        vendors = pd.Series(pd.NA, index=uniques.index, dtype=object)
+
+        for length, table in sorted(self.by_length().items(), reverse=True):
+            pending = vendors.isna()
+            if not pending.any():
+                break
+            candidates = uniques[pending]
+            candidates = candidates[candidates.str.len() >= length]
+            vendors.loc[candidates.index] = candidates.str[:length].map(table)
+
+        vendors = vendors.fillna(default).to_numpy()
+        return pd.Series(vendors[codes], index=styles.index, dtype=object)
+
+
+def load_vendor_trie(path: str = VENDOR_TABLE) -> PrefixTrie:
+    """
+    Compile the prefix table into a trie
+
+    Raises:
+        ValueError: Blank prefixes/vendors or a prefix listed for two vendors
+    """
+    trie = PrefixTrie()
+    seen: Dict[str, str] = {}
+    problems: List[str] = []
+
+    with open(path, newline='', encoding='utf-8') as f:
+        for line, row in enumerate(csv.DictReader(f), start=2):
+            prefix = (row.get('prefix') or '').strip().upper()
+            vendor = (row.get('vendor') or '').strip()
+            if not prefix or not vendor:
+                problems.append(f"line {line}: prefix and vendor are both required")
+                continue
+            if prefix in seen and seen[prefix] != vendor:
+                problems.append(f"line {line}: {prefix} maps to both {seen[prefix]} and {vendor}")
+                continue
+            seen[prefix] = vendor
+            trie.insert(prefix, vendor)
+
+    if problems:
+        raise ValueError(f"{path}: " + '; '.join(problems))
+    return trie
+
+
+@lru_cache(maxsize=None)
+def vendor_trie() -> PrefixTrie:
+    """Shared trie for the default table (loaded once per process)"""
+    return load_vendor_trie()
+
+
+def detect_vendor(style: str) -> str:
+    """Vendor for a single cleaned style number"""
+    return vendor_trie().match(style)
+
+
+def detect_vendors(styles: pd.Series) -> pd.Series:
+    """Vendor for each cleaned style number in a Series"""
+    return vendor_trie().classify(styles)
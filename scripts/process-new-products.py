@@ -4,20 +4,87 @@ Validates 60 new product styles against Caspio Pricing Proxy API
 Generates reports and SQL statements for marking products as isNew=true
 
 Usage:
-    python scripts/process-new-products.py
+    python scripts/process-new-products.py                     # embedded CSV_DATA
+    python scripts/process-new-products.py -i export.csv.gz    # file, glob or '-' for stdin
+    python scripts/process-new-products.py --resume            # continue an interrupted run
 """
 
+import argparse
 import pandas as pd
 import asyncio
-import aiohttp
-from typing import Dict, List, Tuple, Optional
-from dataclasses import dataclass, field
-from collections import defaultdict
-import time
+import contextlib
+from typing import Dict, Iterator, List, Tuple, Optional
+from collections import Counter, defaultdict
+import os
+import sys
+
+from nwca_catalog.breaker import DEFAULT_COOLDOWN, DEFAULT_FAILURE_RATE, CircuitBreaker
+from nwca_catalog.cleaning import clean_styles
+from nwca_catalog.clusters import cluster_descriptions, cluster_members, cluster_summary
+from nwca_catalog.concurrency import DEFAULT_MAXIMUM, DEFAULT_TARGET_LATENCY
+from nwca_catalog.delta import DeltaBaseline
+from nwca_catalog.flags import FLAGS, FlagPlan
+from nwca_catalog.ingest import DEFAULT_CHUNK_SIZE, ChunkDeduper, iter_csv_chunks
+from nwca_catalog.journal import ResultJournal, cancel_on_sigint, replay_journal
+from nwca_catalog.ndjson import STDOUT, ResultStream
+from nwca_catalog.output import PartitionedWriter, parquet_available, parquet_path
+from nwca_catalog.pipeline import DEFAULT_DEPTH, run_pipeline
+from nwca_catalog.report import did_you_mean, render_blocks, truthy, write_blocks, write_grouped
+from nwca_catalog.results import join_results, results_frame
+from nwca_catalog.retry import DEFAULT_MAX_RETRIES
+from nwca_catalog.shard import Shard, load_shard_results, merge_shard_metrics
+from nwca_catalog.suggest import build_index, suggestion_rows
+from nwca_catalog.validation import (DEFAULT_CACHE_MAX_AGE, DETAILS, SHARED_CACHE_FILE, SharedStyleCache,
+                                     StyleCleaner, StyleValidator)
+from nwca_catalog.vendors import detect_vendors
 
 # API Configuration
 API_BASE = "https://caspio-pricing-proxy-ab30a049961a.herokuapp.com/api"
 
+# Optional catalog export (STYLE, PRODUCT_TITLE) used for near-miss suggestions
+CATALOG_FILE = "catalog_styles.csv"
+SUGGESTION_COUNT = 5
+
+# Limit changes of the adaptive concurrency controller
+CONCURRENCY_TRACE_FILE = "new_products_concurrency.csv"
+
+# Completed validations, one JSON line per style (replayed by --resume)
+JOURNAL_FILE = "new_products_journal.jsonl"
+
+# Request counts, latency percentiles and cache figures for the run
+METRICS_FILE = "new_products_metrics.json"
+
+# Requests per minute allowed against /product-details
+RATE_LIMIT = 30
+
+# Columns that identify a row of the previous output read by --delta
+DELTA_COLUMNS = ['Style_Cleaned', 'Description', 'Category']
+
+# Columns an --input file must provide
+INPUT_COLUMNS = ['Style', 'Description', 'Category']
+
+# Combined and per-status output CSVs, written in one pass per chunk
+# (partitions in order: not found, needs flag, already flagged)
+OUTPUT_FILES = {
+    'complete': 'cleaned_new_products.csv',
+    'not_found': 'new_products_not_found.csv',
+    'need_flag': 'new_products_need_flag.csv',
+    'already_new': 'new_products_already_new.csv'
+}
+# Their header when no rows reach the writer (empty input, or a shard with no styles)
+OUTPUT_COLUMNS = ['Style_Original', 'Description', 'Category', 'Style_Cleaned', 'Size_Extracted', 'Vendor_Detected',
+                  'API_Exists', 'API_IsNew', 'API_BestSeller', 'API_Title', 'API_Brand', 'API_Category',
+                  'API_Status', 'API_Error', 'API_Retries', 'API_Bytes_Saved']
+
+# Batched isNew updates (<base>.sql and <base>.json)
+FLAG_UPDATES = 'new_products_flag_updates'
+
+# Rows whose descriptions are near-duplicates of another row's in the same category (--clusters)
+CLUSTERS_FILE = 'new_products_description_clusters.csv'
+CLUSTER_INPUT_COLUMNS = ['Style_Original', 'Style_Cleaned', 'Description', 'Category', 'API_Exists']
+CLUSTER_OUTPUT_COLUMNS = ['Cluster', 'Canonical', 'Similarity', 'Style_Original', 'Style_Cleaned', 'Description',
+                          'Description_Normalized', 'Category', 'API_Exists']
+
 # New Products CSV Data (60 products)
 CSV_DATA = """Style,Description,Category
 EB120,Eddie Bauer® Adventurer 1/4-Zip,Outerwear/Jackets
@@ -82,251 +149,84 @@ CS410,CornerStone® Duck Cloth Work Pant,Apparel
 CS415,CornerStone® Work Gloves,Accessories"""
 
 
-@dataclass
-class StyleCleaner:
-    """Clean and normalize style numbers"""
-
-    @staticmethod
-    def clean_style(style: str) -> Tuple[str, str]:
-        """
-        Clean style number and extract size if present
-
-        Examples:
-            "C112_OSFA" -> ("C112", "OSFA")
-            "CT104597_OSFA" -> ("CT104597", "OSFA")
-            "PC54" -> ("PC54", "")
-        """
-        if '_' in style:
-            parts = style.split('_', 1)  # Split on first underscore only
-            return parts[0].strip(), parts[1].strip()
-        return style.strip(), ''
-
-    @staticmethod
-    def detect_vendor(style: str) -> str:
-        """Detect vendor from style prefix"""
-        style_upper = style.upper()
-
-        if style_upper.startswith('PC'):
-            return 'Port & Company'
-        elif style_upper.startswith('BC'):
-            return 'Bella+Canvas'
-        elif style_upper.startswith('C') and not style_upper.startswith('CT') and not style_upper.startswith('CS'):
-            return 'Port Authority'
-        elif style_upper.startswith('CT'):
-            return 'Carhartt'
-        elif style_upper.startswith('DT'):
-            return 'District'
-        elif style_upper.startswith('EB'):
-            return 'Eddie Bauer'
-        elif style_upper.startswith('NE'):
-            return 'New Era'
-        elif style_upper.startswith('NK'):
-            return 'Nike'
-        elif style_upper.startswith('ST'):
-            return 'Sport-Tek'
-        elif style_upper.startswith('TM'):
-            return 'TravisMathew'
-        elif style_upper.startswith('S'):
-            return 'Port Authority'
-        elif style_upper.startswith('NF'):
-            return 'The North Face'
-        elif style_upper.startswith('BB'):
-            return 'Brooks Brothers'
-        elif style_upper.startswith('OG'):
-            return 'OGIO'
-        elif style_upper.startswith('CS'):
-            return 'CornerStone'
-        else:
-            return 'Unknown'
-
-
-class APIValidator:
-    """Validate styles against Caspio API with rate limiting"""
-
-    def __init__(self, base_url: str, max_concurrent: int = 5, rate_limit: int = 30):
-        self.base_url = base_url
-        self.max_concurrent = max_concurrent
-        self.rate_limit = rate_limit
-        self.session: Optional[aiohttp.ClientSession] = None
-        self.results_cache: Dict[str, Dict] = {}
-        self.request_times: List[float] = []
-
-    async def __aenter__(self):
-        self.session = aiohttp.ClientSession()
-        return self
-
-    async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
-            await self.session.close()
-
-    async def rate_limit_wait(self):
-        """Ensure we don't exceed rate limit"""
-        now = time.time()
-        # Remove requests older than 60 seconds
-        self.request_times = [t for t in self.request_times if now - t < 60]
-
-        if len(self.request_times) >= self.rate_limit:
-            # Wait until oldest request is 60 seconds old
-            wait_time = 60 - (now - self.request_times[0])
-            if wait_time > 0:
-                print(f"[WAIT] Rate limit reached, waiting {wait_time:.1f}s...")
-                await asyncio.sleep(wait_time)
-                self.request_times = []
-
-        self.request_times.append(now)
-
-    async def validate_style(self, style: str, retry=0) -> Dict:
-        """Validate style against API with retry logic"""
-        if style in self.results_cache:
-            return self.results_cache[style]
-
-        try:
-            await self.rate_limit_wait()
-
-            # Use product-details endpoint (same as product.html page)
-            url = f"{self.base_url}/product-details?styleNumber={style}"
-            async with self.session.get(url, timeout=10) as response:
-                if response.status == 200:
-                    data = await response.json()
-
-                    # product-details returns array of color variants
-                    if isinstance(data, list) and len(data) > 0:
-                        # Product exists - extract info from first color variant
-                        first_variant = data[0]
-                        result = {
-                            'exists': True,
-                            'api_is_new': first_variant.get('isNew', False),
-                            'api_best_seller': first_variant.get('isBestSeller', False),
-                            'title': first_variant.get('PRODUCT_TITLE', ''),
-                            'brand': first_variant.get('BRAND_NAME', ''),
-                            'category': first_variant.get('CATEGORY_NAME', ''),
-                            'status': first_variant.get('PRODUCT_STATUS', 'Unknown'),
-                            'error': None
-                        }
-                    else:
-                        # Empty array = product not found
-                        result = {
-                            'exists': False,
-                            'api_is_new': False,
-                            'api_best_seller': False,
-                            'title': '',
-                            'brand': '',
-                            'category': '',
-                            'status': 'Not Found',
-                            'error': None
-                        }
-
-                    self.results_cache[style] = result
-                    return result
-
-                elif response.status == 429:  # Rate limited
-                    if retry < 3:
-                        wait_time = (retry + 1) * 5
-                        print(f"[WARN] Rate limited for {style}, retry {retry + 1}/3 in {wait_time}s")
-                        await asyncio.sleep(wait_time)
-                        return await self.validate_style(style, retry + 1)
-                    else:
-                        result = {
-                            'exists': False,
-                            'api_is_new': False,
-                            'api_best_seller': False,
-                            'title': '',
-                            'brand': '',
-                            'category': '',
-                            'status': 'Error',
-                            'error': f"Rate limited after {retry + 1} retries"
-                        }
-                        self.results_cache[style] = result
-                        return result
-                else:
-                    result = {
-                        'exists': False,
-                        'api_is_new': False,
-                        'api_best_seller': False,
-                        'title': '',
-                        'brand': '',
-                        'category': '',
-                        'status': 'Error',
-                        'error': f"API returned status {response.status}"
-                    }
-                    self.results_cache[style] = result
-                    return result
-
-        except asyncio.TimeoutError:
-            result = {
-                'exists': False,
-                'api_is_new': False,
-                'api_best_seller': False,
-                'title': '',
-                'brand': '',
-                'category': '',
-                'status': 'Error',
-                'error': 'Request timeout'
-            }
-            self.results_cache[style] = result
-            return result
-
-        except Exception as e:
-            result = {
-                'exists': False,
-                'api_is_new': False,
-                'api_best_seller': False,
-                'title': '',
-                'brand': '',
-                'category': '',
-                'status': 'Error',
-                'error': str(e)
-            }
-            self.results_cache[style] = result
-            return result
-
-    async def validate_batch(self, styles: List[str]) -> Dict[str, Dict]:
-        """Validate multiple styles with concurrency control"""
-        results = {}
-
-        # Process in batches
-        for i in range(0, len(styles), self.max_concurrent):
-            batch = styles[i:i + self.max_concurrent]
-            print(f"[SEARCH] Validating batch {i//self.max_concurrent + 1}/{(len(styles) + self.max_concurrent - 1)//self.max_concurrent} ({len(batch)} styles)...")
-
-            # Process batch concurrently
-            tasks = [self.validate_style(style) for style in batch]
-            batch_results = await asyncio.gather(*tasks)
-
-            # Store results
-            for style, result in zip(batch, batch_results):
-                results[style] = result
-
-        return results
+def saved_unknown_note(count: int) -> str:
+    """Caveat for a bytes-saved total that leaves out compressed or unsized responses"""
+    if not count:
+        return ''
+    return f" (unknown for {count:,} compressed or unsized response(s))"
 
 
 class NewProductProcessor:
     """Main processor for new products validation"""
 
-    def __init__(self):
+    def __init__(self, sources: Optional[List[str]] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 queue_depth: int = DEFAULT_DEPTH, journal_path: str = JOURNAL_FILE, resume: bool = False,
+                 max_concurrent: int = DEFAULT_MAXIMUM, target_latency: float = DEFAULT_TARGET_LATENCY,
+                 max_retries: int = DEFAULT_MAX_RETRIES, breaker_threshold: float = DEFAULT_FAILURE_RATE,
+                 breaker_cooldown: float = DEFAULT_COOLDOWN, delta_path: Optional[str] = None,
+                 shared_cache_path: Optional[str] = SHARED_CACHE_FILE,
+                 cache_max_age: float = DEFAULT_CACHE_MAX_AGE, parquet: bool = False,
+                 stream_path: Optional[str] = None,
+                 shard: Optional[Shard] = None, merge_dirs: Optional[List[str]] = None,
+                 find_clusters: bool = False):
         self.cleaner = StyleCleaner()
         self.stats = defaultdict(int)
+        # Written by the producer thread only (self.stats belongs to the event loop)
+        self.read_stats = defaultdict(int)
+        self.suggestions = pd.DataFrame()
+        self.sources = sources or []
+        self.chunk_size = chunk_size
+        self.queue_depth = queue_depth
+        self.journal_path = journal_path
+        self.resume = resume
+        # A shard gets its share of the request budget
+        self.max_concurrent = shard.share(max_concurrent) if shard else max_concurrent
+        self.rate_limit = shard.share(RATE_LIMIT) if shard else RATE_LIMIT
+        self.target_latency = target_latency
+        self.max_retries = max_retries
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.delta_path = delta_path
+        self.shared_cache_path = shared_cache_path
+        self.cache_max_age = cache_max_age
+        self.parquet = parquet
+        self.stream_path = stream_path
+        self.shard = shard
+        self.merge_dirs = merge_dirs or []
+        self.find_clusters = find_clusters
+        self.delta: Optional[DeltaBaseline] = None
+
+        # Cross-chunk state: dedupe keys, per-group counters, and the rows the
+        # report lists individually (everything else is streamed to disk)
+        self.deduper = ChunkDeduper(['Style_Cleaned', 'Category'])
+        self.counts: Dict[str, Counter] = defaultdict(Counter)
+        self.not_found_parts: List[pd.DataFrame] = []
+        self.need_flag_parts: List[pd.DataFrame] = []
+        self.cluster_parts: List[pd.DataFrame] = []
+        self.duplicates = pd.DataFrame(columns=CLUSTER_OUTPUT_COLUMNS)
+        self.writer: Optional[PartitionedWriter] = None
+        self.breaker_lines: List[str] = []
+        self.metrics_lines: List[str] = []
 
     def load_data(self) -> pd.DataFrame:
         """Load CSV data from embedded string"""
         from io import StringIO
-        print("[DATA] Loading CSV data...")
-        df = pd.read_csv(StringIO(CSV_DATA))
-        self.stats['total_original'] = len(df)
-        print(f"[OK] Loaded {len(df)} products")
-        return df
+        return pd.read_csv(StringIO(CSV_DATA))
+
+    def iter_chunks(self) -> Iterator[pd.DataFrame]:
+        """Yield input chunks from --input files/stdin, or the embedded CSV as one chunk"""
+        if self.sources:
+            yield from iter_csv_chunks(self.sources, self.chunk_size, required=INPUT_COLUMNS)
+        else:
+            yield self.load_data()
 
     def clean_data(self, df: pd.DataFrame) -> pd.DataFrame:
         """Clean style numbers and extract sizes"""
-        print("[CLEAN] Cleaning style numbers...")
-
-        # Apply cleaning
-        cleaning_results = df['Style'].apply(self.cleaner.clean_style)
-        df['Style_Cleaned'] = cleaning_results.apply(lambda x: x[0])
-        df['Size_Extracted'] = cleaning_results.apply(lambda x: x[1])
+        # Apply cleaning (column form of StyleCleaner.clean_style)
+        df[['Style_Cleaned', 'Size_Extracted']] = clean_styles(df['Style'])
 
         # Detect vendors
-        df['Vendor_Detected'] = df['Style_Cleaned'].apply(self.cleaner.detect_vendor)
+        df['Vendor_Detected'] = detect_vendors(df['Style_Cleaned'])
 
         # Rename original columns
         df = df.rename(columns={
@@ -335,75 +235,151 @@ class NewProductProcessor:
             'Category': 'Category'
         })
 
-        print(f"[OK] Cleaned {len(df)} products")
         return df
 
     def remove_duplicates(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Remove duplicate style + category combinations"""
-        print("[PROCESS] Removing duplicates...")
+        """Remove style + category combinations already seen in this or an earlier chunk"""
         before = len(df)
+        df = self.deduper.filter(df)
+        self.read_stats['duplicates_removed'] += before - len(df)
+        self.read_stats['total_cleaned'] += len(df)
+        return df
 
-        df = df.drop_duplicates(subset=['Style_Cleaned', 'Category'], keep='first')
+    def prepare_chunk(self, df: pd.DataFrame) -> Tuple[int, int, pd.DataFrame]:
+        """
+        Clean and de-duplicate one input chunk (runs in the producer thread)
 
-        after = len(df)
-        duplicates_removed = before - after
-        self.stats['duplicates_removed'] = duplicates_removed
-        self.stats['total_cleaned'] = after
+        Returns:
+            (chunk number, rows loaded, prepared chunk)
+        """
+        self.read_stats['chunks'] += 1
 
-        if duplicates_removed > 0:
-            print(f"[OK] Removed {duplicates_removed} duplicates ({after} unique products)")
-        else:
-            print(f"[OK] No duplicates found ({after} unique products)")
+        # 2. Clean data (with --shard, only this shard's styles are kept)
+        df = self.clean_data(df)
+        if self.shard:
+            df = self.shard.select(df)
+        self.read_stats['total_original'] += len(df)
+        rows_in = len(df)
+
+        # 3. Remove duplicates
+        df = self.remove_duplicates(df)
+        return self.read_stats['chunks'], rows_in, df
+
+    def open_journal(self, validator: StyleValidator) -> ResultJournal:
+        """Replay the journal into the validator cache (--resume) and open it for appending"""
+        if self.resume:
+            cache, skipped = replay_journal(self.journal_path)
+            validator.restore(cache, journaled=True)
+            note = f" ({skipped} unreadable line(s) skipped)" if skipped else ""
+            print(f"[INFO] Resumed {len(cache):,} validated style(s) from {self.journal_path}{note}")
+        if self.merge_dirs:
+            merged = load_shard_results(self.merge_dirs, os.path.basename(self.journal_path))
+            validator.restore(merged)
+            print(f"[INFO] Merging {len(merged):,} style result(s) from {len(self.merge_dirs)} shard(s)")
+        validator.journal = ResultJournal(self.journal_path, append=self.resume)
+        return validator.journal
+
+    def open_shared_cache(self) -> Optional[SharedStyleCache]:
+        """Results either script validated recently (None with --no-shared-cache or --merge)"""
+        if not self.shared_cache_path or self.merge_dirs:
+            # A merge reports what the shards saw; their journals hold every result they used
+            return None
+        shared = SharedStyleCache(self.shared_cache_path, self.cache_max_age)
+        print(f"[INFO] Shared cache: {len(shared.entries):,} fresh style(s) in {self.shared_cache_path}")
+        return shared
+
+    def open_writer(self) -> PartitionedWriter:
+        """Output files for the validated chunks (CSV, plus Parquet with --parquet when pyarrow is installed)"""
+        parquet = self.parquet
+        if parquet and not parquet_available():
+            print("[WARN] --parquet needs pyarrow (pip install pyarrow) - writing CSV only")
+            parquet = False
+        partitions = {name: path for name, path in OUTPUT_FILES.items() if name != 'complete'}
+        self.writer = PartitionedWriter(OUTPUT_FILES['complete'], partitions, parquet=parquet,
+                                        columns=OUTPUT_COLUMNS)
+        return self.writer
+
+    def open_stream(self, validator: StyleValidator):
+        """Stream each style's result as NDJSON while the run is in progress (--stream)"""
+        if not self.stream_path:
+            return contextlib.nullcontext()
+        validator.stream = ResultStream(self.stream_path)
+        print(f"[INFO] Streaming results to {validator.stream.name}")
+        return validator.stream
+
+    def load_delta(self) -> Optional[DeltaBaseline]:
+        """Read the previous run's output for --delta (None validates every style)"""
+        if not self.delta_path:
+            return None
+        try:
+            baseline = DeltaBaseline.load(self.delta_path, DELTA_COLUMNS)
+        except (OSError, ValueError) as e:
+            print(f"[WARN] No delta baseline ({e}) - validating every style")
+            return None
+        print(f"[INFO] Delta baseline: {len(baseline.results):,} style(s) from {self.delta_path}")
+        return baseline
+
+    async def validate_products(self, df: pd.DataFrame, validator: StyleValidator) -> pd.DataFrame:
+        """Validate a chunk of products against API (styles seen before come from the cache)"""
+        if self.delta:
+            self.delta.carry_forward(df, validator.results_cache)
+        validation_results = await validator.validate_batch(df['Style_Cleaned'].unique().tolist())
+        if self.delta:
+            self.delta.record(validation_results)
+
+        # Join results back onto the products in one pass
+        frame = results_frame(validation_results)
+        frame['API_Bytes_Saved'] = pd.Series(
+            {style: validator.transfer_log.get(style, (0, None))[1] for style in validation_results},
+            dtype='Int64'
+        ).reindex(frame.index)
+        df = join_results(df, frame)
+
+        # Accumulate stats
+        found = int(df['API_Exists'].sum())
+        self.stats['found_in_api'] += found
+        self.stats['not_found_in_api'] += len(df) - found
+        self.stats['already_new'] += int((df['API_Exists'] & df['API_IsNew']).sum())
+        self.stats['need_new_flag'] += int((df['API_Exists'] & ~df['API_IsNew']).sum())
+
+        self.counts['by_vendor'].update(df['Vendor_Detected'].tolist())
+        self.counts['by_category'].update(df['Category'].tolist())
+        self.counts['found_by_vendor'].update(df.loc[df['API_Exists'], 'Vendor_Detected'].tolist())
+        self.counts['not_found_by_vendor'].update(df.loc[~df['API_Exists'], 'Vendor_Detected'].tolist())
 
         return df
 
-    async def validate_products(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Validate products against API"""
-        print("[SEARCH] Validating products against API...")
-
-        # Get unique styles
-        unique_styles = df['Style_Cleaned'].unique().tolist()
-        self.stats['unique_styles'] = len(unique_styles)
-
-        # Validate in batches
-        async with APIValidator(API_BASE) as validator:
-            validation_results = await validator.validate_batch(unique_styles)
-
-        # Map results back to DataFrame
-        df['API_Exists'] = df['Style_Cleaned'].map(lambda s: validation_results[s]['exists'])
-        df['API_IsNew'] = df['Style_Cleaned'].map(lambda s: validation_results[s]['api_is_new'])
-        df['API_BestSeller'] = df['Style_Cleaned'].map(lambda s: validation_results[s]['api_best_seller'])
-        df['API_Title'] = df['Style_Cleaned'].map(lambda s: validation_results[s]['title'])
-        df['API_Brand'] = df['Style_Cleaned'].map(lambda s: validation_results[s]['brand'])
-        df['API_Category'] = df['Style_Cleaned'].map(lambda s: validation_results[s]['category'])
-        df['API_Status'] = df['Style_Cleaned'].map(lambda s: validation_results[s]['status'])
-        df['API_Error'] = df['Style_Cleaned'].map(lambda s: validation_results[s]['error'] or '')
-
-        # Calculate stats
-        found = df['API_Exists'].sum()
-        not_found = len(df) - found
-        self.stats['found_in_api'] = found
-        self.stats['not_found_in_api'] = not_found
-        self.stats['match_rate'] = (found / len(df) * 100) if len(df) > 0 else 0
-
-        # Count already marked as new
-        already_new = df[df['API_Exists'] & df['API_IsNew']].shape[0]
-        need_new_flag = df[df['API_Exists'] & ~df['API_IsNew']].shape[0]
-        self.stats['already_new'] = already_new
-        self.stats['need_new_flag'] = need_new_flag
+    def finish_validation(self, validator: StyleValidator):
+        """Fold run-wide validator and input figures into stats once every chunk is done"""
+        for key in ('total_original', 'duplicates_removed', 'total_cleaned'):
+            self.stats[key] = self.read_stats[key]
+        self.stats['unique_styles'] = len(validator.results_cache)
+        transfer = validator.transfer_summary()
+        self.stats['bytes_read'] = transfer['bytes_read']
+        self.stats['bytes_saved'] = transfer['bytes_saved']
+        self.stats['bytes_saved_unknown'] = transfer['unknown_saved']
+
+        total = self.stats['total_cleaned']
+        found = self.stats['found_in_api']
+        not_found = self.stats['not_found_in_api']
+        self.stats['match_rate'] = (found / total * 100) if total > 0 else 0
 
         print(f"[OK] Validation complete: {found} found, {not_found} not found ({self.stats['match_rate']:.1f}% match rate)")
-        if already_new > 0:
-            print(f"[INFO] {already_new} products already marked as new in API")
-        if need_new_flag > 0:
-            print(f"[INFO] {need_new_flag} products need isNew flag set to true")
-
-        return df
-
-    def generate_statistics(self, df: pd.DataFrame) -> Dict:
+        if self.stats['already_new'] > 0:
+            print(f"[INFO] {self.stats['already_new']} products already marked as new in API")
+        if self.stats['need_new_flag'] > 0:
+            print(f"[INFO] {self.stats['need_new_flag']} products need isNew flag set to true")
+        print(f"[INFO] Read {transfer['bytes_read']:,} response bytes, "
+              f"skipped {transfer['bytes_saved']:,} after the first color variant"
+              f"{saved_unknown_note(transfer['unknown_saved'])}")
+
+    def generate_statistics(self) -> Dict:
         """Generate detailed statistics"""
         print("[STATS] Generating statistics...")
 
+        def by_count(counter: Counter) -> Dict:
+            return dict(sorted(counter.items(), key=lambda x: -x[1]))
+
         stats = {
             'summary': {
                 'total_original': self.stats['total_original'],
@@ -414,55 +390,115 @@ class NewProductProcessor:
                 'not_found_in_api': self.stats['not_found_in_api'],
                 'match_rate': self.stats['match_rate'],
                 'already_new': self.stats['already_new'],
-                'need_new_flag': self.stats['need_new_flag']
+                'need_new_flag': self.stats['need_new_flag'],
+                'bytes_read': self.stats['bytes_read'],
+                'bytes_saved': self.stats['bytes_saved']
             },
-            'by_vendor': df['Vendor_Detected'].value_counts().to_dict(),
-            'by_category': df['Category'].value_counts().to_dict(),
-            'found_by_vendor': df[df['API_Exists']].groupby('Vendor_Detected').size().to_dict(),
-            'not_found_by_vendor': df[~df['API_Exists']].groupby('Vendor_Detected').size().to_dict()
+            'by_vendor': by_count(self.counts['by_vendor']),
+            'by_category': by_count(self.counts['by_category']),
+            'found_by_vendor': dict(sorted(self.counts['found_by_vendor'].items())),
+            'not_found_by_vendor': dict(sorted(self.counts['not_found_by_vendor'].items()))
         }
+        if self.find_clusters:
+            self.duplicates = self.find_near_duplicates()
+            stats['summary']['near_duplicate_rows'] = len(self.duplicates) - int(self.duplicates['Canonical'].sum())
 
         print("[OK] Statistics generated")
         return stats
 
-    def save_results(self, df: pd.DataFrame, stats: Dict):
-        """Save all output files"""
+    def find_near_duplicates(self) -> pd.DataFrame:
+        """Rows the exact-key dedupe kept whose descriptions match another row's (--clusters)"""
+        rows = (pd.concat(self.cluster_parts, ignore_index=True) if self.cluster_parts
+                else pd.DataFrame(columns=CLUSTER_INPUT_COLUMNS))
+        rows = rows.join(cluster_descriptions(rows, group='Category', prefer='API_Exists'))
+        summary = cluster_summary(rows)
+        print(f"[INFO] Near-duplicate descriptions: {summary['clusters']} cluster(s), "
+              f"{summary['redundant']} row(s) besides each cluster's canonical row")
+        return cluster_members(rows)[CLUSTER_OUTPUT_COLUMNS]
+
+    def suggest_alternatives(self, known: List[Tuple[str, str]], not_found: pd.DataFrame) -> pd.DataFrame:
+        """
+        Rank near-miss catalog styles for each product the API did not find
+
+        Indexes CATALOG_FILE (when present) plus every (style, title) the API
+        confirmed in this run, then queries the n-gram index with each
+        not-found style and its description.
+        """
+        print("[SEARCH] Looking up near-miss styles for products not found...")
+        index = build_index(CATALOG_FILE, known)
+        columns = ['Style_Cleaned', 'Rank', 'Suggested_Style', 'Suggested_Title', 'Score']
+        if len(index) == 0 or not_found.empty:
+            print("[INFO] Nothing to suggest")
+            return pd.DataFrame(columns=columns)
+
+        suggestions = index.query_many(
+            zip(not_found['Style_Cleaned'], not_found['Description']), k=SUGGESTION_COUNT
+        )
+        result = pd.DataFrame(suggestion_rows(suggestions), columns=columns)
+        print(f"[OK] Suggestions for {result['Style_Cleaned'].nunique()} of {not_found['Style_Cleaned'].nunique()} "
+              f"styles ({len(index)} catalog styles indexed)")
+        return result
+
+    def save_chunk(self, df: pd.DataFrame):
+        """Append a validated chunk to the dataset and per-status CSVs (runs in the writer thread)"""
+        # Partition 0: not found, 1: needs isNew, 2: already new
+        codes = self.writer.write(df, [~df['API_Exists'], ~df['API_IsNew']])
+        not_found = df[codes == 0]
+        need_flag = df[codes == 1]
+
+        self.not_found_parts.append(not_found)
+        self.need_flag_parts.append(need_flag)
+        if self.find_clusters:
+            self.cluster_parts.append(df[CLUSTER_INPUT_COLUMNS])
+
+    def save_results(self, stats: Dict, known: List[Tuple[str, str]]):
+        """Finish output files once every chunk has been written"""
         print("[SAVE] Saving results...")
 
-        # 1. Complete dataset
-        output_file = 'cleaned_new_products.csv'
-        df.to_csv(output_file, index=False)
-        print(f"[OK] Saved complete dataset: {output_file}")
-
-        # 2. Not found products
-        not_found = df[~df['API_Exists']].copy()
-        not_found_file = 'new_products_not_found.csv'
-        not_found.to_csv(not_found_file, index=False)
-        print(f"[OK] Saved not found products: {not_found_file}")
-
-        # 3. Products needing isNew flag
-        need_flag = df[df['API_Exists'] & ~df['API_IsNew']].copy()
-        need_flag_file = 'new_products_need_flag.csv'
-        need_flag.to_csv(need_flag_file, index=False)
-        print(f"[OK] Saved products needing flag: {need_flag_file}")
-
-        # 4. Already marked as new
-        already_new = df[df['API_Exists'] & df['API_IsNew']].copy()
-        already_new_file = 'new_products_already_new.csv'
-        already_new.to_csv(already_new_file, index=False)
-        print(f"[OK] Saved already new products: {already_new_file}")
-
-        # 5. Detailed report
-        self._save_report(stats, df)
-
-        print(f"\n[FILES] Generated 5 output files:")
-        print(f"  1. {output_file} - Complete dataset")
-        print(f"  2. {not_found_file} - Products not in API")
-        print(f"  3. {need_flag_file} - Products needing isNew=true")
-        print(f"  4. {already_new_file} - Already marked as new")
-        print(f"  5. new_products_validation_report.txt - Detailed report")
-
-    def _save_report(self, stats: Dict, df: pd.DataFrame):
+        # 1-4. Dataset and per-status CSVs were appended chunk by chunk
+        print(f"[OK] Saved complete dataset: {OUTPUT_FILES['complete']}")
+        print(f"[OK] Saved not found products: {OUTPUT_FILES['not_found']}")
+        print(f"[OK] Saved products needing flag: {OUTPUT_FILES['need_flag']}")
+        print(f"[OK] Saved already new products: {OUTPUT_FILES['already_new']}")
+        if self.writer and self.writer.parquet:
+            print(f"[OK] Saved Parquet copies: {', '.join(parquet_path(p) for p in OUTPUT_FILES.values())}")
+
+        # No parts when the input (or this shard's share of it) is empty
+        not_found = (pd.concat(self.not_found_parts, ignore_index=True) if self.not_found_parts
+                     else pd.DataFrame(columns=OUTPUT_COLUMNS))
+        need_flag = (pd.concat(self.need_flag_parts, ignore_index=True) if self.need_flag_parts
+                     else pd.DataFrame(columns=OUTPUT_COLUMNS))
+
+        # Near-miss suggestions for the not-found list
+        self.suggestions = self.suggest_alternatives(known, not_found)
+        suggestions_file = 'new_products_not_found_suggestions.csv'
+        self.suggestions.to_csv(suggestions_file, index=False)
+        print(f"[OK] Saved near-miss suggestions: {suggestions_file}")
+
+        # Bulk isNew updates for the products needing the flag
+        flag_plan = FlagPlan.from_frame(need_flag, FLAGS['isNew'])
+        flag_files = flag_plan.write(FLAG_UPDATES)
+        print(f"[OK] Saved isNew updates: {', '.join(flag_files)} ({flag_plan.summary()})")
+
+        if not self.duplicates.empty:
+            self.duplicates.to_csv(CLUSTERS_FILE, index=False)
+            print(f"[OK] Saved near-duplicate clusters: {CLUSTERS_FILE}")
+
+        # Detailed report
+        self._save_report(stats, need_flag, not_found)
+
+        print(f"\n[FILES] Generated {7 + (not self.duplicates.empty)} output files:")
+        print(f"  1. {OUTPUT_FILES['complete']} - Complete dataset")
+        print(f"  2. {OUTPUT_FILES['not_found']} - Products not in API")
+        print(f"  3. {suggestions_file} - Near-miss catalog styles for products not in API")
+        print(f"  4. {OUTPUT_FILES['need_flag']} - Products needing isNew=true")
+        print(f"  5. {OUTPUT_FILES['already_new']} - Already marked as new")
+        print(f"  6. {flag_files[0]} / .json - Batched isNew updates (SQL and Caspio REST bulk requests)")
+        print(f"  7. new_products_validation_report.txt - Detailed report")
+        if not self.duplicates.empty:
+            print(f"  8. {CLUSTERS_FILE} - Near-duplicate descriptions, canonical row first")
+
+    def _save_report(self, stats: Dict, need_flag: pd.DataFrame, not_found: pd.DataFrame):
         """Save detailed validation report"""
         report_file = 'new_products_validation_report.txt'
 
@@ -479,10 +515,35 @@ class NewProductProcessor:
                 label = key.replace('_', ' ').title()
                 if key == 'match_rate':
                     f.write(f"{label}: {value:.1f}%\n")
+                elif key == 'bytes_saved':
+                    f.write(f"{label}: {value}{saved_unknown_note(self.stats['bytes_saved_unknown'])}\n")
                 else:
                     f.write(f"{label}: {value}\n")
             f.write("\n")
 
+            # Circuit breaker transitions (only when the API was considered down)
+            if self.breaker_lines:
+                f.write("API CIRCUIT BREAKER\n")
+                f.write("-" * 70 + "\n")
+                for line in self.breaker_lines:
+                    f.write(f"{line}\n")
+                f.write("\n")
+
+            # Request counts, latency and cache figures
+            f.write("API REQUEST METRICS\n")
+            f.write("-" * 70 + "\n")
+            for line in self.metrics_lines:
+                f.write(f"{line}\n")
+            f.write("\n")
+
+            # What --delta carried forward and what changed
+            if self.delta:
+                f.write("CHANGES SINCE LAST RUN\n")
+                f.write("-" * 70 + "\n")
+                for line in self.delta.report_lines():
+                    f.write(f"{line}\n")
+                f.write("\n")
+
             # Products by vendor
             f.write("PRODUCTS BY VENDOR\n")
             f.write("-" * 70 + "\n")
@@ -514,40 +575,51 @@ class NewProductProcessor:
                 f.write("\n")
 
             # Products needing isNew flag
-            need_flag = df[df['API_Exists'] & ~df['API_IsNew']]
             if len(need_flag) > 0:
                 f.write("PRODUCTS NEEDING isNew FLAG\n")
                 f.write("-" * 70 + "\n")
                 f.write(f"Total: {len(need_flag)} products\n\n")
-                for _, row in need_flag.iterrows():
-                    f.write(f"Style: {row['Style_Cleaned']}\n")
-                    f.write(f"  Description: {row['Description']}\n")
-                    f.write(f"  Category: {row['Category']}\n")
-                    f.write(f"  Vendor: {row['Vendor_Detected']}\n")
-                    f.write(f"  API Title: {row['API_Title']}\n")
-                    f.write("\n")
+                write_blocks(f, render_blocks(need_flag, [
+                    ("Style: ", 'Style_Cleaned', None),
+                    ("  Description: ", 'Description', None),
+                    ("  Category: ", 'Category', None),
+                    ("  Vendor: ", 'Vendor_Detected', None),
+                    ("  API Title: ", 'API_Title', None),
+                ], trail="\n"))
 
             # Products not found
-            not_found = df[~df['API_Exists']]
             if len(not_found) > 0:
                 f.write("PRODUCTS NOT FOUND IN API\n")
                 f.write("-" * 70 + "\n")
                 f.write(f"Total: {len(not_found)} products\n\n")
 
-                # Group by vendor
-                for vendor in not_found['Vendor_Detected'].unique():
-                    vendor_products = not_found[not_found['Vendor_Detected'] == vendor]
-                    f.write(f"\n{vendor} ({len(vendor_products)} products):\n")
-                    f.write("-" * 70 + "\n")
-
-                    for _, row in vendor_products.iterrows():
-                        f.write(f"\nStyle: {row['Style_Cleaned']}\n")
-                        if row['Style_Original'] != row['Style_Cleaned']:
-                            f.write(f"  Original: {row['Style_Original']}\n")
-                        f.write(f"  Description: {row['Description']}\n")
-                        f.write(f"  Category: {row['Category']}\n")
-                        if row['API_Error']:
-                            f.write(f"  Error: {row['API_Error']}\n")
+                candidates = did_you_mean(self.suggestions)
+                rows = not_found.assign(Did_You_Mean=not_found['Style_Cleaned'].map(candidates).fillna(''))
+                blocks = render_blocks(rows, [
+                    ("Style: ", 'Style_Cleaned', None),
+                    ("  Original: ", 'Style_Original', rows['Style_Original'] != rows['Style_Cleaned']),
+                    ("  Description: ", 'Description', None),
+                    ("  Category: ", 'Category', None),
+                    ("  Error: ", 'API_Error', truthy(rows['API_Error'])),
+                    ("  Did You Mean: ", 'Did_You_Mean', truthy(rows['Did_You_Mean'])),
+                ], lead="\n")
+
+                # Group by vendor (one pass, vendors in order of first appearance)
+                write_grouped(f, rows['Vendor_Detected'], blocks,
+                              "\n{key} ({count} products):\n" + "-" * 70 + "\n")
+
+            # Near-duplicate descriptions (--clusters)
+            if not self.duplicates.empty:
+                duplicates = self.duplicates
+                f.write("\nNEAR-DUPLICATE DESCRIPTIONS\n")
+                f.write("-" * 70 + "\n")
+                f.write("Same category, descriptions that normalize to (nearly) the same text.\n")
+                f.write("The first row of each cluster is the canonical one.\n")
+                write_grouped(f, duplicates['Cluster'], render_blocks(duplicates, [
+                    ("  Style: ", 'Style_Original', None),
+                    ("    Description: ", 'Description', None),
+                    ("    Similarity: ", 'Similarity', ~duplicates['Canonical'].to_numpy(dtype=bool)),
+                ]), "\nCluster {key} ({count} rows):\n")
 
             # Recommendations
             f.write("\n" + "=" * 70 + "\n")
@@ -557,12 +629,15 @@ class NewProductProcessor:
             if stats['summary']['need_new_flag'] > 0:
                 f.write(f"1. UPDATE DATABASE:\n")
                 f.write(f"   {stats['summary']['need_new_flag']} products need isNew flag set to true\n")
-                f.write(f"   See: new_products_need_flag.csv\n\n")
+                f.write(f"   See: new_products_need_flag.csv\n")
+                f.write(f"   Bulk updates: {FLAG_UPDATES}.sql / {FLAG_UPDATES}.json "
+                        f"(python -m nwca_catalog.flags {OUTPUT_FILES['complete']} --flag isNew --dry-run)\n\n")
 
             if stats['summary']['not_found_in_api'] > 0:
                 f.write(f"2. ADD MISSING PRODUCTS:\n")
                 f.write(f"   {stats['summary']['not_found_in_api']} products not found in API\n")
-                f.write(f"   See: new_products_not_found.csv\n\n")
+                f.write(f"   See: new_products_not_found.csv\n")
+                f.write(f"   Likely typos / missing suffixes: new_products_not_found_suggestions.csv\n\n")
 
             if stats['summary']['already_new'] > 0:
                 f.write(f"3. ALREADY CONFIGURED:\n")
@@ -575,31 +650,87 @@ class NewProductProcessor:
             f.write("   - Create new-products-showcase.html page\n")
             f.write("   - Update navigation with 'New Products' link\n")
 
+            if stats['summary'].get('near_duplicate_rows'):
+                f.write(f"\n5. MERGE NEAR-DUPLICATES:\n")
+                f.write(f"   {stats['summary']['near_duplicate_rows']} products look like another row's product "
+                        f"under a different style\n")
+                f.write(f"   See: {CLUSTERS_FILE} (keep the canonical style of each cluster)\n")
+
         print(f"[OK] Saved validation report: {report_file}")
 
     async def process(self):
-        """Main processing pipeline"""
+        """
+        Main processing pipeline
+
+        Input is read in chunks that flow through a bounded producer/consumer
+        pipeline: a worker thread cleans and de-duplicates the next chunk
+        while the validator works on the current one, and validated chunks
+        are appended to the output CSVs as they arrive.
+        """
         print("\n" + "=" * 70)
         print("NEW PRODUCTS VALIDATION SCRIPT")
         print("=" * 70 + "\n")
 
-        # 1. Load data
-        df = self.load_data()
-
-        # 2. Clean data
-        df = self.clean_data(df)
-
-        # 3. Remove duplicates
-        df = self.remove_duplicates(df)
-
-        # 4. Validate against API
-        df = await self.validate_products(df)
-
-        # 5. Generate statistics
-        stats = self.generate_statistics(df)
-
-        # 6. Save results
-        self.save_results(df, stats)
+        print("[DATA] Loading CSV data...")
+        if self.sources:
+            print(f"[INFO] Input: {', '.join(self.sources)} (chunks of {self.chunk_size:,} rows)")
+        if self.shard:
+            print(f"[INFO] Shard {self.shard}: up to {self.max_concurrent} request(s) in flight, "
+                  f"{self.rate_limit} per minute")
+
+        async def validate(chunk: Tuple[int, int, pd.DataFrame]) -> Tuple[int, int, pd.DataFrame]:
+            # 4. Validate against API
+            chunk_no, rows_in, df = chunk
+            return chunk_no, rows_in, await self.validate_products(df, validator)
+
+        def write(chunk: Tuple[int, int, pd.DataFrame]):
+            # 5. Write results for this chunk
+            chunk_no, rows_in, df = chunk
+            self.save_chunk(df)
+            print(f"[OK] Chunk {chunk_no}: {rows_in} loaded, {rows_in - len(df)} duplicates, "
+                  f"{len(df)} validated")
+
+        # Read before the writers replace the previous output
+        self.delta = self.load_delta()
+        breaker = CircuitBreaker(failure_rate=self.breaker_threshold, cooldown=self.breaker_cooldown)
+        async with StyleValidator(API_BASE, DETAILS, self.max_concurrent, rate_limit=self.rate_limit,
+                                  target_latency=self.target_latency, max_retries=self.max_retries,
+                                  breaker=breaker, shared_cache=self.open_shared_cache(),
+                                  required=['api_is_new']) as validator:
+            with self.open_journal(validator), self.open_stream(validator), self.open_writer():
+                pipeline = await run_pipeline(self.iter_chunks(), self.prepare_chunk, validate, write,
+                                              depth=self.queue_depth)
+        print(f"[INFO] Pipeline: {pipeline.summary()}")
+        validator.limiter.write_trace(CONCURRENCY_TRACE_FILE)
+        print(f"[INFO] Adaptive {validator.limiter.summary()} - trace: {CONCURRENCY_TRACE_FILE}")
+        print(f"[INFO] Retries: {validator.retry_policy.budget.summary()}")
+        print(f"[INFO] Breaker: {breaker.summary()}")
+        if validator.stream:
+            print(f"[INFO] Stream: {validator.stream.summary()}")
+        self.breaker_lines = breaker.report_lines()
+        if self.merge_dirs:
+            if validator.metrics.styles:
+                print(f"[WARN] {validator.metrics.styles:,} style(s) were missing from the shard journals "
+                      f"and were validated again")
+            # Report the requests the shards made, not the merge's cache lookups
+            validator.metrics = merge_shard_metrics(self.merge_dirs, METRICS_FILE) or validator.metrics
+        validator.metrics.write_json(METRICS_FILE)
+        print(f"[INFO] Metrics: {validator.metrics.summary()} - {METRICS_FILE}")
+        if validator.shared_cache:
+            print(f"[INFO] Shared cache: {validator.shared_hits} style(s) reused")
+        self.metrics_lines = validator.metrics.report_lines()
+        if self.delta:
+            print(f"[INFO] Delta: {self.delta.summary()}")
+
+        self.finish_validation(validator)
+        known = [(style, result.title) for style, result in validator.results_cache.items()
+                 if result.exists]
+
+        # 6. Generate statistics
+        stats = self.generate_statistics()
+
+        # 7. Save results
+        self.save_results(stats, known)
 
         print("\n" + "=" * 70)
         print("VALIDATION COMPLETE")
@@ -614,11 +745,135 @@ class NewProductProcessor:
         print(f"Need isNew flag: {stats['summary']['need_new_flag']}")
 
 
-async def main():
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Command-line options"""
+    parser = argparse.ArgumentParser(
+        description="Validate new product styles against the Caspio Pricing Proxy API"
+    )
+    parser.add_argument(
+        '--input', '-i', action='append', metavar='PATH',
+        help="CSV file, glob pattern or '-' for stdin (gzip is detected automatically); "
+             "repeat for several inputs. Default: the embedded CSV_DATA"
+    )
+    parser.add_argument(
+        '--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+        help=f"Rows read and validated per chunk (default {DEFAULT_CHUNK_SIZE:,})"
+    )
+    parser.add_argument(
+        '--queue-depth', type=int, default=DEFAULT_DEPTH,
+        help=f"Chunks buffered between the read, validate and write stages (default {DEFAULT_DEPTH})"
+    )
+    parser.add_argument(
+        '--max-concurrency', type=int, default=DEFAULT_MAXIMUM,
+        help=f"Upper bound for the adaptive number of in-flight requests (default {DEFAULT_MAXIMUM})"
+    )
+    parser.add_argument(
+        '--target-latency', type=float, default=DEFAULT_TARGET_LATENCY, metavar='SECONDS',
+        help=f"Grow concurrency only while responses are faster than this (default {DEFAULT_TARGET_LATENCY})"
+    )
+    parser.add_argument(
+        '--max-retries', type=int, default=DEFAULT_MAX_RETRIES,
+        help=f"Retries per style for timeouts, dropped connections, 408/429/5xx (default {DEFAULT_MAX_RETRIES})"
+    )
+    parser.add_argument(
+        '--breaker-threshold', type=float, default=DEFAULT_FAILURE_RATE, metavar='RATE',
+        help=f"Failure rate over recent calls that opens the API circuit (default {DEFAULT_FAILURE_RATE})"
+    )
+    parser.add_argument(
+        '--breaker-cooldown', type=float, default=DEFAULT_COOLDOWN, metavar='SECONDS',
+        help=f"Time the circuit stays open before probing the API again (default {DEFAULT_COOLDOWN:g})"
+    )
+    parser.add_argument(
+        '--journal', default=JOURNAL_FILE, metavar='PATH',
+        help=f"JSON-lines journal of completed validations (default {JOURNAL_FILE})"
+    )
+    parser.add_argument(
+        '--resume', action='store_true',
+        help="Replay the journal from an interrupted run and validate only the remaining styles"
+    )
+    parser.add_argument(
+        '--shared-cache', default=SHARED_CACHE_FILE, metavar='PATH',
+        help=f"Style results shared with the other validation script (default {SHARED_CACHE_FILE})"
+    )
+    parser.add_argument(
+        '--no-shared-cache', dest='shared_cache', action='store_const', const=None,
+        help="Neither reuse nor record shared style results"
+    )
+    parser.add_argument(
+        '--cache-max-age', type=float, default=DEFAULT_CACHE_MAX_AGE / 3600, metavar='HOURS',
+        help=f"Reuse shared results up to this old (default {DEFAULT_CACHE_MAX_AGE / 3600:g})"
+    )
+    parser.add_argument(
+        '--delta', nargs='?', const=OUTPUT_FILES['complete'], metavar='PATH',
+        help=f"Carry forward unchanged styles from a previous output (default {OUTPUT_FILES['complete']}) "
+             "and validate only new or changed rows and previous errors"
+    )
+    parser.add_argument(
+        '--parquet', action='store_true',
+        help="Also write each output CSV as Parquet with dictionary-encoded strings (needs pyarrow)"
+    )
+    parser.add_argument(
+        '--stream', metavar='PATH',
+        help="Write each style's result as a JSON line as soon as it is known, to a file, "
+             "named pipe or '-' for stdout (console output then goes to stderr)"
+    )
+    parser.add_argument(
+        '--clusters', action='store_true',
+        help=f"Group rows whose descriptions are near-duplicates within a category (e.g. one product "
+             f"under two style numbers) and write {CLUSTERS_FILE}"
+    )
+    sharding = parser.add_mutually_exclusive_group()
+    sharding.add_argument(
+        '--shard', type=Shard.parse, metavar='I/N',
+        help="Validate only the styles in shard I of N (stable hash) with its part of the request budget"
+    )
+    sharding.add_argument(
+        '--merge', nargs='+', metavar='DIR',
+        help="Combine the outputs of shard runs in these directories into the usual CSVs and report "
+             "(same input; no API calls)"
+    )
+    args = parser.parse_args(argv)
+    # Every shard needs at least one request slot and one request per minute
+    if args.shard and args.shard.count > min(args.max_concurrency, RATE_LIMIT):
+        parser.error(f"{args.shard.count} shards cannot split --max-concurrency {args.max_concurrency} "
+                     f"and {RATE_LIMIT} requests/minute")
+    return args
+
+
+async def main(argv: Optional[List[str]] = None):
     """Entry point"""
-    processor = NewProductProcessor()
-    await processor.process()
+    args = parse_args(argv)
+    cancel_on_sigint(asyncio.current_task())
+    try:
+        processor = NewProductProcessor(sources=args.input, chunk_size=args.chunk_size,
+                                        queue_depth=args.queue_depth,
+                                        journal_path=args.journal, resume=args.resume,
+                                        max_concurrent=args.max_concurrency,
+                                        target_latency=args.target_latency,
+                                        max_retries=args.max_retries,
+                                        breaker_threshold=args.breaker_threshold,
+                                        breaker_cooldown=args.breaker_cooldown,
+                                        delta_path=args.delta,
+                                        shared_cache_path=args.shared_cache,
+                                        cache_max_age=args.cache_max_age * 3600,
+                                        parquet=args.parquet,
+                                        stream_path=args.stream,
+                                        shard=args.shard, merge_dirs=args.merge,
+                                        find_clusters=args.clusters)
+        # Keep stdout for the result stream when it is the --stream target
+        with contextlib.redirect_stdout(sys.stderr) if args.stream == STDOUT else contextlib.nullcontext():
+            await processor.process()
+        return 0
+    except asyncio.CancelledError:
+        print(f"\n[WARN] Stopped early; completed styles are in {args.journal}. "
+              f"Re-run with --resume to continue.", file=sys.stderr)
+        return 130
+    except Exception as e:
+        print(f"\n[ERROR] Error: {e}", file=sys.stderr)
+        import traceback
+        traceback.print_exc()
+        return 1
 
 
 if __name__ == '__main__':
-    asyncio.run(main())
+    sys.exit(asyncio.run(main()))
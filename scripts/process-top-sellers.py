@@ -8,21 +8,97 @@ Purpose:
 4. Generate cleaned dataset with validation results
 5. Provide recommendations for database updates
 
+Usage:
+    python scripts/process-top-sellers.py                      # embedded CSV_DATA
+    python scripts/process-top-sellers.py -i export.csv.gz     # file, glob or '-' for stdin
+    python scripts/process-top-sellers.py --orders lines.csv   # rank from ShopWorks order lines
+    python scripts/process-top-sellers.py --resume             # continue an interrupted run
+
 Author: Claude
 Date: 2025-01-27
 """
 
+import argparse
 import asyncio
-import aiohttp
+import contextlib
 import pandas as pd
-from typing import Dict, List, Tuple
+from collections import Counter
+from typing import Iterator, List, Optional, Tuple
 from datetime import datetime
+import os
 import sys
 
+from nwca_catalog.breaker import DEFAULT_COOLDOWN, DEFAULT_FAILURE_RATE, CircuitBreaker
+from nwca_catalog.cleaning import clean_styles
+from nwca_catalog.clusters import cluster_descriptions, cluster_members, cluster_summary
+from nwca_catalog.concurrency import DEFAULT_MAXIMUM, DEFAULT_TARGET_LATENCY
+from nwca_catalog.delta import DeltaBaseline
+from nwca_catalog.flags import FLAGS, FlagPlan
+from nwca_catalog.ingest import DEFAULT_CHUNK_SIZE, ChunkDeduper, CsvAppender, iter_csv_chunks
+from nwca_catalog.journal import ResultJournal, cancel_on_sigint, replay_journal
+from nwca_catalog.ndjson import STDOUT, ResultStream
+from nwca_catalog.pipeline import DEFAULT_DEPTH, run_pipeline
+from nwca_catalog.ranking import DEFAULT_TOP, RANK_BY, rank_order_lines
+from nwca_catalog.report import did_you_mean, render_blocks, text, truthy, write_blocks, write_grouped
+from nwca_catalog.results import join_results, results_frame
+from nwca_catalog.retry import DEFAULT_MAX_RETRIES
+from nwca_catalog.shard import Shard, load_shard_results, merge_shard_metrics
+from nwca_catalog.suggest import build_index, suggestion_rows
+from nwca_catalog.validation import (DEFAULT_CACHE_MAX_AGE, SEARCH, SHARED_CACHE_FILE, SharedStyleCache,
+                                     StyleCleaner, StyleValidator)
+from nwca_catalog.variants import SIZE_INVALID, VARIANT_COLUMNS, VariantFetcher
+from nwca_catalog.vendors import detect_vendors
+
 # Configuration
 API_BASE = "https://caspio-pricing-proxy-ab30a049961a.herokuapp.com/api"
 OUTPUT_DIR = "."
 
+# Optional catalog export (STYLE, PRODUCT_TITLE) used for near-miss suggestions
+CATALOG_FILE = "catalog_styles.csv"
+SUGGESTION_COUNT = 5
+
+# Limit changes of the adaptive concurrency controller
+CONCURRENCY_TRACE_FILE = "top_sellers_concurrency.csv"
+
+# Completed validations, one JSON line per style (replayed by --resume)
+JOURNAL_FILE = "top_sellers_journal.jsonl"
+
+# Request counts, latency percentiles and cache figures for the run
+METRICS_FILE = "top_sellers_metrics.json"
+
+# Previous output read by --delta, and the columns that identify a row in it
+OUTPUT_FILE = "cleaned_top_sellers.csv"
+# Its header when no rows reach the writer (empty input, or a shard with no styles)
+OUTPUT_COLUMNS = ['Style', 'Description', 'Order Type', 'Style_Original', 'Style_Cleaned', 'Size_Extracted',
+                  'Vendor_Detected', 'Decoration_Method', 'API_Exists', 'API_BestSeller', 'API_Title', 'API_Brand',
+                  'API_Category', 'API_Status', 'API_Error', 'API_Retries']
+DELTA_COLUMNS = ['Style_Cleaned', 'Description', 'Order Type']
+
+# Top styles per decoration method ranked from --orders
+RANKING_FILE = "top_sellers_ranking.csv"
+
+# Rows whose size suffix the catalog does not list for the style (--variants)
+INVALID_SIZES_FILE = "invalid_sizes.csv"
+INVALID_SIZE_COLUMNS = ['Style_Original', 'Style_Cleaned', 'Size_Extracted', 'Size_Catalog', 'Order Type',
+                        'Sizes_Available', 'Size_Hint']
+
+# Rows whose descriptions are near-duplicates of another row's (--clusters)
+CLUSTERS_FILE = "description_clusters.csv"
+CLUSTER_INPUT_COLUMNS = ['Style_Original', 'Style_Cleaned', 'Description', 'Order Type', 'API_Exists']
+CLUSTER_OUTPUT_COLUMNS = ['Cluster', 'Canonical', 'Similarity', 'Style_Original', 'Style_Cleaned', 'Description',
+                          'Description_Normalized', 'Order Type', 'API_Exists']
+
+# Batched isBestSeller updates (<base>.sql and <base>.json)
+FLAG_UPDATES = "best_seller_flag_updates"
+
+# Validation result fields joined onto the products as API_* columns
+RESULT_FIELDS = ['exists', 'api_best_seller', 'title', 'brand', 'category', 'status', 'error', 'retries']
+
+# Columns an --input file must provide, and those kept for the not-found report
+INPUT_COLUMNS = ['Style', 'Description', 'Order Type']
+NOT_FOUND_COLUMNS = ['Style_Cleaned', 'Style_Original', 'Description', 'Order Type',
+                     'Vendor_Detected', 'API_Error']
+
 # Order Type to Decoration Method mapping
 ORDER_TYPE_MAP = {
     'Screenprinting': 'screenprint',
@@ -72,231 +148,261 @@ ST850,Sport-Tek Sport-Wick Stretch 1/4-Zip Pullover,Custom Embroidery
 TM1MU423_OSFA,Travismathew Cruz Trucker Cap,Cap Order"""
 
 
-class StyleCleaner:
-    """Handle style number cleaning and normalization"""
-
-    @staticmethod
-    def clean_style(style: str) -> Tuple[str, str]:
-        """
-        Clean style number and extract size if present
-
-        Args:
-            style: Original style number (e.g., "C112_OSFA", "PC78H_2X")
+class TopSellerProcessor:
+    """Main processor for top sellers data"""
 
-        Returns:
-            Tuple of (cleaned_style, extracted_size)
+    def __init__(self, output_dir: str = ".", sources: Optional[List[str]] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, queue_depth: int = DEFAULT_DEPTH,
+                 journal_path: str = JOURNAL_FILE, resume: bool = False,
+                 max_concurrent: int = DEFAULT_MAXIMUM, target_latency: float = DEFAULT_TARGET_LATENCY,
+                 max_retries: int = DEFAULT_MAX_RETRIES, breaker_threshold: float = DEFAULT_FAILURE_RATE,
+                 breaker_cooldown: float = DEFAULT_COOLDOWN, delta_path: Optional[str] = None,
+                 shared_cache_path: Optional[str] = SHARED_CACHE_FILE,
+                 cache_max_age: float = DEFAULT_CACHE_MAX_AGE, stream_path: Optional[str] = None,
+                 shard: Optional[Shard] = None, merge_dirs: Optional[List[str]] = None,
+                 order_sources: Optional[List[str]] = None, top_k: int = DEFAULT_TOP, rank_by: str = 'Units',
+                 check_variants: bool = False, find_clusters: bool = False):
+        self.output_dir = output_dir
+        self.cleaner = StyleCleaner()
+        self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.sources = sources or []
+        self.chunk_size = chunk_size
+        self.queue_depth = queue_depth
+        self.journal_path = journal_path
+        self.resume = resume
+        # A shard gets its share of the request budget
+        self.max_concurrent = shard.share(max_concurrent) if shard else max_concurrent
+        self.target_latency = target_latency
+        self.max_retries = max_retries
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.delta_path = delta_path
+        self.shared_cache_path = shared_cache_path
+        self.cache_max_age = cache_max_age
+        self.stream_path = stream_path
+        self.shard = shard
+        self.merge_dirs = merge_dirs or []
+        self.order_sources = order_sources or []
+        self.top_k = top_k
+        self.rank_by = rank_by
+        self.check_variants = check_variants
+        self.find_clusters = find_clusters
+        self.delta: Optional[DeltaBaseline] = None
+
+        # Cross-chunk state: dedupe keys (keep first occurrence of each cleaned
+        # style + order type combo), counters, and the rows the report lists
+        self.deduper = ChunkDeduper(['Style_Cleaned', 'Order Type'])
+        self.writer = CsvAppender(OUTPUT_FILE, OUTPUT_COLUMNS + (VARIANT_COLUMNS if check_variants else []))
+        # Counters are split by the thread that updates them
+        self.read_totals = Counter()
+        self.totals = Counter()
+        self.method_counts = Counter()
+        self.not_found_parts: List[pd.DataFrame] = []
+        self.need_flag_parts: List[pd.DataFrame] = []
+        self.size_counts = Counter()
+        self.invalid_size_parts: List[pd.DataFrame] = []
+        self.cluster_parts: List[pd.DataFrame] = []
 
-        Examples:
-            "C112_OSFA" → ("C112", "OSFA")
-            "PC78H_2X" → ("PC78H", "2X")
-            "PC54" → ("PC54", "")
-        """
-        if '_' in style:
-            parts = style.split('_', 1)  # Split on first underscore only
-            return parts[0].strip(), parts[1].strip()
-        return style.strip(), ''
+    def load_data(self) -> pd.DataFrame:
+        """Load and parse CSV data"""
+        from io import StringIO
+        return pd.read_csv(StringIO(CSV_DATA))
 
-    @staticmethod
-    def detect_vendor(style: str) -> str:
+    def rank_orders(self) -> pd.DataFrame:
         """
-        Detect vendor from style prefix
-
-        Args:
-            style: Cleaned style number
+        Top sellers per decoration method from the --orders export
 
         Returns:
-            Vendor name (best guess)
+            The INPUT_COLUMNS plus Rank, Units, Orders and Revenue, one row per
+            (style, method); the ranking is also saved to RANKING_FILE
         """
-        style_upper = style.upper()
-
-        if style_upper.startswith('PC'):
-            return 'Port & Company'
-        elif style_upper.startswith('BC'):
-            return 'Bella+Canvas'
-        elif style_upper.startswith('C') and not style_upper.startswith('CT'):
-            return 'Port Authority'
-        elif style_upper.startswith('CT'):
-            return 'Carhartt'
-        elif style_upper.startswith('DT'):
-            return 'District'
-        elif style_upper.startswith('EB'):
-            return 'Eddie Bauer'
-        elif style_upper.startswith('NE') or style_upper.startswith('NK'):
-            return 'Nike/New Era'
-        elif style_upper.startswith('ST'):
-            return 'Sport-Tek'
-        elif style_upper.startswith('TM'):
-            return 'TravisMathew'
-        elif style_upper.startswith('S'):
-            return 'Port Authority'
+        history = rank_order_lines(self.order_sources, ORDER_TYPE_MAP, self.chunk_size)
+        top = history.top(self.top_k, self.rank_by)
+        top.to_csv(RANKING_FILE, index=False)
+        print(f"   [INFO]  Ranked {history.summary()}")
+        print(f"   [OK] Top {self.top_k} per decoration method by {self.rank_by.lower()}: "
+              f"{len(top)} products - {RANKING_FILE}")
+        return top.drop(columns='Decoration_Method')
+
+    def iter_chunks(self) -> Iterator[pd.DataFrame]:
+        """Yield the --orders ranking, input chunks from --input files/stdin, or the embedded CSV as one chunk"""
+        if self.order_sources:
+            yield self.rank_orders()
+        elif self.sources:
+            yield from iter_csv_chunks(self.sources, self.chunk_size, required=INPUT_COLUMNS)
         else:
-            return 'Unknown'
-
-
-class APIValidator:
-    """Validate styles against Caspio Pricing Proxy API"""
-
-    def __init__(self, base_url: str):
-        self.base_url = base_url
-        self.session = None
-        self.results_cache = {}
+            yield self.load_data()
 
-    async def __aenter__(self):
-        self.session = aiohttp.ClientSession()
-        return self
+    def clean_chunk(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Clean style numbers, extract sizes and detect vendors"""
+        df['Style_Original'] = df['Style']
 
-    async def __aexit__(self, *args):
-        if self.session:
-            await self.session.close()
+        # Apply cleaning (column form of StyleCleaner.clean_style)
+        df[['Style_Cleaned', 'Size_Extracted']] = clean_styles(df['Style'])
+        df['Vendor_Detected'] = detect_vendors(df['Style_Cleaned'])
+        return df
 
-    async def validate_style(self, style: str, retry=0) -> Dict:
+    def prepare_chunk(self, df: pd.DataFrame) -> Tuple[int, int, pd.DataFrame]:
         """
-        Validate style against API
-
-        Args:
-            style: Cleaned style number
-            retry: Retry counter for failed requests
+        Clean, de-duplicate and map one input chunk (runs in the producer thread)
 
         Returns:
-            Dictionary with validation results
+            (chunk number, rows read, prepared chunk)
         """
-        # Check cache first
-        if style in self.results_cache:
-            return self.results_cache[style]
+        self.read_totals['chunks'] += 1
+        self.read_totals['original'] += len(df)
+        df = self.clean_chunk(df)
+        if self.shard:
+            # The other shards take the remaining styles
+            df = self.shard.select(df)
+
+        # Show some examples
+        if self.read_totals['chunks'] == 1:
+            examples = df[df['Size_Extracted'] != ''][['Style_Original', 'Style_Cleaned', 'Size_Extracted']].head(3)
+            if not examples.empty:
+                print("   Examples:")
+                for _, row in examples.iterrows():
+                    print(f"      {row['Style_Original']} -> {row['Style_Cleaned']} (size: {row['Size_Extracted']})")
+
+        rows_in = len(df)
+        df = self.deduper.filter(df)
+        self.read_totals['duplicates'] += rows_in - len(df)
 
+        df['Decoration_Method'] = df['Order Type'].map(ORDER_TYPE_MAP)
+        return self.read_totals['chunks'], rows_in, df
+
+    async def validate_chunk(self, validator: StyleValidator, chunk: Tuple[int, int, pd.DataFrame],
+                             variants: Optional[VariantFetcher] = None) -> Tuple[int, int, pd.DataFrame]:
+        """Validate a prepared chunk's styles and join the results (runs on the event loop)"""
+        chunk_no, rows_in, df = chunk
+        if self.delta:
+            self.delta.carry_forward(df, validator.results_cache)
+        validation_results = await validator.validate_batch(df['Style_Cleaned'].unique().tolist())
+        if self.delta:
+            self.delta.record(validation_results)
+        df = join_results(df, results_frame(validation_results, fields=RESULT_FIELDS))
+        if variants:
+            # One product-details fetch per found style with a size suffix, then every row is resolved locally
+            sized = (df['Size_Extracted'] != '') & df['API_Exists']
+            await variants.load(df.loc[sized, 'Style_Cleaned'].unique().tolist())
+            df = df.join(variants.index.resolve(df['Style_Cleaned'], df['Size_Extracted']))
+        return chunk_no, rows_in, df
+
+    def write_chunk(self, chunk: Tuple[int, int, pd.DataFrame]):
+        """Append a validated chunk to the output CSV and update the totals (runs in the writer thread)"""
+        chunk_no, rows_in, df = chunk
+        self.writer.write(df)
+
+        need_flag_mask = df['API_Exists'] & ~df['API_BestSeller']
+        self.method_counts.update(df['Decoration_Method'].dropna().tolist())
+        self.totals['cleaned'] += len(df)
+        self.totals['found'] += int(df['API_Exists'].sum())
+        self.totals['best_sellers'] += int(df['API_BestSeller'].sum())
+        self.totals['need_flag'] += int(need_flag_mask.sum())
+        self.totals['discontinued'] += int((df['API_Status'] == 'Discontinued').sum())
+        self.not_found_parts.append(df.loc[~df['API_Exists'], NOT_FOUND_COLUMNS])
+        self.need_flag_parts.append(df.loc[need_flag_mask, ['Style_Cleaned', 'API_Title']])
+        if 'Size_Status' in df.columns:
+            self.size_counts.update(df['Size_Status'].tolist())
+            self.invalid_size_parts.append(df.loc[df['Size_Status'] == SIZE_INVALID, INVALID_SIZE_COLUMNS])
+        if self.find_clusters:
+            self.cluster_parts.append(df[CLUSTER_INPUT_COLUMNS])
+
+        print(f"   [OK] Chunk {chunk_no}: {rows_in} rows, {rows_in - len(df)} duplicate(s), "
+              f"{len(df)} written ({self.totals['cleaned']:,} total)")
+
+    def open_journal(self, validator: StyleValidator) -> ResultJournal:
+        """Replay the journal into the validator cache (--resume) and open it for appending"""
+        if self.resume:
+            cache, skipped = replay_journal(self.journal_path)
+            validator.restore(cache, journaled=True)
+            note = f" ({skipped} unreadable line(s) skipped)" if skipped else ""
+            print(f"   [INFO]  Resumed {len(cache):,} validated style(s) from {self.journal_path}{note}")
+        if self.merge_dirs:
+            merged = load_shard_results(self.merge_dirs, os.path.basename(self.journal_path))
+            validator.restore(merged)
+            print(f"   [INFO]  Merging {len(merged):,} style result(s) from {len(self.merge_dirs)} shard(s)")
+        validator.journal = ResultJournal(self.journal_path, append=self.resume)
+        return validator.journal
+
+    def open_shared_cache(self) -> Optional[SharedStyleCache]:
+        """Results either script validated recently (None with --no-shared-cache or --merge)"""
+        if not self.shared_cache_path or self.merge_dirs:
+            # A merge reports what the shards saw; their journals hold every result they used
+            return None
+        shared = SharedStyleCache(self.shared_cache_path, self.cache_max_age)
+        print(f"   [INFO]  Shared cache: {len(shared.entries):,} fresh style(s) in {self.shared_cache_path}")
+        return shared
+
+    def open_stream(self, validator: StyleValidator):
+        """Stream each style's result as NDJSON while the run is in progress (--stream)"""
+        if not self.stream_path:
+            return contextlib.nullcontext()
+        validator.stream = ResultStream(self.stream_path)
+        print(f"   [INFO]  Streaming results to {validator.stream.name}")
+        return validator.stream
+
+    def open_variants(self):
+        """Size index from one product-details fetch per sized style (--variants)"""
+        if not self.check_variants:
+            return contextlib.nullcontext()
+        print(f"   [INFO]  Checking size suffixes against product-details (one request per sized style)")
+        return VariantFetcher(API_BASE, self.max_concurrent, self.max_retries, indent='   ')
+
+    def find_near_duplicates(self) -> pd.DataFrame:
+        """Rows the exact-key dedupe kept whose descriptions match another row's (--clusters)"""
+        rows = (pd.concat(self.cluster_parts, ignore_index=True) if self.cluster_parts
+                else pd.DataFrame(columns=CLUSTER_INPUT_COLUMNS))
+        rows = rows.join(cluster_descriptions(rows, group='Order Type', prefer='API_Exists'))
+        summary = cluster_summary(rows)
+        print(f"   [INFO]  Near-duplicate descriptions: {summary['clusters']} cluster(s), "
+              f"{summary['redundant']} row(s) besides each cluster's canonical row")
+        return cluster_members(rows)[CLUSTER_OUTPUT_COLUMNS]
+
+    def load_delta(self) -> Optional[DeltaBaseline]:
+        """Read the previous run's output for --delta (None validates every style)"""
+        if not self.delta_path:
+            return None
         try:
-            url = f"{self.base_url}/products/search?q={style}&limit=1"
-
-            async with self.session.get(url, timeout=10) as response:
-                if response.status == 200:
-                    data = await response.json()
-
-                    # Check if we got results
-                    products = data.get('products', [])
-
-                    if products and len(products) > 0:
-                        product = products[0]
-
-                        # Check for exact match (case-insensitive)
-                        if product.get('style', '').upper() == style.upper():
-                            result = {
-                                'exists': True,
-                                'api_best_seller': product.get('isBestSeller', False),
-                                'title': product.get('title', ''),
-                                'brand': product.get('brand', ''),
-                                'category': product.get('category', ''),
-                                'status': product.get('status', 'Unknown'),
-                                'error': None
-                            }
-                        else:
-                            # Partial match - not exact
-                            result = {
-                                'exists': False,
-                                'api_best_seller': False,
-                                'title': '',
-                                'brand': '',
-                                'category': '',
-                                'status': 'Not Found',
-                                'error': f'Partial match only: {product.get("style")}'
-                            }
-                    else:
-                        result = {
-                            'exists': False,
-                            'api_best_seller': False,
-                            'title': '',
-                            'brand': '',
-                            'category': '',
-                            'status': 'Not Found',
-                            'error': None
-                        }
-                else:
-                    result = {
-                        'exists': False,
-                        'api_best_seller': False,
-                        'title': '',
-                        'brand': '',
-                        'category': '',
-                        'status': 'API Error',
-                        'error': f'HTTP {response.status}'
-                    }
-
-        except asyncio.TimeoutError:
-            if retry < 2:
-                print(f"   [WAIT]  Timeout for {style}, retrying...")
-                await asyncio.sleep(1)
-                return await self.validate_style(style, retry + 1)
-            result = {
-                'exists': False,
-                'api_best_seller': False,
-                'title': '',
-                'brand': '',
-                'category': '',
-                'status': 'Timeout',
-                'error': 'Request timed out'
-            }
-
-        except Exception as e:
-            result = {
-                'exists': False,
-                'api_best_seller': False,
-                'title': '',
-                'brand': '',
-                'category': '',
-                'status': 'Error',
-                'error': str(e)
-            }
-
-        # Cache result
-        self.results_cache[style] = result
-        return result
-
-    async def validate_batch(self, styles: List[str], batch_size: int = 5) -> Dict[str, Dict]:
+            baseline = DeltaBaseline.load(self.delta_path, DELTA_COLUMNS)
+        except (OSError, ValueError) as e:
+            print(f"   [WARN]  No delta baseline ({e}) - validating every style")
+            return None
+        print(f"   [INFO]  Delta baseline: {len(baseline.results):,} style(s) from {self.delta_path}")
+        return baseline
+
+    def suggest_alternatives(self, known: List[Tuple[str, str]], not_found: pd.DataFrame) -> pd.DataFrame:
         """
-        Validate multiple styles with rate limiting
+        Rank near-miss catalog styles for each product the API did not find
 
-        Args:
-            styles: List of cleaned style numbers
-            batch_size: Number of concurrent requests
+        Indexes CATALOG_FILE (when present) plus every (style, title) the API
+        confirmed in this run, then queries the n-gram index with each
+        not-found style and its description.
 
         Returns:
-            Dictionary mapping style to validation results
+            One row per (style, candidate) with a 0-1 similarity score
         """
-        results = {}
+        index = build_index(CATALOG_FILE, known)
+        columns = ['Style_Cleaned', 'Rank', 'Suggested_Style', 'Suggested_Title', 'Score']
+        if len(index) == 0:
+            return pd.DataFrame(columns=columns)
 
-        # Process in batches to avoid overwhelming API
-        for i in range(0, len(styles), batch_size):
-            batch = styles[i:i + batch_size]
-
-            print(f"   Validating batch {i//batch_size + 1}/{(len(styles)-1)//batch_size + 1}...")
-
-            tasks = [self.validate_style(style) for style in batch]
-            batch_results = await asyncio.gather(*tasks)
-
-            for style, result in zip(batch, batch_results):
-                results[style] = result
-
-            # Small delay between batches
-            if i + batch_size < len(styles):
-                await asyncio.sleep(0.5)
-
-        return results
-
-
-class TopSellerProcessor:
-    """Main processor for top sellers data"""
-
-    def __init__(self, output_dir: str = "."):
-        self.output_dir = output_dir
-        self.cleaner = StyleCleaner()
-        self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-
-    def load_data(self) -> pd.DataFrame:
-        """Load and parse CSV data"""
-        from io import StringIO
-        return pd.read_csv(StringIO(CSV_DATA))
+        suggestions = index.query_many(
+            zip(not_found['Style_Cleaned'], not_found['Description']), k=SUGGESTION_COUNT
+        )
+        return pd.DataFrame(suggestion_rows(suggestions), columns=columns)
 
     async def process(self):
-        """Main processing pipeline"""
+        """
+        Main processing pipeline
+
+        Input is read in chunks that flow through a bounded producer/consumer
+        pipeline: a worker thread cleans and de-duplicates the next chunk
+        while the validator works on the current one, and validated chunks
+        are appended to cleaned_top_sellers.csv as they arrive. Styles already
+        validated are served from the cache. Only counters and the
+        not-found / need-flag rows are kept for the report.
+        """
 
         print("=" * 70)
         print("TOP SELLERS CSV PROCESSOR & API VALIDATOR")
@@ -304,109 +410,116 @@ class TopSellerProcessor:
 
         # 1. Load CSV
         print("\n Step 1: Loading CSV data...")
-        df = self.load_data()
-        print(f"   [OK] Loaded {len(df)} products")
-
-        # 2. Clean style numbers
-        print("\n Step 2: Cleaning style numbers...")
-        df['Style_Original'] = df['Style']
-
-        # Apply cleaning
-        cleaning_results = df['Style'].apply(self.cleaner.clean_style)
-        df['Style_Cleaned'] = cleaning_results.apply(lambda x: x[0])
-        df['Size_Extracted'] = cleaning_results.apply(lambda x: x[1])
-        df['Vendor_Detected'] = df['Style_Cleaned'].apply(self.cleaner.detect_vendor)
-
-        # Show some examples
-        examples = df[df['Size_Extracted'] != ''][['Style_Original', 'Style_Cleaned', 'Size_Extracted']].head(3)
-        if not examples.empty:
-            print("   Examples:")
-            for _, row in examples.iterrows():
-                print(f"      {row['Style_Original']} -> {row['Style_Cleaned']} (size: {row['Size_Extracted']})")
-
-        # 3. Remove duplicates
-        print("\n Step 3: Handling duplicates...")
-        initial_count = len(df)
-
-        # Keep first occurrence of each cleaned style + order type combo
-        df = df.drop_duplicates(subset=['Style_Cleaned', 'Order Type'], keep='first')
+        if self.order_sources:
+            print(f"   Input: top sellers ranked from order lines in {', '.join(self.order_sources)}")
+        elif self.sources:
+            print(f"   Input: {', '.join(self.sources)} (chunks of {self.chunk_size:,} rows)")
+        else:
+            print("   Input: embedded CSV_DATA")
 
-        duplicates_removed = initial_count - len(df)
+        # 2-6. Clean, de-duplicate, map and validate chunk by chunk
+        print("\n Steps 2-6: Cleaning, de-duplicating and validating against Caspio API...")
+        print(f"   API Base: {API_BASE}")
+        if self.shard:
+            print(f"   [INFO]  Shard {self.shard}: up to {self.max_concurrent} request(s) in flight")
+
+        output_csv = self.writer.path
+        # Read before the writer replaces the file
+        self.delta = self.load_delta()
+        breaker = CircuitBreaker(failure_rate=self.breaker_threshold, cooldown=self.breaker_cooldown, indent='   ')
+        async with StyleValidator(API_BASE, SEARCH, self.max_concurrent, target_latency=self.target_latency,
+                                  max_retries=self.max_retries, breaker=breaker,
+                                  shared_cache=self.open_shared_cache(), indent='   ') as validator, \
+                self.open_variants() as variants:
+            with self.open_journal(validator), self.open_stream(validator):
+                pipeline = await run_pipeline(
+                    self.iter_chunks(),
+                    self.prepare_chunk,
+                    lambda chunk: self.validate_chunk(validator, chunk, variants),
+                    self.write_chunk,
+                    depth=self.queue_depth
+                )
+        self.writer.finish()
+        print(f"   [INFO]  Pipeline: {pipeline.summary()}")
+        validator.limiter.write_trace(CONCURRENCY_TRACE_FILE)
+        print(f"   [INFO]  Adaptive {validator.limiter.summary()} - trace: {CONCURRENCY_TRACE_FILE}")
+        print(f"   [INFO]  Retries: {validator.retry_policy.budget.summary()}")
+        print(f"   [INFO]  Breaker: {breaker.summary()}")
+        if validator.stream:
+            print(f"   [INFO]  Stream: {validator.stream.summary()}")
+        if variants:
+            print(f"   [INFO]  Variants: {variants.summary()}")
+        if self.merge_dirs:
+            if validator.metrics.styles:
+                print(f"   [WARN]  {validator.metrics.styles:,} style(s) were missing from the shard journals "
+                      f"and were validated again")
+            # Report the requests the shards made, not the merge's cache lookups
+            validator.metrics = merge_shard_metrics(self.merge_dirs, METRICS_FILE) or validator.metrics
+        validator.metrics.write_json(METRICS_FILE)
+        print(f"   [INFO]  Metrics: {validator.metrics.summary()} - {METRICS_FILE}")
+        if validator.shared_cache:
+            print(f"   [INFO]  Shared cache: {validator.shared_hits} style(s) reused")
+        if self.delta:
+            print(f"   [INFO]  Delta: {self.delta.summary()}")
+
+        totals = self.totals
+        initial_count = self.read_totals['original']
+        duplicates_removed = self.read_totals['duplicates']
         if duplicates_removed > 0:
             print(f"   [OK] Removed {duplicates_removed} duplicate(s)")
         else:
             print(f"   [INFO]  No duplicates found")
 
-        # 4. Map order types
-        print("\n Step 4: Mapping order types to decoration methods...")
-        df['Decoration_Method'] = df['Order Type'].map(ORDER_TYPE_MAP)
-
         # Count by decoration method
-        method_counts = df['Decoration_Method'].value_counts()
+        method_counts = dict(self.method_counts.most_common())
         for method, count in method_counts.items():
             print(f"      {method}: {count} products")
 
-        # 5. Validate against API
-        print("\n Step 5: Validating against Caspio API...")
-        print(f"   API Base: {API_BASE}")
-
-        unique_styles = df['Style_Cleaned'].unique().tolist()
-        print(f"   Total unique styles to validate: {len(unique_styles)}")
-
-        async with APIValidator(API_BASE) as validator:
-            validation_results = await validator.validate_batch(unique_styles)
-
-        # 6. Map validation results back to dataframe
-        print("\n Step 6: Processing validation results...")
-
-        df['API_Exists'] = df['Style_Cleaned'].map(
-            lambda x: validation_results.get(x, {}).get('exists', False)
-        )
-        df['API_BestSeller'] = df['Style_Cleaned'].map(
-            lambda x: validation_results.get(x, {}).get('api_best_seller', False)
-        )
-        df['API_Title'] = df['Style_Cleaned'].map(
-            lambda x: validation_results.get(x, {}).get('title', '')
-        )
-        df['API_Brand'] = df['Style_Cleaned'].map(
-            lambda x: validation_results.get(x, {}).get('brand', '')
-        )
-        df['API_Category'] = df['Style_Cleaned'].map(
-            lambda x: validation_results.get(x, {}).get('category', '')
-        )
-        df['API_Status'] = df['Style_Cleaned'].map(
-            lambda x: validation_results.get(x, {}).get('status', '')
-        )
-        df['API_Error'] = df['Style_Cleaned'].map(
-            lambda x: validation_results.get(x, {}).get('error', '')
-        )
-
         # 7. Generate statistics
         print("\n Step 7: Generating statistics...")
 
         stats = {
             'total_products_original': initial_count,
-            'total_products_cleaned': len(df),
+            'total_products_cleaned': totals['cleaned'],
             'duplicates_removed': duplicates_removed,
-            'unique_styles': len(unique_styles),
-            'found_in_api': int(df['API_Exists'].sum()),
-            'not_found_in_api': int((~df['API_Exists']).sum()),
-            'match_rate': f"{(df['API_Exists'].sum() / len(df) * 100):.1f}%",
-            'already_best_sellers': int(df['API_BestSeller'].sum()),
-            'need_best_seller_flag': int((df['API_Exists'] & ~df['API_BestSeller']).sum()),
-            'discontinued': int((df['API_Status'] == 'Discontinued').sum())
+            'unique_styles': len(validator.results_cache),
+            'found_in_api': totals['found'],
+            'not_found_in_api': totals['cleaned'] - totals['found'],
+            'match_rate': f"{(totals['found'] / totals['cleaned'] * 100):.1f}%" if totals['cleaned'] else "n/a",
+            'already_best_sellers': totals['best_sellers'],
+            'need_best_seller_flag': totals['need_flag'],
+            'discontinued': totals['discontinued']
         }
+        if self.check_variants:
+            stats['invalid_sizes'] = self.size_counts[SIZE_INVALID]
+        duplicates = pd.DataFrame(columns=CLUSTER_OUTPUT_COLUMNS)
+        if self.find_clusters:
+            duplicates = self.find_near_duplicates()
+            stats['near_duplicate_rows'] = len(duplicates) - int(duplicates['Canonical'].sum())
 
         # 8. Save results
         print("\n Step 8: Saving output files...")
-
-        # Save cleaned CSV
-        output_csv = f"cleaned_top_sellers.csv"
-        df.to_csv(output_csv, index=False)
         print(f"   [OK] Saved: {output_csv}")
 
         # Save products not found
-        not_found = df[~df['API_Exists']].copy()
+        # No parts when the input (or this shard's share of it) is empty
+        not_found = (pd.concat(self.not_found_parts, ignore_index=True) if self.not_found_parts
+                     else pd.DataFrame(columns=NOT_FOUND_COLUMNS))
+        need_flag = (pd.concat(self.need_flag_parts, ignore_index=True) if self.need_flag_parts
+                     else pd.DataFrame(columns=['Style_Cleaned', 'API_Title']))
+        suggestions = pd.DataFrame()
+        invalid_sizes = (pd.concat(self.invalid_size_parts, ignore_index=True) if self.invalid_size_parts
+                         else pd.DataFrame(columns=INVALID_SIZE_COLUMNS))
+        if not invalid_sizes.empty:
+            invalid_sizes.to_csv(INVALID_SIZES_FILE, index=False)
+            print(f"   [WARN]  Invalid sizes: {INVALID_SIZES_FILE} ({len(invalid_sizes)} rows)")
+        if not duplicates.empty:
+            duplicates.to_csv(CLUSTERS_FILE, index=False)
+            print(f"   [OK] Near-duplicate clusters: {CLUSTERS_FILE} ({duplicates['Cluster'].nunique()} clusters)")
+        flag_plan = FlagPlan.from_frame(need_flag, FLAGS['isBestSeller'])
+        if flag_plan.to_set:
+            flag_files = flag_plan.write(FLAG_UPDATES)
+            print(f"   [OK] Best seller updates: {', '.join(flag_files)} ({flag_plan.summary()})")
         if not not_found.empty:
             not_found_csv = f"not_found.csv"
             not_found[['Style_Cleaned', 'Description', 'Order Type', 'Vendor_Detected']].to_csv(
@@ -414,6 +527,15 @@ class TopSellerProcessor:
             )
             print(f"   [WARN]  Not found list: {not_found_csv} ({len(not_found)} products)")
 
+            known = [(style, result.title) for style, result in validator.results_cache.items()
+                     if result.exists]
+            suggestions = self.suggest_alternatives(known, not_found)
+            if not suggestions.empty:
+                suggestions_csv = f"not_found_suggestions.csv"
+                suggestions.to_csv(suggestions_csv, index=False)
+                print(f"   [OK] Near-miss suggestions: {suggestions_csv} "
+                      f"({suggestions['Style_Cleaned'].nunique()} styles)")
+
         # Save validation report
         report_file = f"validation_report.txt"
         with open(report_file, 'w', encoding='utf-8') as f:
@@ -432,26 +554,71 @@ class TopSellerProcessor:
             for method, count in method_counts.items():
                 f.write(f"{method.title()}: {count}\n")
 
+            breaker_lines = breaker.report_lines()
+            if breaker_lines:
+                f.write("\n\nAPI CIRCUIT BREAKER\n")
+                f.write("-" * 70 + "\n")
+                for line in breaker_lines:
+                    f.write(f"{line}\n")
+
+            f.write("\n\nAPI REQUEST METRICS\n")
+            f.write("-" * 70 + "\n")
+            for line in validator.metrics.report_lines():
+                f.write(f"{line}\n")
+
+            if self.delta:
+                f.write("\n\nCHANGES SINCE LAST RUN\n")
+                f.write("-" * 70 + "\n")
+                for line in self.delta.report_lines():
+                    f.write(f"{line}\n")
+
             if not not_found.empty:
+                candidates = did_you_mean(suggestions)
+                rows = not_found.assign(Did_You_Mean=not_found['Style_Cleaned'].map(candidates).fillna(''))
                 f.write("\n\nPRODUCTS NOT FOUND IN API\n")
                 f.write("-" * 70 + "\n")
-                for _, row in not_found.iterrows():
-                    f.write(f"\nStyle: {row['Style_Cleaned']}\n")
-                    f.write(f"  Original: {row['Style_Original']}\n")
-                    f.write(f"  Description: {row['Description']}\n")
-                    f.write(f"  Order Type: {row['Order Type']}\n")
-                    f.write(f"  Detected Vendor: {row['Vendor_Detected']}\n")
-                    if row['API_Error']:
-                        f.write(f"  Error: {row['API_Error']}\n")
+                write_blocks(f, render_blocks(rows, [
+                    ("Style: ", 'Style_Cleaned', None),
+                    ("  Original: ", 'Style_Original', None),
+                    ("  Description: ", 'Description', None),
+                    ("  Order Type: ", 'Order Type', None),
+                    ("  Detected Vendor: ", 'Vendor_Detected', None),
+                    ("  Error: ", 'API_Error', truthy(rows['API_Error'])),
+                    ("  Did You Mean: ", 'Did_You_Mean', truthy(rows['Did_You_Mean'])),
+                ], lead="\n"))
+
+            if self.check_variants:
+                f.write("\n\nSIZE SUFFIXES\n")
+                f.write("-" * 70 + "\n")
+                for status, count in sorted(self.size_counts.items()):
+                    f.write(f"{status.title()}: {count}\n")
+                if not invalid_sizes.empty:
+                    f.write("\nSizes the catalog does not list for the style:\n")
+                    write_blocks(f, render_blocks(invalid_sizes, [
+                        ("Style: ", 'Style_Original', None),
+                        ("  Size: ", 'Size_Catalog', None),
+                        ("  Available: ", 'Sizes_Available', None),
+                        ("  Hint: ", 'Size_Hint', truthy(invalid_sizes['Size_Hint'])),
+                    ], lead="\n"))
+
+            if not duplicates.empty:
+                f.write("\n\nNEAR-DUPLICATE DESCRIPTIONS\n")
+                f.write("-" * 70 + "\n")
+                f.write("Same order type, descriptions that normalize to (nearly) the same text.\n")
+                f.write("The first row of each cluster is the canonical one.\n")
+                write_grouped(f, duplicates['Cluster'], render_blocks(duplicates, [
+                    ("  Style: ", 'Style_Original', None),
+                    ("    Description: ", 'Description', None),
+                    ("    Similarity: ", 'Similarity', ~duplicates['Canonical'].to_numpy(dtype=bool)),
+                ]), "\nCluster {key} ({count} rows):\n")
 
             # Products that exist but aren't marked as best sellers
-            need_flag = df[df['API_Exists'] & ~df['API_BestSeller']]
             if not need_flag.empty:
                 f.write("\n\nPRODUCTS NEEDING BEST SELLER FLAG\n")
                 f.write("-" * 70 + "\n")
                 f.write("These products exist in API but aren't marked as best sellers:\n\n")
-                for _, row in need_flag.iterrows():
-                    f.write(f"{row['Style_Cleaned']}: {row['API_Title']}\n")
+                lines = text(need_flag['Style_Cleaned']) + ': ' + text(need_flag['API_Title']) + '\n'
+                write_blocks(f, lines.tolist())
 
         print(f"   [DOC] Validation report: {report_file}")
 
@@ -470,10 +637,13 @@ class TopSellerProcessor:
         if stats['not_found_in_api'] > 0:
             print(f"[WARN]  {stats['not_found_in_api']} products not found in API")
             print("   -> Review not_found.csv and add these to your database")
+            if not suggestions.empty:
+                print("   -> Check not_found_suggestions.csv for likely typos or missing suffixes")
 
         if stats['need_best_seller_flag'] > 0:
             print(f"[TAG]  {stats['need_best_seller_flag']} products need isBestSeller flag updated")
-            print("   -> Update these in Caspio database to mark as best sellers")
+            print(f"   -> Apply {FLAG_UPDATES}.sql, or send the bulk requests in {FLAG_UPDATES}.json:")
+            print(f"      python -m nwca_catalog.flags {OUTPUT_FILE} --flag isBestSeller --dry-run")
 
         if stats['already_best_sellers'] > 0:
             print(f"[OK] {stats['already_best_sellers']} products already marked as best sellers")
@@ -482,22 +652,171 @@ class TopSellerProcessor:
             print(f"[WARN]  {stats['discontinued']} products marked as discontinued")
             print("   -> Consider removing from top sellers list")
 
+        if stats.get('invalid_sizes'):
+            print(f"[WARN]  {stats['invalid_sizes']} rows use a size the catalog does not list for the style")
+            print(f"   -> Review {INVALID_SIZES_FILE} and correct the ShopWorks part numbers")
+
+        if stats.get('near_duplicate_rows'):
+            print(f"[WARN]  {stats['near_duplicate_rows']} rows look like another row's product under a different style")
+            print(f"   -> Review {CLUSTERS_FILE}; keep the canonical style of each cluster")
+
         print("\n[OK] Processing complete!")
         print(f"\n[FILES] Output files:")
         print(f"   - cleaned_top_sellers.csv")
         print(f"   - validation_report.txt")
+        if self.order_sources:
+            print(f"   - {RANKING_FILE}")
+        if not invalid_sizes.empty:
+            print(f"   - {INVALID_SIZES_FILE}")
+        if not duplicates.empty:
+            print(f"   - {CLUSTERS_FILE}")
         if not not_found.empty:
             print(f"   - not_found.csv")
-
-        return df, stats
-
-
-async def main():
+        if not suggestions.empty:
+            print(f"   - not_found_suggestions.csv")
+        if flag_plan.to_set:
+            print(f"   - {FLAG_UPDATES}.sql / .json")
+
+        return stats
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Command-line options"""
+    parser = argparse.ArgumentParser(
+        description="Clean the top sellers list and validate it against the Caspio Pricing Proxy API"
+    )
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument(
+        '--input', '-i', action='append', metavar='PATH',
+        help="CSV file, glob pattern or '-' for stdin (gzip is detected automatically); "
+             "repeat for several inputs. Default: the embedded CSV_DATA"
+    )
+    source.add_argument(
+        '--orders', action='append', metavar='PATH',
+        help="ShopWorks order-line export (CSV, CSV.gz, Parquet or glob; PartNumber, OrderType, id_Order, "
+             "LineQuantity, LineUnitPrice): validate the top sellers ranked from it instead of a list"
+    )
+    parser.add_argument(
+        '--top', type=int, default=DEFAULT_TOP, metavar='K',
+        help=f"With --orders: styles kept per decoration method (default {DEFAULT_TOP})"
+    )
+    parser.add_argument(
+        '--rank-by', type=str.title, choices=RANK_BY, default='Units',
+        help="With --orders: rank by units sold, distinct orders or revenue (default units)"
+    )
+    parser.add_argument(
+        '--variants', action='store_true',
+        help="Check size suffixes (C112_OSFA, PC78H_2X) against the sizes product-details lists for each "
+             "style (one extra request per found style with a suffix)"
+    )
+    parser.add_argument(
+        '--clusters', action='store_true',
+        help=f"Group rows whose descriptions are near-duplicates within an order type (e.g. one product "
+             f"under two style numbers) and write {CLUSTERS_FILE}"
+    )
+    parser.add_argument(
+        '--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+        help=f"Rows read and validated per chunk (default {DEFAULT_CHUNK_SIZE:,})"
+    )
+    parser.add_argument(
+        '--queue-depth', type=int, default=DEFAULT_DEPTH,
+        help=f"Chunks buffered between the read, validate and write stages (default {DEFAULT_DEPTH})"
+    )
+    parser.add_argument(
+        '--max-concurrency', type=int, default=DEFAULT_MAXIMUM,
+        help=f"Upper bound for the adaptive number of in-flight requests (default {DEFAULT_MAXIMUM})"
+    )
+    parser.add_argument(
+        '--target-latency', type=float, default=DEFAULT_TARGET_LATENCY, metavar='SECONDS',
+        help=f"Grow concurrency only while responses are faster than this (default {DEFAULT_TARGET_LATENCY})"
+    )
+    parser.add_argument(
+        '--max-retries', type=int, default=DEFAULT_MAX_RETRIES,
+        help=f"Retries per style for timeouts, dropped connections, 408/429/5xx (default {DEFAULT_MAX_RETRIES})"
+    )
+    parser.add_argument(
+        '--breaker-threshold', type=float, default=DEFAULT_FAILURE_RATE, metavar='RATE',
+        help=f"Failure rate over recent calls that opens the API circuit (default {DEFAULT_FAILURE_RATE})"
+    )
+    parser.add_argument(
+        '--breaker-cooldown', type=float, default=DEFAULT_COOLDOWN, metavar='SECONDS',
+        help=f"Time the circuit stays open before probing the API again (default {DEFAULT_COOLDOWN:g})"
+    )
+    parser.add_argument(
+        '--journal', default=JOURNAL_FILE, metavar='PATH',
+        help=f"JSON-lines journal of completed validations (default {JOURNAL_FILE})"
+    )
+    parser.add_argument(
+        '--resume', action='store_true',
+        help="Replay the journal from an interrupted run and validate only the remaining styles"
+    )
+    parser.add_argument(
+        '--shared-cache', default=SHARED_CACHE_FILE, metavar='PATH',
+        help=f"Style results shared with the other validation script (default {SHARED_CACHE_FILE})"
+    )
+    parser.add_argument(
+        '--no-shared-cache', dest='shared_cache', action='store_const', const=None,
+        help="Neither reuse nor record shared style results"
+    )
+    parser.add_argument(
+        '--cache-max-age', type=float, default=DEFAULT_CACHE_MAX_AGE / 3600, metavar='HOURS',
+        help=f"Reuse shared results up to this old (default {DEFAULT_CACHE_MAX_AGE / 3600:g})"
+    )
+    parser.add_argument(
+        '--delta', nargs='?', const=OUTPUT_FILE, metavar='PATH',
+        help=f"Carry forward unchanged styles from a previous output (default {OUTPUT_FILE}) and "
+             "validate only new or changed rows and previous errors"
+    )
+    parser.add_argument(
+        '--stream', metavar='PATH',
+        help="Write each style's result as a JSON line as soon as it is known, to a file, "
+             "named pipe or '-' for stdout (console output then goes to stderr)"
+    )
+    sharding = parser.add_mutually_exclusive_group()
+    sharding.add_argument(
+        '--shard', type=Shard.parse, metavar='I/N',
+        help="Validate only the styles in shard I of N (stable hash) with its part of the request budget"
+    )
+    sharding.add_argument(
+        '--merge', nargs='+', metavar='DIR',
+        help="Combine the outputs of shard runs in these directories into the usual CSVs and report "
+             "(same input; no API calls)"
+    )
+    args = parser.parse_args(argv)
+    # Every shard needs at least one request slot
+    if args.shard and args.shard.count > args.max_concurrency:
+        parser.error(f"{args.shard.count} shards cannot split --max-concurrency {args.max_concurrency}")
+    return args
+
+
+async def main(argv: Optional[List[str]] = None):
     """Main entry point"""
+    args = parse_args(argv)
+    cancel_on_sigint(asyncio.current_task())
     try:
-        processor = TopSellerProcessor()
-        df, stats = await processor.process()
+        processor = TopSellerProcessor(sources=args.input, chunk_size=args.chunk_size,
+                                       queue_depth=args.queue_depth,
+                                       journal_path=args.journal, resume=args.resume,
+                                       max_concurrent=args.max_concurrency,
+                                       target_latency=args.target_latency,
+                                       max_retries=args.max_retries,
+                                       breaker_threshold=args.breaker_threshold,
+                                       breaker_cooldown=args.breaker_cooldown,
+                                       delta_path=args.delta,
+                                       shared_cache_path=args.shared_cache,
+                                       cache_max_age=args.cache_max_age * 3600,
+                                       stream_path=args.stream,
+                                       shard=args.shard, merge_dirs=args.merge,
+                                       order_sources=args.orders, top_k=args.top, rank_by=args.rank_by,
+                                       check_variants=args.variants, find_clusters=args.clusters)
+        # Keep stdout for the result stream when it is the --stream target
+        with contextlib.redirect_stdout(sys.stderr) if args.stream == STDOUT else contextlib.nullcontext():
+            await processor.process()
         return 0
+    except asyncio.CancelledError:
+        print(f"\n[WARN]  Stopped early; completed styles are in {args.journal}. "
+              f"Re-run with --resume to continue.", file=sys.stderr)
+        return 130
     except Exception as e:
         print(f"\n[ERROR] Error: {e}", file=sys.stderr)
         import traceback